@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Benchmark how long the program takes to start up.
+
+Each command is run several times in a fresh interpreter and the median
+wall time is reported. Run this from anywhere:
+
+    ./benchmarks/startup.py [--runs N]
+
+The commands are run on a copy of the program in a temporary directory,
+so the output page and route cache they write don't touch the
+repository.
+"""
+
+import argparse
+import pathlib
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+REPOSITORY_ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+ENTRY_POINT_NAME = "sm64-route-optimizer.py"
+DEFAULT_NUM_RUNS = 10
+
+# The files the program needs, which are copied (if they exist)
+PROGRAM_FILE_NAMES = [
+    "optimizer",
+    ENTRY_POINT_NAME,
+    "config.toml.example",
+    "config.toml",
+]
+
+COMMANDS = {
+    "import optimizer.main": [sys.executable, "-c", "import optimizer.main"],
+    "--help": [sys.executable, ENTRY_POINT_NAME, "--help"],
+    "-g -f (fake route)": [sys.executable, ENTRY_POINT_NAME, "-g", "-f"],
+    "-g --no-cache (optimize)": [
+        sys.executable,
+        ENTRY_POINT_NAME,
+        "-g",
+        "--no-cache",
+    ],
+}
+
+
+def copy_program(target_dir: pathlib.Path) -> None:
+    """Copy the program to a directory.
+
+    Args:
+        target_dir: The directory to copy the program to.
+    """
+    for file_name in PROGRAM_FILE_NAMES:
+        source_path = REPOSITORY_ROOT_DIR / file_name
+
+        if source_path.is_dir():
+            shutil.copytree(
+                source_path,
+                target_dir / file_name,
+                ignore=shutil.ignore_patterns("__pycache__"),
+            )
+        elif source_path.is_file():
+            shutil.copy2(source_path, target_dir / file_name)
+
+
+def time_command(command: list[str], num_runs: int, cwd: pathlib.Path) -> float:
+    """Get the median wall time of a command.
+
+    Args:
+        command: The command to run.
+        num_runs: The number of times to run the command.
+        cwd: The directory to run the command in.
+
+    Returns:
+        The median number of seconds the command took.
+    """
+    run_times = []
+
+    for _ in range(num_runs):
+        start_time = time.perf_counter()
+
+        subprocess.run(
+            command,
+            cwd=cwd,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        run_times.append(time.perf_counter() - start_time)
+
+    return statistics.median(run_times)
+
+
+def main() -> None:
+    """Time each command and print a table of the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--runs",
+        help="set number of times to run each command (defaults to"
+        f" {DEFAULT_NUM_RUNS})",
+        metavar="N",
+        type=int,
+        default=DEFAULT_NUM_RUNS,
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as program_dir:
+        program_dir = pathlib.Path(program_dir)
+
+        copy_program(program_dir)
+
+        for name, command in COMMANDS.items():
+            print(
+                f"{name:<28}"
+                f" {time_command(command, args.runs, program_dir) * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
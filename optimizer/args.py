@@ -2,7 +2,24 @@
 
 import argparse
 import pathlib
-from .constants import DataKeys, EXPECTED_CONFIG_FILE, NUM_STARS_IN_ROUTE
+from .constants import (
+    ALL_ENGINES,
+    BATCH_OUTPUT_DIR_NAME,
+    BREAK_EVEN_TIMES_FILE,
+    Commands,
+    DataKeys,
+    DEFAULT_OBJECTIVE,
+    Engines,
+    EXCLUSION_TABLE_FILE,
+    EXPECTED_CONFIG_FILE,
+    NUM_STARS_IN_ROUTE,
+    RESULT_CACHE_DEFAULT_MAX_SIZE_MB,
+    RESULT_CACHE_DIR,
+    SERVER_DEFAULT_CACHE_SIZE,
+    SERVER_DEFAULT_HOST,
+    SERVER_DEFAULT_PORT,
+    SIMULATION_DEFAULT_NUM_TRIALS,
+)
 from . import util
 
 
@@ -46,6 +63,180 @@ def get_runtime_args() -> argparse.Namespace:
         type=int,
         default=NUM_STARS_IN_ROUTE,
     )
+    parser.add_argument(
+        "--watch",
+        help="keep running, re-optimizing the route and rewriting the output"
+        " page whenever the config file is saved (partition engine only;"
+        " ignores --top-k and --time-budget)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--simulate",
+        help="simulate the route's time by resampling each star's recorded"
+        " times and show the distribution of route times",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--simulate-trials",
+        help="set number of route times to simulate (defaults to"
+        f" {SIMULATION_DEFAULT_NUM_TRIALS})",
+        metavar="N",
+        type=int,
+        default=SIMULATION_DEFAULT_NUM_TRIALS,
+    )
+    parser.add_argument(
+        "--target-time",
+        help="show the simulated probability of the route beating the given"
+        " time, given as seconds or as minutes and seconds (e.g., 61:30)"
+        " (implies --simulate)",
+        metavar="TIME",
+        type=util.convert_time_string_to_seconds,
+    )
+    parser.add_argument(
+        "--batch",
+        help="find optimal routes for every config TOML file in the given"
+        " directory instead of for --config, writing a route page and JSON"
+        " file for each config along with an index page (uses --workers"
+        " processes, each of which finds one route at a time)",
+        metavar="DIR",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "--batch-output-dir",
+        help="write batch output to the given directory (defaults to"
+        f" {BATCH_OUTPUT_DIR_NAME} in the batch directory)",
+        metavar="DIR",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "--sweep-upper-levels",
+        help="print a table of optimal routes for every maximum number of"
+        " upper level stars from 0 to 70 instead of generating a route"
+        " page (uses the dp engine)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--objective",
+        help="minimize the sum of each star's cost, where the cost is the"
+        " mean of the star's times (mean; the default), their mean plus K"
+        " standard deviations (mean+Ksd, e.g., mean+1.0sd), or their Nth"
+        " percentile (pN, e.g., p75)",
+        metavar="OBJECTIVE",
+        type=util.parse_objective,
+        default=DEFAULT_OBJECTIVE,
+    )
+    parser.add_argument(
+        "--sweep-risk",
+        help="print a table of optimal routes minimizing each star's mean"
+        " time plus K standard deviations for each given K instead of"
+        " generating a route page (partition engine)",
+        metavar="K",
+        nargs="+",
+        type=float,
+    )
+    parser.add_argument(
+        "--practice-priorities",
+        help="print a table of stars ranked by how much faster the fastest"
+        " route gets if each star's average time improves by IMPROVEMENT"
+        " instead of generating a route page, where IMPROVEMENT is a number"
+        " of seconds (e.g., 5) or a percentage (e.g., 10%%)",
+        metavar="IMPROVEMENT",
+        type=util.parse_improvement,
+    )
+    parser.add_argument(
+        "--frontier",
+        help="also find the routes trading mean time against variance (each"
+        " the fastest on average for its variance) and show them in the"
+        " output page",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--exclusion-penalties",
+        help="also find how much slower the optimal route gets if each of its"
+        " stars is excluded and show it in the output page",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--break-even-times",
+        help="also find the average time at which each star leaves or enters"
+        " the fastest route, write them to the given JSON file (defaults to"
+        f" {BREAK_EVEN_TIMES_FILE}), and show them in the output page (mean"
+        " objective only)",
+        nargs="?",
+        const=BREAK_EVEN_TIMES_FILE,
+        default=None,
+        type=pathlib.Path,
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--engine",
+        help="set the optimization engine used to find an optimal route",
+        choices=ALL_ENGINES,
+        default=Engines.PARTITION,
+    )
+    parser.add_argument(
+        "--top-k",
+        help="find the K fastest distinct routes and show them all in the"
+        " output page (partition engine only)",
+        metavar="K",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--time-budget",
+        help="stop searching after the given number of seconds and use the"
+        " fastest route found so far, which may not be optimal (partition"
+        " engine only)",
+        metavar="SECONDS",
+        type=float,
+    )
+    parser.add_argument(
+        "--disable-pruning",
+        help="evaluate every special star partition instead of skipping"
+        " partitions which can't lead to a faster route (slow; partition engine"
+        " only)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--workers",
+        help="set number of processes to search for an optimal route with"
+        " (partition engine only)",
+        metavar="N",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="cache routes in the given directory so that re-running with"
+        f" the same times and options skips optimization (defaults to"
+        f" {RESULT_CACHE_DIR})",
+        metavar="DIR",
+        type=pathlib.Path,
+        default=RESULT_CACHE_DIR,
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        help="set the size the route cache is kept under by removing the"
+        f" least recently used routes (defaults to"
+        f" {RESULT_CACHE_DEFAULT_MAX_SIZE_MB})",
+        metavar="MB",
+        type=float,
+        default=RESULT_CACHE_DEFAULT_MAX_SIZE_MB,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="neither read nor write cached routes",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--exclusion-table",
+        help="look up routes for excluded courses in the given table made by"
+        f" the {Commands.PRECOMPUTE_EXCLUSIONS} command, if it's for the same"
+        f" times and options (defaults to {EXCLUSION_TABLE_FILE})",
+        metavar="FILE",
+        type=pathlib.Path,
+        default=EXCLUSION_TABLE_FILE,
+    )
     # NOTE: Use this in development to get output without having
     # sufficient data
     parser.add_argument(
@@ -64,5 +255,68 @@ def get_runtime_args() -> argparse.Namespace:
         action="store_true",
     )
 
+    # Set up commands
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    serve_parser = subparsers.add_parser(
+        Commands.SERVE,
+        help="serve optimal routes over HTTP instead of generating a route page",
+        description="Serve optimal routes over HTTP. POST a config (TOML or"
+        " JSON) to /route to get an optimal route.",
+    )
+    serve_parser.add_argument(
+        "--host",
+        help=f"listen on the given host (defaults to {SERVER_DEFAULT_HOST})",
+        default=SERVER_DEFAULT_HOST,
+    )
+    serve_parser.add_argument(
+        "--port",
+        help=f"listen on the given port (defaults to {SERVER_DEFAULT_PORT})",
+        type=int,
+        default=SERVER_DEFAULT_PORT,
+    )
+    serve_parser.add_argument(
+        "--processes",
+        help="set number of processes to find routes with (defaults to the"
+        " number of CPUs)",
+        metavar="N",
+        type=int,
+    )
+    serve_parser.add_argument(
+        "--cache-size",
+        help="set number of results to keep in memory (defaults to"
+        f" {SERVER_DEFAULT_CACHE_SIZE})",
+        metavar="N",
+        type=int,
+        default=SERVER_DEFAULT_CACHE_SIZE,
+    )
+
+    precompute_exclusions_parser = subparsers.add_parser(
+        Commands.PRECOMPUTE_EXCLUSIONS,
+        help="find the optimal route for every set of excluded courses and"
+        " store them in the exclusion table",
+        description="Find the optimal route for every set of excluded courses"
+        " (other than the castle) and store them in the exclusion table (see"
+        " --exclusion-table), so that later runs with the same times and"
+        " options look routes up instead of searching for them.",
+    )
+    precompute_exclusions_parser.add_argument(
+        "--processes",
+        help="set number of processes to find routes with (defaults to the"
+        " number of CPUs)",
+        metavar="N",
+        type=int,
+    )
+
     # Parse arguments
-    return parser.parse_args()
+    args = parser.parse_args()
+
+    # Break-even times are average times, so they're only meaningful for
+    # the route with the fastest average time, which a fake route isn't
+    if args.break_even_times is not None and args.objective != DEFAULT_OBJECTIVE:
+        parser.error("--break-even-times can't be used with --objective")
+
+    if args.break_even_times is not None and args.generate_fake_route:
+        parser.error("--break-even-times can't be used with --generate-fake-route")
+
+    return args
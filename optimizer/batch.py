@@ -0,0 +1,392 @@
+"""Contains functions to find optimal routes for many configs at once.
+
+Every config in a directory is loaded and validated up front. Configs
+with the same prerequisites and 100 coin star pairings share one
+compiled problem (see the problem module), so the course data is only
+processed once per distinct structure rather than once per config. The
+routes are then found in a pool of processes, each of which is sent the
+shared problems once, and a route page and JSON file is written for
+each config along with an index page linking to them.
+"""
+
+import concurrent.futures
+import json
+import logging
+import pathlib
+import signal
+from .config import get_and_validate_config
+from .constants import BATCH_INDEX_HTML_FILE_NAME, DEFAULT_OBJECTIVE, Engines
+from .engines import find_routes
+from .exceptions import (
+    ConfigFileInvalid,
+    ConfigFileNotFound,
+    InvalidExcludedStarIds,
+    NoValidRoutePossible,
+)
+from .problem import get_structure_key, Problem
+from . import result_cache
+
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+
+# Problems shared by every task in a worker process, keyed by structure
+# key. These are set once per process by _init_worker rather than being
+# sent along with every task.
+_worker_problems: dict[str, Problem] = {}
+_worker_structure_kwargs: dict[str, dict] = {}
+
+
+def _init_worker(problems: dict[str, Problem]) -> None:
+    """Store the shared problems for a worker process.
+
+    Keyboard interrupts are ignored in worker processes: the main
+    process handles them by cancelling the remaining tasks.
+
+    Args:
+        problems: A dictionary containing structure keys as keys and
+          problems with that structure as values.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    _worker_problems.update(problems)
+    _worker_structure_kwargs.update(
+        {
+            structure_key: problem.get_structure_kwargs()
+            for structure_key, problem in problems.items()
+        }
+    )
+
+
+def _find_runner_routes(
+    structure_key: str,
+    star_times: list[float | None],
+    star_time_samples: list[list[float]],
+    find_routes_kwargs: dict,
+) -> tuple[list[tuple[set[str], float]], bool] | str:
+    """Find the fastest routes for a runner in a worker process.
+
+    Args:
+        structure_key: The structure key of the runner's config.
+        star_times: A list indexed by star index of the average time of
+          each of the runner's stars, or None for stars without times.
+        star_time_samples: A list indexed by star index of the times
+          recorded for each of the runner's stars.
+        find_routes_kwargs: Keyword arguments for find_routes other than
+          optimize_kwargs, along with the excluded course and star IDs
+          and the maximum number of upper level stars.
+
+    Returns:
+        Either the routes and whether the first route is proven to be
+        optimal, as returned by find_routes, or an error message if no
+        route is possible.
+    """
+    find_routes_kwargs = dict(find_routes_kwargs)
+    problem = _worker_problems[structure_key].with_star_times(
+        star_times, star_time_samples
+    )
+
+    optimize_kwargs = {
+        "star_time_tuples": problem.get_eligible_star_time_tuples(
+            excluded_course_ids=find_routes_kwargs.pop("excluded_course_ids"),
+            excluded_star_ids=find_routes_kwargs.pop("excluded_star_ids"),
+        ),
+        "max_num_upper_level_stars": find_routes_kwargs.pop(
+            "max_num_upper_level_stars"
+        ),
+        **_worker_structure_kwargs[structure_key],
+    }
+
+    try:
+        return find_routes(optimize_kwargs, **find_routes_kwargs)
+    except NoValidRoutePossible as e:
+        return str(e)
+
+
+def optimize_batch(
+    batch_dir: pathlib.Path,
+    output_dir: pathlib.Path,
+    excluded_course_ids: set[str],
+    excluded_star_ids: set[str],
+    max_num_upper_level_stars: int,
+    engine: str,
+    objective: tuple[str, float] = DEFAULT_OBJECTIVE,
+    num_routes: int = 1,
+    time_budget: float | None = None,
+    prune_partitions: bool = True,
+    num_processes: int = 1,
+    cache_dir: pathlib.Path | None = None,
+    max_cache_size: int = 0,
+    generate_fake_times: bool = False,
+) -> list[dict]:
+    """Find optimal routes for every config in a directory.
+
+    Each config is a runner, named after the config's file name without
+    its extension. A route page and a JSON file named after the runner
+    are written to the output directory for each runner, along with an
+    index page. Runners whose configs are invalid or for which no route
+    is possible are logged and listed in the index page with their
+    errors, and we carry on with the other runners.
+
+    Args:
+        batch_dir: The directory containing the configs (TOML files).
+        output_dir: The directory to write the output to, which is
+          created if it doesn't exist.
+        excluded_course_ids: A set containing course IDs to exclude.
+        excluded_star_ids: A set containing star IDs to exclude.
+        max_num_upper_level_stars: The maximum number of upper level
+          stars allowed in each route.
+        engine: The optimization engine to use.
+        objective: The objective to optimize each route for (see
+          Objectives in the constants module).
+        num_routes: The number of fastest distinct routes to find for
+          each runner (partition engine only).
+        time_budget: An optional number of seconds after which to stop
+          searching for each runner's routes (partition engine only).
+        prune_partitions: Whether to skip special star partitions which
+          can't lead to a faster route.
+        num_processes: The number of processes to find routes with.
+          Each runner's routes are found in a single process.
+        cache_dir: An optional directory to cache routes in (see the
+          result_cache module).
+        max_cache_size: The maximum total size of the cache entries in
+          bytes.
+        generate_fake_times: A flag for the program to generate fake
+          times for each star.
+
+    Returns:
+        A list containing a dictionary for each runner, as shown in the
+        index page (see the generate_batch_index_html function of the
+        html module).
+
+    Raises:
+        ConfigFileNotFound: If the directory doesn't contain any
+          configs.
+    """
+    # Import this here since the HTML stack is slow to import
+    from .html import generate_batch_index_html, generate_page_html
+
+    config_paths = sorted(batch_dir.glob("*.toml"))
+
+    if not config_paths:
+        raise ConfigFileNotFound(f"No config files found in {batch_dir}.")
+
+    if engine == Engines.DP:
+        num_routes = 1
+
+    # Load every config, compiling one problem per distinct structure
+    structure_problems: dict[str, Problem] = {}
+    runner_results: dict[str, dict] = {}
+    runner_problems: dict[str, Problem] = {}
+    runner_objective_problems: dict[str, Problem] = {}
+    runner_structure_keys: dict[str, str] = {}
+    runner_problem_hashes: dict[str, str] = {}
+    runner_routes: dict[str, tuple[list[tuple[set[str], float]], bool]] = {}
+
+    for config_path in config_paths:
+        runner = config_path.stem
+        runner_results[runner] = {"runner": runner}
+
+        try:
+            config_data = get_and_validate_config(
+                target_config_path=config_path,
+                generate_fake_times=generate_fake_times,
+            )
+
+            structure_key = get_structure_key(config_data)
+
+            if structure_key in structure_problems:
+                problem = structure_problems[structure_key].with_config_times(
+                    config_data=config_data, generate_fake_times=generate_fake_times
+                )
+            else:
+                problem = Problem(
+                    config_data=config_data, generate_fake_times=generate_fake_times
+                )
+                structure_problems[structure_key] = problem
+
+            problem.validate_excluded_star_ids(excluded_star_ids)
+        except (ConfigFileInvalid, InvalidExcludedStarIds) as e:
+            logger.error("%s: %s", runner, e)
+
+            runner_results[runner]["error"] = str(e)
+
+            continue
+
+        runner_problems[runner] = problem
+        runner_objective_problems[runner] = problem.with_objective(objective)
+        runner_structure_keys[runner] = structure_key
+
+        # Use cached routes if we've already solved this runner's problem
+        if cache_dir is not None:
+            runner_problem_hashes[runner] = result_cache.get_route_problem_hash(
+                star_times_dict={
+                    star_id: time
+                    for time, star_id in runner_objective_problems[
+                        runner
+                    ].get_eligible_star_time_tuples(
+                        excluded_course_ids=excluded_course_ids,
+                        excluded_star_ids=excluded_star_ids,
+                    )
+                },
+                config_data=config_data,
+                max_num_upper_level_stars=max_num_upper_level_stars,
+                engine=engine,
+                num_routes=num_routes,
+            )
+            routes = result_cache.load_routes(cache_dir, runner_problem_hashes[runner])
+
+            if routes is not None:
+                logger.info("%s: using cached route from %s.", runner, cache_dir)
+
+                runner_routes[runner] = (routes, True)
+
+    logger.info(
+        "Loaded %d configs with %d distinct prerequisite structures.",
+        len(config_paths),
+        len(structure_problems),
+    )
+
+    # Find the routes which weren't cached
+    runners_to_solve = [
+        runner for runner in runner_problems if runner not in runner_routes
+    ]
+
+    if runners_to_solve:
+        logger.info(
+            "Finding optimal routes for %d runners with %d processes.",
+            len(runners_to_solve),
+            num_processes,
+        )
+
+        find_routes_kwargs = {
+            "excluded_course_ids": excluded_course_ids,
+            "excluded_star_ids": excluded_star_ids,
+            "max_num_upper_level_stars": max_num_upper_level_stars,
+            "engine": engine,
+            "num_routes": num_routes,
+            "time_budget": time_budget,
+            "prune_partitions": prune_partitions,
+        }
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=num_processes,
+            initializer=_init_worker,
+            initargs=(structure_problems,),
+        ) as executor:
+            futures = {
+                runner: executor.submit(
+                    _find_runner_routes,
+                    runner_structure_keys[runner],
+                    runner_objective_problems[runner].star_times,
+                    runner_objective_problems[runner].star_time_samples,
+                    find_routes_kwargs,
+                )
+                for runner in runners_to_solve
+            }
+
+            try:
+                concurrent.futures.wait(futures.values())
+            except KeyboardInterrupt:
+                for future in futures.values():
+                    future.cancel()
+
+                raise
+
+        for runner, future in futures.items():
+            result = future.result()
+
+            if isinstance(result, str):
+                logger.error("%s: %s", runner, result)
+
+                runner_results[runner]["error"] = result
+
+                continue
+
+            runner_routes[runner] = result
+            routes, route_is_proven_optimal = result
+
+            # Only cache complete searches, since a search which was
+            # stopped early might find a faster route given more time
+            if cache_dir is not None and route_is_proven_optimal:
+                result_cache.store_routes(
+                    cache_dir=cache_dir,
+                    problem_hash=runner_problem_hashes[runner],
+                    routes=routes,
+                    max_cache_size=max_cache_size,
+                )
+
+    # Write each runner's route page and JSON file, and then the index
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    for runner, (routes, route_is_proven_optimal) in runner_routes.items():
+        (route_star_ids, route_time), *alternative_routes = routes
+        route_objective_value = None
+
+        # Routes found for a risk-aware objective have the objective's
+        # value as their time, so use their actual times
+        if objective != DEFAULT_OBJECTIVE:
+            route_objective_value = route_time
+            route_time = runner_problems[runner].get_route_time(route_star_ids)
+            alternative_routes = [
+                (
+                    alternative_star_ids,
+                    runner_problems[runner].get_route_time(alternative_star_ids),
+                )
+                for alternative_star_ids, _ in alternative_routes
+            ]
+
+        page_html = generate_page_html(
+            route_star_ids=route_star_ids,
+            route_time=route_time,
+            route_is_proven_optimal=route_is_proven_optimal,
+            problem=runner_problems[runner],
+            alternative_routes=alternative_routes,
+            objective=objective,
+            route_objective_value=route_objective_value,
+        )
+
+        with open(output_dir / f"{runner}.html", "w", encoding="utf-8") as f:
+            f.write(page_html)
+
+        with open(output_dir / f"{runner}.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "runner": runner,
+                    **runner_problems[runner].get_route_json(route_star_ids),
+                    "route_time": route_time,
+                    "route_is_proven_optimal": route_is_proven_optimal,
+                    "alternative_routes": [
+                        {
+                            **runner_problems[runner].get_route_json(
+                                alternative_route_star_ids
+                            ),
+                            "route_time": alternative_route_time,
+                        }
+                        for alternative_route_star_ids, alternative_route_time in (
+                            alternative_routes
+                        )
+                    ],
+                },
+                f,
+                indent=2,
+            )
+
+        runner_results[runner].update(
+            page=f"{runner}.html",
+            route_time=route_time,
+            route_is_proven_optimal=route_is_proven_optimal,
+        )
+
+    with open(output_dir / BATCH_INDEX_HTML_FILE_NAME, "w", encoding="utf-8") as f:
+        f.write(generate_batch_index_html(list(runner_results.values())))
+
+    logger.info(
+        "Wrote routes for %d of %d runners to %s.",
+        len(runner_routes),
+        len(config_paths),
+        output_dir,
+    )
+
+    return list(runner_results.values())
@@ -3,7 +3,6 @@
 import logging
 import pathlib
 import tomllib
-from cerberus import Validator
 from .constants import ConfigKeys, DataKeys, EXAMPLE_CONFIG_FILE
 from .exceptions import ConfigFileInvalid, ConfigFileNotFound
 from . import util
@@ -13,12 +12,41 @@ from . import util
 logger = logging.getLogger(__name__)
 
 
-# Schema for config data
+# Python types for the types used in schemas. Booleans aren't accepted
+# for any type, despite being integers.
+SCHEMA_TYPES = {
+    "dict": dict,
+    "list": list,
+    "float": (float, int),
+    "string": str,
+}
+
+# Schema for config data. This uses a subset of the rules of the
+# Cerberus validation library: "type", "required", "allowed",
+# "keysrules", "valuesrules", "schema", and "anyof" (see
+# get_schema_errors).
 NON_100_COIN_STARS = util.get_star_ids(include_all_possible_100_coin_stars=False)
 
+HUNDRED_COIN_STAR_SCHEMA = {
+    ConfigKeys.HUNDRED_COIN_TIMES: {
+        "type": "list",
+        "required": True,
+        "schema": {"type": "float"},
+    },
+    ConfigKeys.HUNDRED_COIN_COMBINED_WITH: {
+        "type": "string",
+        "required": True,
+        "allowed": util.get_star_ids(
+            include_all_possible_100_coin_stars=False,
+            include_castle_stars=False,
+        ),
+    },
+}
+
 CONFIG_DATA_SCHEMA = {
     ConfigKeys.TIMES_TABLE: {
         "type": "dict",
+        "required": True,
         "keysrules": {
             "type": "string",
             "allowed": NON_100_COIN_STARS,
@@ -27,29 +55,26 @@ CONFIG_DATA_SCHEMA = {
     },
     ConfigKeys.HUNDRED_COIN_TIMES_TABLE: {
         "type": "dict",
+        "required": True,
         "keysrules": {
             "type": "string",
             "allowed": util.get_all_possible_100_coin_star_ids(),
         },
+        # Either a single 100 coin star or a list of candidates, each
+        # combined with a different star
         "valuesrules": {
-            "type": "dict",
-            "schema": {
-                ConfigKeys.HUNDRED_COIN_TIMES: {
+            "anyof": [
+                {"type": "dict", "schema": HUNDRED_COIN_STAR_SCHEMA},
+                {
                     "type": "list",
-                    "schema": {"type": "float"},
+                    "schema": {"type": "dict", "schema": HUNDRED_COIN_STAR_SCHEMA},
                 },
-                ConfigKeys.HUNDRED_COIN_COMBINED_WITH: {
-                    "type": "string",
-                    "allowed": util.get_star_ids(
-                        include_all_possible_100_coin_stars=False,
-                        include_castle_stars=False,
-                    ),
-                },
-            },
+            ],
         },
     },
     ConfigKeys.PREREQUISITES_TABLE: {
         "type": "dict",
+        "required": True,
         "keysrules": {"type": "string", "allowed": NON_100_COIN_STARS},
         "valuesrules": {
             "type": "list",
@@ -113,18 +138,63 @@ def get_and_validate_config(
 
     # Read in config data
     with open(config_file, "rb") as f:
-        config_data = tomllib.load(f)
+        try:
+            config_data = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise ConfigFileInvalid(
+                f"Config at {target_config_path} is not valid TOML: {e}"
+            ) from e
 
-    # Validate data
-    validator = Validator(CONFIG_DATA_SCHEMA)
+    return validate_config_data(
+        config_data,
+        config_name=f"Config at {target_config_path}",
+        generate_fake_times=generate_fake_times,
+    )
+
+
+def validate_config_data(
+    config_data: dict, config_name: str, generate_fake_times: bool = False
+) -> dict[str, dict]:
+    """Validate user config data.
+
+    Args:
+        config_data: The user's configuration data, e.g., as loaded from
+          a TOML file.
+        config_name: A description of where the config came from to use
+          in error messages, e.g., "Config at config.toml".
+        generate_fake_times: A flag for the program to generate fake
+          times for each star.
+
+    Returns:
+        The validated config data.
 
-    if not validator.validate(config_data):
-        # TODO: format this output better
+    Raises:
+        ConfigFileInvalid: If the config data was invalid.
+    """
+    # Validate data
+    if schema_errors := get_schema_errors(config_data, CONFIG_DATA_SCHEMA):
         raise ConfigFileInvalid(
-            f"Config at {target_config_path} is invalid due to the following schema errors: "
-            + str(validator.errors)
+            f"{config_name} is invalid due to the following schema errors: "
+            + "; ".join(schema_errors)
         )
 
+    # Ensure each of a 100 coin star's candidates is combined with a
+    # different star
+    for hundred_coin_star_id, hundred_coin_star_data in config_data[
+        ConfigKeys.HUNDRED_COIN_TIMES_TABLE
+    ].items():
+        if isinstance(hundred_coin_star_data, list):
+            combined_with_star_ids = [
+                candidate_data[ConfigKeys.HUNDRED_COIN_COMBINED_WITH]
+                for candidate_data in hundred_coin_star_data
+            ]
+
+            if len(set(combined_with_star_ids)) < len(combined_with_star_ids):
+                raise ConfigFileInvalid(
+                    f"{config_name} is invalid: {hundred_coin_star_id} has"
+                    " several candidates combined with the same star"
+                )
+
     # If we aren't generating fake times, ensure times for either DDD1
     # or DDD_100 combined with DDD1 are present
     #
@@ -143,23 +213,137 @@ def get_and_validate_config(
             and regular_star_times[DataKeys.STAR_DDD1_ID]
         )
 
-        # Now check whether DDD_100 and is combined with DDD1 and has times
-        hundred_coin_times = config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE]
-
-        ddd_100_okay = (
-            DataKeys.STAR_DDD_100_ID in hundred_coin_times
-            and hundred_coin_times[DataKeys.STAR_DDD_100_ID][
-                ConfigKeys.HUNDRED_COIN_COMBINED_WITH
-            ]
+        # Now check whether DDD_100 (or one of its candidates) is
+        # combined with DDD1 and has times
+        ddd_100_okay = any(
+            util.get_config_star_id(hundred_coin_star_id) == DataKeys.STAR_DDD_100_ID
+            and hundred_coin_star_data[ConfigKeys.HUNDRED_COIN_COMBINED_WITH]
             == DataKeys.STAR_DDD1_ID
-            and hundred_coin_times[DataKeys.STAR_DDD_100_ID][
-                ConfigKeys.HUNDRED_COIN_TIMES
-            ]
+            and hundred_coin_star_data[ConfigKeys.HUNDRED_COIN_TIMES]
+            for hundred_coin_star_id, hundred_coin_star_data in (
+                util.get_100_coin_star_candidates(
+                    config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE]
+                ).items()
+            )
         )
 
         if not ddd1_okay and not ddd_100_okay:
             raise ConfigFileInvalid(
-                f"No times found for {DataKeys.STAR_DDD1_ID} or a 100 coin alternative"
+                f"{config_name} is invalid: no times found for"
+                f" {DataKeys.STAR_DDD1_ID} or a 100 coin alternative"
             )
 
     return config_data
+
+
+def get_schema_errors(document: dict, schema: dict) -> list[str]:
+    """Check a document against a schema.
+
+    Only the rules used by CONFIG_DATA_SCHEMA are supported. As in
+    Cerberus, fields which aren't in a schema are unknown and so
+    invalid, "float" values may also be integers, and "anyof" takes a
+    list of sets of rules, at least one of which a value must pass.
+
+    Args:
+        document: The document to check.
+        schema: A dictionary which has field names as keys and
+          dictionaries of rules for each field as values.
+
+    Returns:
+        A list of messages describing each error, each prefixed by the
+        path of the value with the error. The list is empty if the
+        document is valid.
+    """
+
+    def _check_document(document: dict, schema: dict, path: str) -> list[str]:
+        """Check a dictionary against a schema for its fields.
+
+        Args:
+            document: The dictionary to check.
+            schema: The schema for the dictionary's fields.
+            path: The path of the dictionary, used to prefix errors.
+
+        Returns:
+            A list of messages describing each error.
+        """
+        errors = [
+            f"{path}{field}: required field"
+            for field, rules in schema.items()
+            if field not in document and rules.get("required", False)
+        ]
+
+        for field, value in document.items():
+            if field in schema:
+                errors += _check_value(value, schema[field], f"{path}{field}")
+            else:
+                errors.append(f"{path}{field}: unknown field")
+
+        return errors
+
+    def _check_value(value, rules: dict, path: str) -> list[str]:
+        """Check a value against a set of rules.
+
+        Args:
+            value: The value to check.
+            rules: A dictionary of rules for the value.
+            path: The path of the value, used to prefix errors.
+
+        Returns:
+            A list of messages describing each error.
+        """
+        # Check the value against each set of rules it could pass. If
+        # it passes none of them, report the errors for the set of rules
+        # whose type it has.
+        if "anyof" in rules:
+            anyof_errors = [
+                _check_value(value, anyof_rules, path) for anyof_rules in rules["anyof"]
+            ]
+
+            if not all(anyof_errors):
+                return []
+
+            return next(
+                (
+                    anyof_rules_errors
+                    for anyof_rules, anyof_rules_errors in zip(
+                        rules["anyof"], anyof_errors
+                    )
+                    if isinstance(value, SCHEMA_TYPES[anyof_rules["type"]])
+                ),
+                [
+                    f"{path}: must be of"
+                    f" {' or '.join(r['type'] for r in rules['anyof'])} type"
+                ],
+            )
+
+        # Don't check any further if the value has the wrong type, since
+        # the other rules assume the type is right
+        if "type" in rules and (
+            not isinstance(value, SCHEMA_TYPES[rules["type"]])
+            or isinstance(value, bool)
+        ):
+            return [f"{path}: must be of {rules['type']} type"]
+
+        errors = []
+
+        if "allowed" in rules and value not in rules["allowed"]:
+            errors.append(f"{path}: unallowed value {value!r}")
+
+        if "keysrules" in rules:
+            for key in value:
+                errors += _check_value(key, rules["keysrules"], f"{path}.{key}")
+
+        if "valuesrules" in rules:
+            for key, item in value.items():
+                errors += _check_value(item, rules["valuesrules"], f"{path}.{key}")
+
+        if "schema" in rules:
+            if isinstance(value, dict):
+                errors += _check_document(value, rules["schema"], f"{path}.")
+            else:
+                for index, item in enumerate(value):
+                    errors += _check_value(item, rules["schema"], f"{path}[{index}]")
+
+        return errors
+
+    return _check_document(document, schema, "")
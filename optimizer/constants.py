@@ -62,25 +62,123 @@ class Locations:
     UPSTAIRS = "upstairs"
 
 
-ALL_LOCATIONS = {
+ALL_LOCATIONS = [
     Locations.BASEMENT,
     Locations.COURTYARD,
     Locations.LOBBY,
     Locations.TIPPY,
     Locations.UPSTAIRS,
-}
+]
 UPPER_LEVEL_LOCATIONS = {Locations.TIPPY, Locations.UPSTAIRS}
 
 
+# Optimization engines
+class Engines:
+    """Contains optimization engine names.
+
+    The following is a list of what each engine name refers to:
+
+    partition: Search over partitions of special stars (see the optimize
+      module).
+    dp: Dynamic programming over all stars (see the optimize_dp module).
+    """
+
+    DP = "dp"
+    PARTITION = "partition"
+
+
+ALL_ENGINES = [Engines.PARTITION, Engines.DP]
+
+
+# Objectives
+class Objectives:
+    """Contains objective kinds.
+
+    An objective is a two-tuple of an objective kind and a parameter,
+    which gives the cost of each star that the optimizer minimizes the
+    sum of:
+
+    mean: The average of the star's times (the parameter is unused).
+    mean+sd: The average of the star's times plus the parameter times
+      their standard deviation.
+    quantile: The given quantile (from 0 to 1) of the star's times.
+    """
+
+    MEAN = "mean"
+    MEAN_PLUS_SD = "mean+sd"
+    QUANTILE = "quantile"
+
+
+DEFAULT_OBJECTIVE = (Objectives.MEAN, 0.0)
+
+
+# Commands
+class Commands:
+    """Contains command names.
+
+    Running the program without a command generates a route page.
+
+    serve: Serve optimal routes over HTTP (see the server module).
+    precompute-exclusions: Find the optimal route for every set of
+      excluded courses (see the exclusions module).
+    """
+
+    PRECOMPUTE_EXCLUSIONS = "precompute-exclusions"
+    SERVE = "serve"
+
+
+# Number of partial partitions to split special star partitions into
+# for each worker process when optimizing in parallel
+PARTIAL_PARTITIONS_PER_WORKER = 8
+
 # Indices for star time tuples lists
 # STAR_TIME_TUPLE_TIME_INDEX = 0
 STAR_TIME_TUPLE_STAR_ID_INDEX = 1
 
+# Separator between a 100 coin star's ID and the ID of the star it's
+# combined with, used to tell apart the 100 coin stars of a course
+# which has several combined with stars to choose from
+HUNDRED_COIN_CANDIDATE_SEPARATOR = "+"
+
 # Paths
 REPOSITORY_ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
 EXAMPLE_CONFIG_FILE = REPOSITORY_ROOT_DIR / "config.toml.example"
 EXPECTED_CONFIG_FILE = REPOSITORY_ROOT_DIR / "config.toml"
 OUTPUT_HTML_FILE = REPOSITORY_ROOT_DIR / "index.html"
+RESULT_CACHE_DIR = REPOSITORY_ROOT_DIR / ".route-cache"
+EXCLUSION_TABLE_FILE = REPOSITORY_ROOT_DIR / "exclusions.sqlite"
+BREAK_EVEN_TIMES_FILE = REPOSITORY_ROOT_DIR / "break-even-times.json"
+
+# Output names for batch mode. The output directory is relative to the
+# batch directory.
+BATCH_OUTPUT_DIR_NAME = "routes"
+BATCH_INDEX_HTML_FILE_NAME = "index.html"
+
+# Configuration for caching routes on disk. Bump the version whenever
+# the format of cache entries or the meaning of their contents changes.
+RESULT_CACHE_VERSION = 1
+RESULT_CACHE_DEFAULT_MAX_SIZE_MB = 16
+
+# Number of sets of excluded courses sent to a worker process at a time
+# when precomputing routes for every set of excluded courses
+EXCLUSION_TABLE_CHUNK_SIZE = 16
+
+# Configuration for simulating route times. Trials are simulated in
+# batches to bound the memory used for the sampled times.
+SIMULATION_DEFAULT_NUM_TRIALS = 100_000
+SIMULATION_BATCH_SIZE = 8192
+
+# The weight of the mean time relative to the variance when finding the
+# lowest variance route on the frontier of mean time against variance,
+# which breaks ties between equally low variance routes by mean time
+FRONTIER_LOWEST_VARIANCE_MEAN_WEIGHT = 1e-6
 
 # Configuration for HTML output
 MAXIMUM_COURSES_PER_ROW = 2
+FRONTIER_CHART_SIZE = (640, 320)
+FRONTIER_CHART_MARGIN = 40
+
+# Configuration for serving routes over HTTP
+SERVER_DEFAULT_HOST = "127.0.0.1"
+SERVER_DEFAULT_PORT = 8000
+SERVER_DEFAULT_CACHE_SIZE = 128
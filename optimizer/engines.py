@@ -0,0 +1,50 @@
+"""Contains a function to find routes with any optimization engine."""
+
+from .constants import Engines
+from .optimize import get_optimal_routes
+from .optimize_dp import get_optimal_route_dp
+
+
+def find_routes(
+    optimize_kwargs: dict,
+    engine: str,
+    num_routes: int = 1,
+    time_budget: float | None = None,
+    prune_partitions: bool = True,
+    num_workers: int = 1,
+) -> tuple[list[tuple[set[str], float]], bool]:
+    """Find the fastest routes with an optimization engine.
+
+    Args:
+        optimize_kwargs: The arguments common to both engines:
+          star_time_tuples, max_num_upper_level_stars, and the arguments
+          returned by the get_structure_kwargs method of a Problem.
+        engine: The optimization engine to use. The dp engine only finds
+          one route and can't be stopped early, so it ignores the rest
+          of the arguments.
+        num_routes: The number of fastest distinct routes to find.
+        time_budget: An optional number of seconds after which to stop
+          searching.
+        prune_partitions: Whether to skip special star partitions which
+          can't lead to a faster route.
+        num_workers: The number of processes to search with.
+
+    Returns:
+        A two-tuple containing (1) a list of tuples (route_star_ids,
+        route_time) for the routes found, fastest first, and (2) whether
+        the first route is proven to be optimal.
+
+    Raises:
+        NoValidRoutePossible: If we were unable to form any route due to
+          insufficient time data.
+    """
+    if engine == Engines.DP:
+        return ([get_optimal_route_dp(**optimize_kwargs)], True)
+
+    return get_optimal_routes(
+        **optimize_kwargs,
+        prune_partitions=prune_partitions,
+        num_workers=num_workers,
+        num_routes=num_routes,
+        time_budget=time_budget,
+    )
@@ -0,0 +1,450 @@
+"""Contains functions to precompute routes for excluded courses.
+
+There are 14 courses which can be excluded from a route (every course
+except for the castle and DDD, which is required), so there are only
+16,384 sets of excluded courses. The optimal route for every one of
+them is found once and stored in a SQLite database, after which the
+route for any set of excluded courses is looked up rather than searched
+for.
+
+Sets of excluded courses are solved from the most courses excluded to
+the least. Excluding fewer courses only makes more stars eligible, so
+the routes found when additionally excluding each other course are
+valid routes, and the fastest of them is used to start the search. The
+search then prunes almost every special star partition right away. Sets
+of excluded courses which leave too few stars are skipped, and those
+for which no route was possible excluding any more courses are solved
+with the dynamic programming engine, which doesn't need a route to
+start from.
+Each set of excluded courses of the same size is solved in parallel.
+"""
+
+import concurrent.futures
+import logging
+import os
+import pathlib
+import signal
+import sqlite3
+import tempfile
+from .constants import (
+    DataKeys,
+    Engines,
+    EXCLUSION_TABLE_CHUNK_SIZE,
+    NUM_STARS_IN_ROUTE,
+)
+from .exceptions import NoValidRoutePossible
+from .optimize import get_optimal_routes
+from .optimize_dp import get_optimal_route_dp
+from .problem import Problem
+from . import result_cache
+
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+
+def get_excludable_course_ids(problem: Problem) -> list[str]:
+    """Get the IDs of the courses which the exclusion table covers.
+
+    Args:
+        problem: The problem the exclusion table is for.
+
+    Returns:
+        A list of course IDs in course order. Bit i of an excluded
+        courses mask is set if the ith course is excluded.
+    """
+    return [
+        course_id
+        for course_id in problem.course_ids
+        if course_id
+        not in {DataKeys.COURSE_CASTLE_ID, DataKeys.COURSE_DIRE_DIRE_DOCKS_ID}
+    ]
+
+
+def get_exclusion_table_key(
+    problem: Problem,
+    config_data: dict[str, dict],
+    excluded_star_ids: set[str],
+    max_num_upper_level_stars: int,
+) -> str:
+    """Get a key identifying the problem an exclusion table is for.
+
+    Args:
+        problem: The problem.
+        config_data: The user's configuration data.
+        excluded_star_ids: A set containing star IDs excluded from every
+          route.
+        max_num_upper_level_stars: The maximum number of upper level
+          stars allowed in each route.
+
+    Returns:
+        A hex digest identifying the problem.
+    """
+    return result_cache.get_route_problem_hash(
+        star_times_dict={
+            star_id: time
+            for time, star_id in problem.get_eligible_star_time_tuples(
+                excluded_course_ids=set(), excluded_star_ids=excluded_star_ids
+            )
+        },
+        config_data=config_data,
+        max_num_upper_level_stars=max_num_upper_level_stars,
+        engine=Engines.PARTITION,
+        num_routes=1,
+    )
+
+
+# Arguments shared by every task in a worker process. These are set
+# once per process by _init_worker rather than being sent along with
+# every task.
+_worker_kwargs: dict = {}
+
+
+def _init_worker(
+    problem: Problem,
+    excluded_star_ids: set[str],
+    max_num_upper_level_stars: int,
+    prune_partitions: bool,
+) -> None:
+    """Store the problem and options for a worker process.
+
+    Keyboard interrupts are ignored in worker processes, and so are the
+    optimizer's info logs, since there's one for every set of excluded
+    courses.
+
+    Args:
+        problem: The problem to find routes for.
+        excluded_star_ids: A set containing star IDs to exclude from
+          every route.
+        max_num_upper_level_stars: The maximum number of upper level
+          stars allowed in each route.
+        prune_partitions: Whether to skip special star partitions which
+          can't lead to a faster route.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.disable(logging.INFO)
+
+    _worker_kwargs.update(
+        problem=problem,
+        excludable_course_ids=get_excludable_course_ids(problem),
+        excluded_star_ids=excluded_star_ids,
+        max_num_upper_level_stars=max_num_upper_level_stars,
+        prune_partitions=prune_partitions,
+        structure_kwargs=problem.get_structure_kwargs(),
+    )
+
+
+def _find_route_for_excluded_courses(
+    task: tuple[int, list[set[str]]],
+) -> tuple[int, tuple[set[str], float] | None]:
+    """Find the optimal route for a set of excluded courses.
+
+    Args:
+        task: A two-tuple containing (1) the excluded courses mask and
+          (2) a list of valid routes to start the search with.
+
+    Returns:
+        A two-tuple containing the excluded courses mask and either the
+        optimal route as a two-tuple (route_star_ids, route_time) or
+        None if no route is possible.
+    """
+    excluded_courses_mask, initial_routes = task
+
+    problem = _worker_kwargs["problem"]
+    excluded_course_ids = {
+        course_id
+        for bit, course_id in enumerate(_worker_kwargs["excludable_course_ids"])
+        if excluded_courses_mask >> bit & 1
+    }
+
+    star_time_tuples = problem.get_eligible_star_time_tuples(
+        excluded_course_ids=excluded_course_ids,
+        excluded_star_ids=_worker_kwargs["excluded_star_ids"],
+    )
+
+    # 100 coin stars count as two stars
+    if (
+        sum(
+            problem.count_route_stars_per_location(
+                {star_id for _, star_id in star_time_tuples}
+            ).values()
+        )
+        < NUM_STARS_IN_ROUTE
+    ):
+        return (excluded_courses_mask, None)
+
+    optimize_kwargs = {
+        "star_time_tuples": star_time_tuples,
+        "max_num_upper_level_stars": _worker_kwargs["max_num_upper_level_stars"],
+        **_worker_kwargs["structure_kwargs"],
+    }
+
+    try:
+        # Without a route to start from (i.e., when no route is possible
+        # excluding any more courses), the partition search has nothing
+        # to prune with, and proving that no route is possible can take
+        # it a while, so use the dynamic programming engine instead
+        if not initial_routes:
+            return (excluded_courses_mask, get_optimal_route_dp(**optimize_kwargs))
+
+        routes, _ = get_optimal_routes(
+            **optimize_kwargs,
+            prune_partitions=_worker_kwargs["prune_partitions"],
+            initial_routes=initial_routes,
+        )
+    except NoValidRoutePossible:
+        return (excluded_courses_mask, None)
+
+    return (excluded_courses_mask, routes[0])
+
+
+def precompute_exclusions(
+    problem: Problem,
+    table_key: str,
+    table_path: pathlib.Path,
+    excluded_star_ids: set[str],
+    max_num_upper_level_stars: int,
+    prune_partitions: bool = True,
+    num_processes: int | None = None,
+) -> None:
+    """Find the optimal route for every set of excluded courses.
+
+    Args:
+        problem: The problem to find routes for.
+        table_key: A key identifying the problem and options (see the
+          get_route_problem_hash function of the result_cache module),
+          which is stored in the table so that lookups for a different
+          problem are ignored.
+        table_path: The path to write the SQLite database to. Any
+          existing database is replaced once every route is found.
+        excluded_star_ids: A set containing star IDs to exclude from
+          every route.
+        max_num_upper_level_stars: The maximum number of upper level
+          stars allowed in each route.
+        prune_partitions: Whether to skip special star partitions which
+          can't lead to a faster route.
+        num_processes: The number of processes to find routes with, or
+          None to use the number of CPUs.
+    """
+    excludable_course_ids = get_excludable_course_ids(problem)
+    num_excludable_courses = len(excludable_course_ids)
+
+    routes: dict[int, tuple[set[str], float] | None] = {}
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=num_processes,
+        initializer=_init_worker,
+        initargs=(
+            problem,
+            excluded_star_ids,
+            max_num_upper_level_stars,
+            prune_partitions,
+        ),
+    ) as executor:
+        for num_excluded_courses in range(num_excludable_courses, -1, -1):
+            tasks = []
+
+            for excluded_courses_mask in range(1 << num_excludable_courses):
+                if excluded_courses_mask.bit_count() != num_excluded_courses:
+                    continue
+
+                # Start from the routes found when excluding one more
+                # course, which are still valid routes
+                initial_routes = [
+                    route[0]
+                    for bit in range(num_excludable_courses)
+                    if not excluded_courses_mask >> bit & 1
+                    and (route := routes[excluded_courses_mask | 1 << bit]) is not None
+                ]
+
+                tasks.append((excluded_courses_mask, initial_routes))
+
+            routes.update(
+                executor.map(
+                    _find_route_for_excluded_courses,
+                    tasks,
+                    chunksize=EXCLUSION_TABLE_CHUNK_SIZE,
+                )
+            )
+
+            logger.info(
+                "Found routes excluding %d courses (%d sets of courses).",
+                num_excluded_courses,
+                len(tasks),
+            )
+
+    write_exclusion_table(
+        table_path=table_path,
+        table_key=table_key,
+        star_ids=problem.star_ids,
+        excludable_course_ids=excludable_course_ids,
+        routes=routes,
+    )
+
+    logger.info(
+        "Wrote %d routes (%d impossible) to %s.",
+        len(routes),
+        sum(route is None for route in routes.values()),
+        table_path,
+    )
+
+
+def write_exclusion_table(
+    table_path: pathlib.Path,
+    table_key: str,
+    star_ids: list[str],
+    excludable_course_ids: list[str],
+    routes: dict[int, tuple[set[str], float] | None],
+) -> None:
+    """Write routes for sets of excluded courses to a SQLite database.
+
+    Each route's stars are stored as a bitmask over the star IDs, which
+    are stored along with the excludable course IDs.
+
+    Args:
+        table_path: The path to write the database to, atomically
+          replacing any existing database.
+        table_key: A key identifying the problem and options.
+        star_ids: A list of star IDs indexed by star index.
+        excludable_course_ids: A list of the excludable course IDs.
+        routes: A dictionary containing excluded courses masks as keys
+          and either the optimal route as a two-tuple (route_star_ids,
+          route_time) or None if no route is possible as values.
+    """
+    star_indices = {star_id: star_index for star_index, star_id in enumerate(star_ids)}
+    num_star_bytes = (len(star_ids) + 7) // 8
+
+    table_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file first so that a database is never read
+    # half written
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=table_path.parent, suffix=".tmp"
+    )
+    os.close(file_descriptor)
+
+    try:
+        with sqlite3.connect(temporary_path) as connection:
+            connection.executescript(
+                """
+                CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+                CREATE TABLE routes (
+                    excluded_courses_mask INTEGER PRIMARY KEY,
+                    route_time REAL,
+                    route_stars BLOB
+                );
+                """
+            )
+            connection.executemany(
+                "INSERT INTO metadata VALUES (?, ?)",
+                [
+                    ("key", table_key),
+                    ("star_ids", " ".join(star_ids)),
+                    ("excludable_course_ids", " ".join(excludable_course_ids)),
+                ],
+            )
+            connection.executemany(
+                "INSERT INTO routes VALUES (?, ?, ?)",
+                (
+                    (
+                        (excluded_courses_mask, None, None)
+                        if route is None
+                        else (
+                            excluded_courses_mask,
+                            route[1],
+                            sum(
+                                1 << star_indices[star_id] for star_id in route[0]
+                            ).to_bytes(num_star_bytes, "little"),
+                        )
+                    )
+                    for excluded_courses_mask, route in sorted(routes.items())
+                ),
+            )
+
+        connection.close()
+
+        os.replace(temporary_path, table_path)
+    except BaseException:
+        os.unlink(temporary_path)
+
+        raise
+
+
+def load_exclusion_route(
+    table_path: pathlib.Path, table_key: str, excluded_course_ids: set[str]
+) -> tuple[set[str], float] | None:
+    """Look up the optimal route for a set of excluded courses.
+
+    Args:
+        table_path: The path of the SQLite database.
+        table_key: A key identifying the problem and options, which
+          must match the key the database was written with.
+        excluded_course_ids: A set containing the excluded course IDs.
+
+    Returns:
+        A two-tuple (route_star_ids, route_time) containing the optimal
+        route, or None if the database doesn't exist, is for a different
+        problem, or doesn't cover the excluded courses.
+
+    Raises:
+        NoValidRoutePossible: If no route is possible with the excluded
+          courses.
+    """
+    if not table_path.is_file():
+        return None
+
+    try:
+        connection = sqlite3.connect(
+            f"{table_path.resolve().as_uri()}?mode=ro", uri=True
+        )
+
+        try:
+            metadata = dict(connection.execute("SELECT key, value FROM metadata"))
+
+            if metadata.get("key") != table_key:
+                return None
+
+            excludable_course_ids = metadata["excludable_course_ids"].split()
+
+            if not excluded_course_ids <= set(excludable_course_ids):
+                return None
+
+            row = connection.execute(
+                "SELECT route_time, route_stars FROM routes"
+                " WHERE excluded_courses_mask = ?",
+                (
+                    sum(
+                        1 << bit
+                        for bit, course_id in enumerate(excludable_course_ids)
+                        if course_id in excluded_course_ids
+                    ),
+                ),
+            ).fetchone()
+        finally:
+            connection.close()
+    except (sqlite3.Error, KeyError) as e:
+        logger.warning("Ignoring unreadable exclusion table %s: %s", table_path, e)
+
+        return None
+
+    if row is None:
+        return None
+
+    route_time, route_stars = row
+
+    if route_time is None:
+        raise NoValidRoutePossible(
+            f"Unable to form any {NUM_STARS_IN_ROUTE} star route due "
+            "to insufficient eligible stars."
+        )
+
+    route_stars_bitmask = int.from_bytes(route_stars, "little")
+
+    return (
+        {
+            star_id
+            for star_index, star_id in enumerate(metadata["star_ids"].split())
+            if route_stars_bitmask >> star_index & 1
+        },
+        route_time,
+    )
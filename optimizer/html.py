@@ -2,18 +2,35 @@
 
 from datetime import datetime
 import itertools
-from fasthtml import ft
-from .constants import DataKeys, Locations, MAXIMUM_COURSES_PER_ROW
+
+# NOTE: FastHTML's components come from fastcore. Importing them from
+# there rather than from fasthtml avoids importing FastHTML's web
+# framework (Starlette, httpx, IPython, etc.), which is much slower.
+import fastcore.xml as ft
+from .constants import (
+    DataKeys,
+    DEFAULT_OBJECTIVE,
+    FRONTIER_CHART_MARGIN,
+    FRONTIER_CHART_SIZE,
+    Locations,
+    MAXIMUM_COURSES_PER_ROW,
+)
+from .problem import Problem
 from . import util
 
 
 def generate_page_html(
     route_star_ids: set[str],
     route_time: float,
-    star_times_dict: dict[str, float],
-    num_stars_per_location_dict: dict[str, int],
-    num_stars_per_course_dict: dict[str, int],
-    course_data: list[dict],
+    route_is_proven_optimal: bool,
+    problem: Problem,
+    alternative_routes: list[tuple[set[str], float]] | None = None,
+    route_time_distribution: dict | None = None,
+    objective: tuple[str, float] = DEFAULT_OBJECTIVE,
+    route_objective_value: float | None = None,
+    frontier_routes: list[tuple[set[str], float, float]] | None = None,
+    star_exclusion_penalties: dict[str, float | None] | None = None,
+    star_break_even_times: dict[str, dict[str, bool | float | None]] | None = None,
 ) -> str:
     """Build the HTML output page and return it as a string.
 
@@ -21,19 +38,40 @@ def generate_page_html(
         route_star_ids: A set containing the star ids used for the
           route.
         route_time: The number of seconds the route takes.
-        star_times_dict: A dictionary containing star IDs as keys and
-          times as values.
-        num_stars_per_location_dict: A dictionary which enumerates the
-          number of stars in the route per location.
-        num_stars_per_course_dict: A dictionary which enumerates the
-          number of stars in the route per course.
-        course_data: Course data coming from the course_data module; the
-          data should be augmented with the 100 coin stars listed in the
-          user config data using functionality in the util module.
+        route_is_proven_optimal: Whether the route is proven to be
+          optimal.
+        problem: The problem the route is for.
+        alternative_routes: An optional list of tuples (route_star_ids,
+          route_time) for other routes to show, in order of increasing
+          time. Each is shown by how it differs from the main route.
+        route_time_distribution: An optional simulated distribution of
+          the route's time (see the get_route_time_distribution function
+          of the simulate module).
+        objective: The objective the route was optimized for (see
+          Objectives in the constants module).
+        route_objective_value: The sum of the route's star costs under
+          the objective, if it isn't the mean.
+        frontier_routes: An optional list of three-tuples
+          (route_star_ids, mean time, variance) for the routes on the
+          frontier of mean time against variance to show, in order of
+          increasing mean time (see the pareto module).
+        star_exclusion_penalties: An optional dictionary containing the
+          route's star IDs as keys and how much slower the optimal route
+          is without the star (in star costs under the objective) as
+          values, or None where no route is possible without it (see the
+          sensitivity module).
+        star_break_even_times: An optional dictionary containing star
+          IDs as keys and dictionaries as values, which contain whether
+          the star is in the fastest route ("in_route") and the average
+          time at which it leaves or enters that route
+          ("break_even_time") (see the sensitivity module).
 
     Returns:
         A string containing HTML for the page.
     """
+    num_stars_per_location_dict = problem.count_route_stars_per_location(route_star_ids)
+    num_stars_per_course_dict = problem.count_route_stars_per_course(route_star_ids)
+
     # Build the summary content for the page
     summary_divs = [
         ft.Div("Route summary:", cls="fw-bold"),
@@ -52,6 +90,49 @@ def generate_page_html(
         )
     )
 
+    # Say what the route was optimized for, if it wasn't the mean
+    if route_objective_value is not None:
+        summary_divs.append(
+            ft.Div(
+                f"Optimized for each star's {util.describe_objective(objective)}:"
+                f" sum of star costs {util.format_route_time(route_objective_value)}"
+            )
+        )
+
+    # Add the simulated distribution of the route's time, if we have it
+    if route_time_distribution is not None:
+        summary_divs.append(
+            ft.Div(
+                f"Simulated route time ({route_time_distribution['num_trials']:,}"
+                " trials): median "
+                + util.format_route_time(route_time_distribution["median"])
+                + ", 10th percentile "
+                + util.format_route_time(route_time_distribution["p10"])
+                + ", 90th percentile "
+                + util.format_route_time(route_time_distribution["p90"])
+            )
+        )
+
+        if route_time_distribution["probability_of_beating_target"] is not None:
+            summary_divs.append(
+                ft.Div(
+                    "Chance of beating "
+                    + util.format_route_time(route_time_distribution["target_time"])
+                    + f": {route_time_distribution['probability_of_beating_target']:.1%}"
+                )
+            )
+
+    # Say whether the route is proven to be optimal
+    summary_divs.append(
+        ft.Div(
+            (
+                "Proven optimal"
+                if route_is_proven_optimal
+                else "Not proven optimal: the search was stopped early"
+            ),
+        )
+    )
+
     # Add the number of stars per location
     for location in [
         Locations.LOBBY,
@@ -69,6 +150,29 @@ def generate_page_html(
             )
         )
 
+    # Explain the exclusion penalties, if we have them
+    if star_exclusion_penalties is not None:
+        summary_divs.append(
+            ft.Div(
+                (
+                    "Times starting with + show how much slower the optimal route"
+                    " is if that route star is excluded."
+                    if route_objective_value is None
+                    else "Times starting with + show how much the optimal route's"
+                    " sum of star costs grows if that route star is excluded."
+                )
+            )
+        )
+
+    # Explain the break-even times, if we have them
+    if star_break_even_times is not None:
+        summary_divs.append(
+            ft.Div(
+                "Times starting with > or < show the average time above which"
+                " a star leaves the fastest route or below which it enters it."
+            )
+        )
+
     # Add the time we're making this page
     summary_divs.append(
         ft.Div(
@@ -77,28 +181,174 @@ def generate_page_html(
         )
     )
 
+    # Build a table of alternative routes, if we have any. Each route
+    # is shown by the stars it adds to and drops from the main route.
+    alternative_route_divs = []
+
+    if alternative_routes:
+        alternative_route_table_rows = []
+
+        for rank, (alternative_star_ids, alternative_time) in enumerate(
+            alternative_routes, start=2
+        ):
+            alternative_route_table_rows.append(
+                ft.Tr(
+                    ft.Td(f"#{rank}"),
+                    ft.Td(util.format_route_time(alternative_time), cls="text-end"),
+                    ft.Td(f"+{alternative_time - route_time:.2f}", cls="text-end"),
+                    ft.Td(
+                        util.describe_star_ids(alternative_star_ids - route_star_ids)
+                    ),
+                    ft.Td(
+                        util.describe_star_ids(route_star_ids - alternative_star_ids)
+                    ),
+                )
+            )
+
+        alternative_route_divs.append(
+            ft.Div(
+                ft.Div("Other fast routes:", cls="fw-bold"),
+                ft.Table(
+                    ft.Thead(
+                        ft.Tr(
+                            ft.Th("Rank"),
+                            ft.Th("Time", cls="text-end"),
+                            ft.Th("Slower by", cls="text-end"),
+                            ft.Th("Adds"),
+                            ft.Th("Drops"),
+                        )
+                    ),
+                    ft.Tbody(*alternative_route_table_rows),
+                    cls="table table-sm mb-0",
+                ),
+                cls="bg-secondary-subtle text-secondary-emphasis rounded px-3 py-3 mt-3",
+            )
+        )
+
+    # Build a chart and table of the routes on the frontier of mean time
+    # against variance, if we have them. Each route is shown by the
+    # stars it adds to and drops from the main route.
+    frontier_divs = []
+
+    if frontier_routes:
+        frontier_table_rows = []
+
+        for number, (frontier_star_ids, frontier_time, frontier_variance) in enumerate(
+            frontier_routes, start=1
+        ):
+            frontier_table_rows.append(
+                ft.Tr(
+                    ft.Td(f"#{number}"),
+                    ft.Td(util.format_route_time(frontier_time), cls="text-end"),
+                    ft.Td(f"{frontier_variance ** 0.5:.2f}", cls="text-end"),
+                    ft.Td(util.describe_star_ids(frontier_star_ids - route_star_ids)),
+                    ft.Td(util.describe_star_ids(route_star_ids - frontier_star_ids)),
+                )
+            )
+
+        frontier_divs.append(
+            ft.Div(
+                ft.Div("Mean time versus consistency:", cls="fw-bold"),
+                ft.Div(
+                    "Each of these routes is the fastest on average for its"
+                    " standard deviation, assuming star times are independent.",
+                    cls="mb-2",
+                ),
+                build_frontier_chart(
+                    [
+                        (frontier_time, frontier_variance**0.5)
+                        for _, frontier_time, frontier_variance in frontier_routes
+                    ]
+                ),
+                ft.Table(
+                    ft.Thead(
+                        ft.Tr(
+                            ft.Th("Route"),
+                            ft.Th("Mean time", cls="text-end"),
+                            ft.Th("SD", cls="text-end"),
+                            ft.Th("Adds"),
+                            ft.Th("Drops"),
+                        )
+                    ),
+                    ft.Tbody(*frontier_table_rows),
+                    cls="table table-sm mb-0",
+                ),
+                cls="bg-secondary-subtle text-secondary-emphasis rounded px-3 py-3 mt-3",
+            )
+        )
+
     # For the main content, first build up divs for each course. Filter
     # out courses that do not have stars with times.
     course_divs = []
 
-    for course in sorted(course_data, key=lambda d: d[DataKeys.COURSE_NUMBER]):
+    for course in sorted(problem.course_data, key=lambda d: d[DataKeys.COURSE_NUMBER]):
         # First build up a table containing the stars for each course
         star_table_rows = []
 
         for star in sorted(
             course[DataKeys.COURSE_STARS], key=lambda d: d[DataKeys.STAR_NUMBER]
         ):
-            if (star_id := star[DataKeys.STAR_ID]) in star_times_dict:
-                star_table_rows.append(
-                    ft.Tr(
+            star_id = star[DataKeys.STAR_ID]
+
+            if (
+                star_time := problem.star_times[problem.star_indices[star_id]]
+            ) is not None:
+                star_table_cells = [
+                    ft.Td(
+                        ("✓" if star_id in route_star_ids else ""),
+                    ),
+                    ft.Td(star[DataKeys.STAR_NUMBER]),
+                    ft.Td(star[DataKeys.STAR_NAME]),
+                    ft.Td(f"{star_time:.1f}", cls="text-end"),
+                ]
+
+                # Add how much slower the route gets without the star
+                if star_exclusion_penalties is not None:
+                    if star_id not in star_exclusion_penalties:
+                        exclusion_penalty_text = ""
+                    elif star_exclusion_penalties[star_id] is None:
+                        exclusion_penalty_text = "required"
+                    else:
+                        exclusion_penalty_text = (
+                            f"{star_exclusion_penalties[star_id]:+.1f}"
+                        )
+
+                    star_table_cells.append(
                         ft.Td(
-                            ("✓" if star_id in route_star_ids else ""),
-                        ),
-                        ft.Td(star[DataKeys.STAR_NUMBER]),
-                        ft.Td(star[DataKeys.STAR_NAME]),
-                        ft.Td(f"{star_times_dict[star_id]:.1f}", cls="text-end"),
+                            exclusion_penalty_text,
+                            cls="text-end text-body-secondary",
+                            title="How much slower the optimal route is without"
+                            " this star",
+                        )
                     )
-                )
+
+                # Add the time at which the star leaves or enters the
+                # fastest route
+                if star_break_even_times is not None:
+                    if star_id not in star_break_even_times:
+                        break_even_time_text = ""
+                    elif star_break_even_times[star_id]["break_even_time"] is None:
+                        break_even_time_text = (
+                            "always"
+                            if star_break_even_times[star_id]["in_route"]
+                            else "never"
+                        )
+                    else:
+                        break_even_time_text = (
+                            (">" if star_break_even_times[star_id]["in_route"] else "<")
+                            + f"{star_break_even_times[star_id]['break_even_time']:.1f}"
+                        )
+
+                    star_table_cells.append(
+                        ft.Td(
+                            break_even_time_text,
+                            cls="text-end text-body-secondary",
+                            title="The average time above which this star leaves"
+                            " the fastest route or below which it enters it",
+                        )
+                    )
+
+                star_table_rows.append(ft.Tr(*star_table_cells))
 
         # If there are any stars in the course, make a div for the
         # course
@@ -122,6 +372,12 @@ def generate_page_html(
                             ft.Col(width="6%"),
                             ft.Col(width="100%"),
                             ft.Col(),
+                            *(
+                                [ft.Col()]
+                                if star_exclusion_penalties is not None
+                                else []
+                            ),
+                            *([ft.Col()] if star_break_even_times is not None else []),
                         ),
                         ft.Tbody(*star_table_rows),
                         cls="table",
@@ -150,6 +406,193 @@ def generate_page_html(
         )
 
     # Make the page
+    return build_page_html(
+        ft.Div(
+            *summary_divs,
+            cls="bg-secondary-subtle text-secondary-emphasis rounded px-3 py-3",
+        ),
+        *alternative_route_divs,
+        *frontier_divs,
+        ft.Div(
+            *course_row_divs,
+            cls="mt-3 px-1",
+        ),
+    )
+
+
+def generate_batch_index_html(runner_results: list[dict]) -> str:
+    """Build the index page for a batch of routes and return it as a string.
+
+    Args:
+        runner_results: A list containing a dictionary for each runner,
+          with the runner's name under "runner", and either the file
+          name of the runner's route page under "page", the route time
+          under "route_time", and whether the route is proven to be
+          optimal under "route_is_proven_optimal"; or an error message
+          under "error".
+
+    Returns:
+        A string containing HTML for the page.
+    """
+    runner_table_rows = []
+
+    for runner_result in runner_results:
+        if "error" in runner_result:
+            runner_table_rows.append(
+                ft.Tr(
+                    ft.Td(runner_result["runner"]),
+                    ft.Td(runner_result["error"], colspan="2", cls="text-danger"),
+                )
+            )
+
+            continue
+
+        runner_table_rows.append(
+            ft.Tr(
+                ft.Td(ft.A(runner_result["runner"], href=runner_result["page"])),
+                ft.Td(
+                    util.format_route_time(runner_result["route_time"]), cls="text-end"
+                ),
+                ft.Td("✓" if runner_result["route_is_proven_optimal"] else ""),
+            )
+        )
+
+    return build_page_html(
+        ft.Div(
+            ft.Div("Routes:", cls="fw-bold"),
+            ft.Table(
+                ft.Thead(
+                    ft.Tr(
+                        ft.Th("Runner"),
+                        ft.Th("Time", cls="text-end"),
+                        ft.Th("Proven optimal"),
+                    )
+                ),
+                ft.Tbody(*runner_table_rows),
+                cls="table table-sm mb-0",
+            ),
+            cls="bg-secondary-subtle text-secondary-emphasis rounded px-3 py-3",
+        )
+    )
+
+
+def build_frontier_chart(points: list[tuple[float, float]]) -> ft.FT:
+    """Build a chart of the routes on a frontier.
+
+    Args:
+        points: A list of two-tuples containing each route's mean time
+          and standard deviation, in order of increasing mean time.
+
+    Returns:
+        An SVG element containing the chart, which has a numbered point
+        for each route, joined in order.
+    """
+    width, height = FRONTIER_CHART_SIZE
+    margin = FRONTIER_CHART_MARGIN
+
+    min_time = min(time for time, _ in points)
+    max_time = max(time for time, _ in points)
+    min_standard_deviation = min(standard_deviation for _, standard_deviation in points)
+    max_standard_deviation = max(standard_deviation for _, standard_deviation in points)
+
+    def _get_coordinates(time: float, standard_deviation: float) -> tuple[float, float]:
+        """Get the position of a point in the chart.
+
+        Args:
+            time: The mean time of the point's route.
+            standard_deviation: The standard deviation of the point's
+              route.
+
+        Returns:
+            A two-tuple containing the point's x and y coordinates.
+        """
+        x = margin + (width - 2 * margin) * (
+            (time - min_time) / (max_time - min_time) if max_time > min_time else 0.5
+        )
+        y = (height - margin) - (height - 2 * margin) * (
+            (standard_deviation - min_standard_deviation)
+            / (max_standard_deviation - min_standard_deviation)
+            if max_standard_deviation > min_standard_deviation
+            else 0.5
+        )
+
+        return (round(x, 1), round(y, 1))
+
+    coordinates = [_get_coordinates(*point) for point in points]
+
+    point_elements = []
+
+    for number, ((time, standard_deviation), (x, y)) in enumerate(
+        zip(points, coordinates), start=1
+    ):
+        point_elements += [
+            ft.ft(
+                "circle",
+                ft.Title(
+                    f"#{number}: {util.format_route_time(time)}"
+                    f" ± {standard_deviation:.2f}"
+                ),
+                cx=x,
+                cy=y,
+                r=4,
+                fill="currentColor",
+            ),
+            ft.ft(
+                "text", f"{number}", x=round(x + 6, 1), y=round(y - 6, 1), font_size=10
+            ),
+        ]
+
+    return ft.Svg(
+        # Axes
+        ft.ft(
+            "polyline",
+            points=f"{margin},{margin} {margin},{height - margin}"
+            f" {width - margin},{height - margin}",
+            fill="none",
+            stroke="currentColor",
+        ),
+        ft.ft(
+            "text",
+            f"Mean time ({util.format_route_time(min_time)} to"
+            f" {util.format_route_time(max_time)})",
+            x=width / 2,
+            y=height - 8,
+            text_anchor="middle",
+            font_size=12,
+        ),
+        ft.ft(
+            "text",
+            f"SD ({min_standard_deviation:.0f} to {max_standard_deviation:.0f} s)",
+            x=12,
+            y=height / 2,
+            text_anchor="middle",
+            font_size=12,
+            transform=f"rotate(-90 12 {height / 2})",
+        ),
+        # Routes
+        ft.ft(
+            "polyline",
+            points=" ".join(f"{x},{y}" for x, y in coordinates),
+            fill="none",
+            stroke="currentColor",
+            stroke_opacity=0.5,
+        ),
+        *point_elements,
+        width=width,
+        height=height,
+        cls="d-block mb-2",
+    )
+
+
+def build_page_html(*content) -> str:
+    """Build a page with the program's header and style around content.
+
+    Args:
+        *content: The components to put in the page below the header.
+
+    Returns:
+        A string containing HTML for the page.
+    """
     page = ft.Html(
         ft.Head(
             ft.Meta(charset="utf-8"),
@@ -177,22 +620,13 @@ def generate_page_html(
                     ),
                     cls="bg-primary-subtle text-primary-emphasis rounded px-3 py-4 my-3",
                 ),
-                ft.Div(
-                    *summary_divs,
-                    cls="bg-secondary-subtle text-secondary-emphasis rounded px-3 py-3",
-                ),
-                ft.Div(
-                    *course_row_divs,
-                    cls="mt-3 px-1",
-                ),
+                *content,
                 cls="container",
             )
         ),
         lang="en",
     )
 
-    # Add a doctype tag and then return the HTML
-    # NOTE: this is not particularly beautiful code. My understanding is
-    # FastHTML is not really designed to for generating static HTML like
-    # I'm doing here.
-    return "<!DOCTYPE html>\n" + ft.to_xml(page)
+    # Return the HTML. Note that the Html component adds a doctype tag
+    # itself.
+    return ft.to_xml(page)
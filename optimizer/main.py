@@ -1,19 +1,31 @@
 """Contains the main function for the program."""
 
+import argparse
+import json
 import logging
+import pathlib
 import random
 from .args import get_runtime_args
 from .config import get_and_validate_config
 from .constants import (
-    ConfigKeys,
-    DataKeys,
+    BATCH_OUTPUT_DIR_NAME,
+    Commands,
+    DEFAULT_OBJECTIVE,
+    Engines,
     NUM_STARS_IN_ROUTE,
     OUTPUT_HTML_FILE,
 )
-from .exceptions import InvalidExcludedStarIds
-from .html import generate_page_html
-from .optimize import get_optimal_route
-from . import util
+from .engines import find_routes
+from .exceptions import (
+    ConfigFileInvalid,
+    ConfigFileNotFound,
+    InvalidExcludedStarIds,
+    NoValidRoutePossible,
+)
+from .optimize_dp import get_optimal_routes_for_all_upper_level_limits
+from .problem import get_structure_key, Problem
+from .session import OptimizerSession
+from . import result_cache, util
 
 
 # Set up logging for this module
@@ -22,129 +34,716 @@ logger = logging.getLogger(__name__)
 
 def main() -> None:
     """Generate an HTML file containing an optimal 70 star route."""
-    # Get runtime arguments and config data
+    # Get runtime arguments
     args = get_runtime_args()
+
+    # If we were asked to serve routes, do that instead of generating a
+    # route page. Import the server here so its dependencies are only
+    # loaded when they're needed.
+    if args.command == Commands.SERVE:
+        from .server import serve
+
+        serve(
+            host=args.host,
+            port=args.port,
+            num_processes=args.processes,
+            cache_size=args.cache_size,
+        )
+
+        return
+
+    # If we were asked to watch the config, keep re-optimizing until
+    # we're interrupted
+    if args.watch:
+        try:
+            watch_config_and_optimize(args)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching %s.", args.config)
+
+        return
+
+    # If we were asked to optimize a batch of configs, do that instead
+    # of generating a single route page
+    if args.batch is not None:
+        from .batch import optimize_batch
+
+        optimize_batch(
+            batch_dir=args.batch,
+            output_dir=(
+                args.batch_output_dir
+                if args.batch_output_dir is not None
+                else args.batch / BATCH_OUTPUT_DIR_NAME
+            ),
+            excluded_course_ids=set(args.exclude_course_ids),
+            excluded_star_ids=set(args.exclude_star_ids),
+            max_num_upper_level_stars=args.max_upper_level_stars,
+            engine=args.engine,
+            objective=args.objective,
+            num_routes=args.top_k,
+            time_budget=args.time_budget,
+            prune_partitions=not args.disable_pruning,
+            num_processes=args.workers,
+            cache_dir=(
+                None if args.no_cache or args.generate_fake_times else args.cache_dir
+            ),
+            max_cache_size=int(args.cache_max_size * 2**20),
+            generate_fake_times=args.generate_fake_times,
+        )
+
+        return
+
+    # Get config data and build the optimization inputs
     config_data = get_and_validate_config(
         target_config_path=args.config, generate_fake_times=args.generate_fake_times
     )
+    problem = Problem(
+        config_data=config_data, generate_fake_times=args.generate_fake_times
+    )
+    problem.validate_excluded_star_ids(set(args.exclude_star_ids))
+    star_times_dict = problem.get_star_times_dict()
 
-    # Get tuples (average_time, star_id) for stars which have times
-    config_100_coin_times = config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE]
+    # If we were asked to precompute routes for excluded courses, do that
+    # instead of generating a route page
+    if args.command == Commands.PRECOMPUTE_EXCLUSIONS:
+        from .exclusions import get_exclusion_table_key, precompute_exclusions
 
-    star_time_tuples = util.get_star_time_tuples(
-        star_times_list_dict=util.get_star_times_list_dict(
-            config_times=config_data[ConfigKeys.TIMES_TABLE],
-            config_100_coin_times=config_100_coin_times,
-        ),
-        generate_fake_times=args.generate_fake_times,
-    )
+        logger.info("Finding optimal routes for every set of excluded courses.")
 
-    # Build a dictionary of star times
-    star_times_dict = util.build_star_times_dict_from_star_time_tuples(star_time_tuples)
-
-    # Ensure at least one of the following is true:
-    #
-    # - DDD1 has a time and is not excluded
-    # - DDD_100 is combined with DDD1 and has a time and is not excluded
-    #
-    # Note that a validation check in the configuration module has
-    # already ensured that one of DDD1 or DDD_100 combined with DDD1 has
-    # a time, so any error here is due to excluded star IDs.
-    excluded_star_ids = set(args.exclude_star_ids)
-
-    ddd1_okay = (
-        DataKeys.STAR_DDD1_ID in star_times_dict
-        and DataKeys.STAR_DDD1_ID not in excluded_star_ids
-    )
+        precompute_exclusions(
+            problem=problem,
+            table_key=get_exclusion_table_key(
+                problem=problem,
+                config_data=config_data,
+                excluded_star_ids=set(args.exclude_star_ids),
+                max_num_upper_level_stars=args.max_upper_level_stars,
+            ),
+            table_path=args.exclusion_table,
+            excluded_star_ids=set(args.exclude_star_ids),
+            max_num_upper_level_stars=args.max_upper_level_stars,
+            prune_partitions=not args.disable_pruning,
+            num_processes=args.processes,
+        )
 
-    ddd_100_okay = (
-        DataKeys.STAR_DDD_100_ID in star_times_dict
-        and config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE][DataKeys.STAR_DDD_100_ID][
-            ConfigKeys.HUNDRED_COIN_COMBINED_WITH
-        ]
-        == DataKeys.STAR_DDD1_ID
-        and DataKeys.STAR_DDD_100_ID not in excluded_star_ids
-    )
+        return
+
+    # A fake route doesn't need any optimization inputs, so don't build
+    # them if that's all we're doing
+    optimize_kwargs = {}
+
+    if args.sweep_upper_levels or not args.generate_fake_route:
+        optimize_kwargs = {
+            "star_time_tuples": problem.with_objective(
+                args.objective
+            ).get_eligible_star_time_tuples(
+                excluded_course_ids=set(args.exclude_course_ids),
+                excluded_star_ids=set(args.exclude_star_ids),
+            ),
+            **problem.get_structure_kwargs(),
+        }
+
+    # If we were asked to sweep over upper level limits, output a table
+    # of routes and stop
+    if args.sweep_upper_levels:
+        logger.info("Finding optimal routes for every upper level star limit.")
 
-    if not ddd1_okay and not ddd_100_okay:
-        raise InvalidExcludedStarIds(
-            f"Times exist for {DataKeys.STAR_DDD1_ID} (or its 100 coin alternative)"
-            " but all have been excluded."
+        print(
+            util.build_upper_level_sweep_table(
+                get_optimal_routes_for_all_upper_level_limits(**optimize_kwargs)
+            )
         )
 
-    # Get course data with star count requirements adjusted according to
-    # prerequisite relationships and with 100 coin stars added in
-    prerequisites_dict = config_data[ConfigKeys.PREREQUISITES_TABLE]
+        return
 
-    processed_course_data = util.adjust_and_augment_course_data(
-        prerequisites_dict=prerequisites_dict,
-        config_100_coin_times=config_100_coin_times,
-    )
+    # If we were asked to sweep over risk levels, output a table of
+    # routes and stop
+    if args.sweep_risk:
+        logger.info("Finding optimal routes for every risk level.")
+
+        print(sweep_risk_levels(args, problem))
+
+        return
+
+    # If we were asked to rank stars for practice, output a table of
+    # stars and stop
+    if args.practice_priorities is not None:
+        from .sensitivity import get_practice_priorities
+
+        logger.info("Finding how much each star's improvement speeds up the route.")
+
+        print(
+            util.build_practice_priority_table(
+                get_practice_priorities(
+                    problem=problem,
+                    improvement=args.practice_priorities,
+                    excluded_course_ids=set(args.exclude_course_ids),
+                    excluded_star_ids=set(args.exclude_star_ids),
+                    max_num_upper_level_stars=args.max_upper_level_stars,
+                    prune_partitions=not args.disable_pruning,
+                    num_workers=args.workers,
+                )
+            )
+        )
+
+        return
 
     # Get 70 stars which form an optimal route. Generate a non-optimal
     # random route if we were asked to do so; otherwise generate an
-    # optimal route.
+    # optimal route, along with any other fast routes we were asked for.
+    alternative_routes = []
+    route_is_proven_optimal = True
+    route_objective_value = None
+
     if args.generate_fake_route:
         route_star_ids_set = random.sample(
             list(star_times_dict.keys()), NUM_STARS_IN_ROUTE
         )
         route_time = sum(star_times_dict[star_id] for star_id in route_star_ids_set)
+        route_is_proven_optimal = False
     else:
-        logger.info(
-            "Finding optimal route. This should take a few seconds—no longer than a few minutes.",
-        )
+        optimize_kwargs["max_num_upper_level_stars"] = args.max_upper_level_stars
+
+        if args.engine == Engines.DP:
+            if args.top_k > 1:
+                logger.warning(
+                    "The %s engine only finds one route; ignoring --top-k.",
+                    Engines.DP,
+                )
+
+            if args.time_budget is not None:
+                logger.warning(
+                    "The %s engine can't be stopped early; ignoring --time-budget.",
+                    Engines.DP,
+                )
+
+        # Use cached routes if we've already solved this problem. Fake
+        # times are different every run, so don't bother caching them.
+        use_cache = not args.no_cache and not args.generate_fake_times
+        routes = None
 
-        # Perform the actual algorithm
-        route_star_ids_set, route_time = get_optimal_route(
-            star_time_tuples=util.filter_star_time_tuples(
-                star_time_tuples=star_time_tuples,
+        if use_cache:
+            problem_hash = result_cache.get_route_problem_hash(
+                star_times_dict={
+                    star_id: time
+                    for time, star_id in optimize_kwargs["star_time_tuples"]
+                },
+                config_data=config_data,
+                max_num_upper_level_stars=args.max_upper_level_stars,
+                engine=args.engine,
+                num_routes=args.top_k if args.engine == Engines.PARTITION else 1,
+            )
+            routes = result_cache.load_routes(args.cache_dir, problem_hash)
+
+            if routes is not None:
+                logger.info("Using cached route from %s.", args.cache_dir)
+
+        # Otherwise look the route up in the exclusion table if it covers this
+        # problem. It only has the optimal route for average times, found
+        # with the partition engine (apart from the sets of excluded courses
+        # it has no route to start from for).
+        if (
+            routes is None
+            and args.engine == Engines.PARTITION
+            and args.exclusion_table.is_file()
+            and args.top_k == 1
+            and args.objective == DEFAULT_OBJECTIVE
+            and not args.generate_fake_times
+        ):
+            from .exclusions import get_exclusion_table_key, load_exclusion_route
+
+            route = load_exclusion_route(
+                table_path=args.exclusion_table,
+                table_key=get_exclusion_table_key(
+                    problem=problem,
+                    config_data=config_data,
+                    excluded_star_ids=set(args.exclude_star_ids),
+                    max_num_upper_level_stars=args.max_upper_level_stars,
+                ),
                 excluded_course_ids=set(args.exclude_course_ids),
-                excluded_star_ids=excluded_star_ids,
-            ),
+            )
+
+            if route is not None:
+                logger.info("Using route from %s.", args.exclusion_table)
+
+                routes = [route]
+
+        if routes is None:
+            logger.info(
+                "Finding optimal route. This should take a few seconds—no longer than a few minutes.",
+            )
+
+            # Perform the actual algorithm
+            routes, route_is_proven_optimal = find_routes(
+                optimize_kwargs,
+                engine=args.engine,
+                num_routes=args.top_k,
+                time_budget=args.time_budget,
+                prune_partitions=not args.disable_pruning,
+                num_workers=args.workers,
+            )
+
+            # Only cache complete searches, since a search which was
+            # stopped early might find a faster route given more time
+            if use_cache and route_is_proven_optimal:
+                result_cache.store_routes(
+                    cache_dir=args.cache_dir,
+                    problem_hash=problem_hash,
+                    routes=routes,
+                    max_cache_size=int(args.cache_max_size * 2**20),
+                )
+
+        (route_star_ids_set, route_time), *alternative_routes = routes
+
+        # Routes found for a risk-aware objective have the objective's
+        # value as their time, so use their actual times from here on
+        if args.objective != DEFAULT_OBJECTIVE:
+            logger.info(
+                "Route optimized for %s: sum of star costs = %s.",
+                util.describe_objective(args.objective),
+                util.format_route_time(route_time),
+            )
+
+            route_objective_value = route_time
+            route_time = problem.get_route_time(route_star_ids_set)
+            alternative_routes = [
+                (alternative_star_ids, problem.get_route_time(alternative_star_ids))
+                for alternative_star_ids, _ in alternative_routes
+            ]
+
+    # Log the route time and find the routes trading mean time against
+    # consistency if we were asked to
+    log_route_time(route_time, route_is_proven_optimal)
+
+    frontier_routes = None
+
+    if args.frontier:
+        # Import this here since NumPy is slow to import and only needed
+        # here
+        from .pareto import get_mean_variance_frontier
+
+        logger.info("Finding routes on the frontier of mean time against variance.")
+
+        frontier_routes = get_mean_variance_frontier(
+            problem=problem,
+            excluded_course_ids=set(args.exclude_course_ids),
+            excluded_star_ids=set(args.exclude_star_ids),
             max_num_upper_level_stars=args.max_upper_level_stars,
-            adjacency_list_dict=util.get_adjacency_list_dict_from_prerequisites_dict(
-                prerequisites_dict=prerequisites_dict
-            ),
-            base_star_alts_dict=util.build_base_star_alts_dict(
-                config_100_coin_times=config_100_coin_times
-            ),
-            star_locations_dict=util.build_star_locations_dict(
-                course_data=processed_course_data
-            ),
-            num_stars_required_dict=util.build_num_stars_required_dict(
-                course_data=processed_course_data
-            ),
+            prune_partitions=not args.disable_pruning,
+            num_workers=args.workers,
+        )
+
+    # Find how much slower the route gets without each of its stars if
+    # we were asked to. The route was optimized for the objective, so
+    # compare it against routes without each star using the objective's
+    # star costs.
+    star_exclusion_penalties = None
+
+    if args.exclusion_penalties:
+        from .sensitivity import get_exclusion_penalties
+
+        logger.info("Finding the exclusion penalty of each route star.")
+
+        star_exclusion_penalties = get_exclusion_penalties(
+            problem=problem.with_objective(args.objective),
+            route_star_ids=route_star_ids_set,
+            excluded_course_ids=set(args.exclude_course_ids),
+            excluded_star_ids=set(args.exclude_star_ids),
+            max_num_upper_level_stars=args.max_upper_level_stars,
+            prune_partitions=not args.disable_pruning,
+            num_workers=args.workers,
+        )
+
+    # Find the average time at which each star leaves or enters the
+    # fastest route if we were asked to. Break-even times are only found
+    # for the mean objective, so the route and any exclusion penalties
+    # found above are for the fastest route.
+    star_break_even_times = None
+
+    if args.break_even_times is not None:
+        from .sensitivity import get_break_even_times
+
+        logger.info("Finding the break-even time of each star.")
+
+        star_break_even_times = get_break_even_times(
+            problem=problem,
+            route_star_ids=route_star_ids_set,
+            route_time=route_time,
+            excluded_course_ids=set(args.exclude_course_ids),
+            excluded_star_ids=set(args.exclude_star_ids),
+            max_num_upper_level_stars=args.max_upper_level_stars,
+            exclusion_penalties=star_exclusion_penalties,
+            prune_partitions=not args.disable_pruning,
+            num_workers=args.workers,
         )
 
-    # Log the time the optimal route takes
+        with open(args.break_even_times, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    util.describe_star_id(star_id): star_break_even_time
+                    for star_id, star_break_even_time in star_break_even_times.items()
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+
+        logger.info("Wrote break-even times to %s.", args.break_even_times)
+
+    # Output the route to HTML
+    write_route_page(
+        route_star_ids=route_star_ids_set,
+        route_time=route_time,
+        route_is_proven_optimal=route_is_proven_optimal,
+        problem=problem,
+        alternative_routes=alternative_routes,
+        route_time_distribution=simulate_route_time(args, route_star_ids_set, problem),
+        objective=args.objective,
+        route_objective_value=route_objective_value,
+        frontier_routes=frontier_routes,
+        star_exclusion_penalties=star_exclusion_penalties,
+        star_break_even_times=star_break_even_times,
+    )
+
+
+def watch_config_and_optimize(args: argparse.Namespace) -> None:
+    """Re-optimize the route every time the config file is saved.
+
+    Everything which only depends on the config's prerequisites and 100
+    coin star pairings is kept between saves, along with an optimizer
+    session (see the session module), so a save which only changes star
+    times re-optimizes starting from the previous route. The HTML page
+    is only rewritten when the stars in the route change. Errors in the
+    config are logged, and we carry on watching.
+
+    Args:
+        args: The runtime arguments.
+    """
+    # Import this here since it's slow to import and only needed here
+    import watchfiles
+
+    config_path = args.config.resolve()
+
+    # Watch the config's directory rather than the config itself, since
+    # editors often save by replacing the file
+    config_changes = watchfiles.watch(
+        config_path.parent,
+        watch_filter=lambda _, path: pathlib.Path(path) == config_path,
+    )
+
+    structure_key = None
+    problem: Problem | None = None
+    structure_kwargs: dict = {}
+    session: OptimizerSession | None = None
+    route_star_ids: set[str] | None = None
+
+    while True:
+        try:
+            config_data = get_and_validate_config(
+                target_config_path=config_path,
+                generate_fake_times=args.generate_fake_times,
+            )
+
+            # Recompile the problem and start a new session if the
+            # prerequisites or 100 coin star pairings changed; otherwise
+            # only take the new star times
+            new_structure_key = get_structure_key(config_data)
+
+            if problem is None or new_structure_key != structure_key:
+                problem = Problem(
+                    config_data=config_data,
+                    generate_fake_times=args.generate_fake_times,
+                )
+                structure_kwargs = problem.get_structure_kwargs()
+                structure_key = new_structure_key
+                session = None
+            else:
+                problem = problem.with_config_times(
+                    config_data=config_data,
+                    generate_fake_times=args.generate_fake_times,
+                )
+
+            problem.validate_excluded_star_ids(set(args.exclude_star_ids))
+            star_time_tuples = problem.with_objective(
+                args.objective
+            ).get_eligible_star_time_tuples(
+                excluded_course_ids=set(args.exclude_course_ids),
+                excluded_star_ids=set(args.exclude_star_ids),
+            )
+
+            # Start a new session if the stars eligible for the route
+            # changed; otherwise only update star times
+            eligible_star_times_dict = {
+                star_id: time for time, star_id in star_time_tuples
+            }
+
+            if session is None or eligible_star_times_dict.keys() != (
+                session.star_times_dict.keys()
+            ):
+                logger.info("Finding optimal route.")
+
+                session = OptimizerSession(
+                    star_time_tuples=star_time_tuples,
+                    max_num_upper_level_stars=args.max_upper_level_stars,
+                    prune_partitions=not args.disable_pruning,
+                    num_workers=args.workers,
+                    **structure_kwargs,
+                )
+                new_route_star_ids, route_time = session.optimize()
+            else:
+                logger.info("Re-optimizing route with updated star times.")
+
+                new_route_star_ids, route_time = session.update_star_times(
+                    eligible_star_times_dict
+                )
+
+            # The session's times are costs under a risk-aware objective
+            route_objective_value = None
+
+            if args.objective != DEFAULT_OBJECTIVE:
+                route_objective_value = route_time
+                route_time = problem.get_route_time(new_route_star_ids)
+
+            log_route_time(route_time, session.route_is_proven_optimal)
+
+            route_time_distribution = simulate_route_time(
+                args, new_route_star_ids, problem
+            )
+
+            # Only rewrite the page if the route changed, or if it shows
+            # a simulation, which depends on every time in the route
+            if new_route_star_ids == route_star_ids and route_time_distribution is None:
+                logger.info("Route unchanged; not rewriting %s.", OUTPUT_HTML_FILE)
+            else:
+                route_star_ids = new_route_star_ids
+
+                write_route_page(
+                    route_star_ids=route_star_ids,
+                    route_time=route_time,
+                    route_is_proven_optimal=session.route_is_proven_optimal,
+                    problem=problem,
+                    route_time_distribution=route_time_distribution,
+                    objective=args.objective,
+                    route_objective_value=route_objective_value,
+                )
+
+                logger.info("Wrote route to %s.", OUTPUT_HTML_FILE)
+        except (
+            ConfigFileInvalid,
+            ConfigFileNotFound,
+            InvalidExcludedStarIds,
+            NoValidRoutePossible,
+        ) as e:
+            logger.error(str(e))
+
+        # Wait for the config to be saved
+        logger.info("Watching %s for changes.", config_path)
+
+        next(config_changes)
+
+
+def log_route_time(route_time: float, route_is_proven_optimal: bool) -> None:
+    """Log the time a route takes.
+
+    Args:
+        route_time: The number of seconds the route takes.
+        route_is_proven_optimal: Whether the route is proven to be
+          optimal.
+    """
+    # Note if the route isn't proven to be optimal
     route_minutes, route_remaining_seconds = (
         util.convert_seconds_to_minutes_and_remaining_seconds(route_time)
     )
+    route_description = (
+        "Optimal route" if route_is_proven_optimal else "Route (not proven optimal)"
+    )
 
     if route_minutes:
         logger.info(
-            "Optimal route found: sum of star times = %d minutes %.2f seconds.",
+            "%s found: sum of star times = %d minutes %.2f seconds.",
+            route_description,
             route_minutes,
             route_remaining_seconds,
         )
     else:
         logger.info(
-            "Optimal route found: sum of star times = %.2f seconds.",
+            "%s found: sum of star times = %.2f seconds.",
+            route_description,
             route_remaining_seconds,
         )
 
-    # Output route to HTML
+
+def sweep_risk_levels(args: argparse.Namespace, problem: Problem) -> str:
+    """Find optimal routes for each risk level we were asked for.
+
+    Each risk level K is the objective of minimizing the sum of each
+    star's mean time plus K standard deviations. Star statistics are
+    computed once, and one optimizer session is kept across risk levels,
+    so each route is searched for starting from the previous one.
+
+    Args:
+        args: The runtime arguments.
+        problem: The problem to find routes for.
+
+    Returns:
+        A string containing a table of the routes.
+    """
+    # Import this here since NumPy is slow to import and only needed
+    # here
+    from .risk import get_star_time_statistics
+
+    star_means, star_standard_deviations = get_star_time_statistics(
+        problem.star_time_samples
+    )
+
+    star_time_tuples = problem.get_eligible_star_time_tuples(
+        excluded_course_ids=set(args.exclude_course_ids),
+        excluded_star_ids=set(args.exclude_star_ids),
+    )
+    session = OptimizerSession(
+        star_time_tuples=star_time_tuples,
+        max_num_upper_level_stars=args.max_upper_level_stars,
+        prune_partitions=not args.disable_pruning,
+        num_workers=args.workers,
+        **problem.get_structure_kwargs(),
+    )
+
+    rows = []
+
+    for num_standard_deviations in args.sweep_risk:
+        route_star_ids, route_objective_value = session.update_star_times(
+            {
+                star_id: float(
+                    star_means[problem.star_indices[star_id]]
+                    + num_standard_deviations
+                    * star_standard_deviations[problem.star_indices[star_id]]
+                )
+                for _, star_id in star_time_tuples
+            }
+        )
+
+        rows.append(
+            (
+                num_standard_deviations,
+                route_objective_value,
+                problem.get_route_time(route_star_ids),
+                # Assume star times are independent
+                sum(
+                    star_standard_deviations[problem.star_indices[star_id]] ** 2
+                    for star_id in route_star_ids
+                )
+                ** 0.5,
+                route_star_ids,
+            )
+        )
+
+    return util.build_risk_sweep_table(rows)
+
+
+def simulate_route_time(
+    args: argparse.Namespace, route_star_ids: set[str], problem: Problem
+) -> dict | None:
+    """Simulate and log the distribution of a route's time if asked to.
+
+    Args:
+        args: The runtime arguments.
+        route_star_ids: A set containing the star IDs used for the
+          route.
+        problem: The problem the route is for.
+
+    Returns:
+        The route time distribution (see the simulate module), or None
+        if we weren't asked to simulate the route's time.
+    """
+    if not args.simulate and args.target_time is None:
+        return None
+
+    # Import this here since NumPy is slow to import and only needed
+    # here
+    from .simulate import get_route_time_distribution
+
+    route_time_distribution = get_route_time_distribution(
+        route_star_ids=route_star_ids,
+        problem=problem,
+        num_trials=args.simulate_trials,
+        target_time=args.target_time,
+    )
+
+    logger.info(
+        "Simulated %d route times: median = %s; 10th percentile = %s;"
+        " 90th percentile = %s.",
+        route_time_distribution["num_trials"],
+        util.format_route_time(route_time_distribution["median"]),
+        util.format_route_time(route_time_distribution["p10"]),
+        util.format_route_time(route_time_distribution["p90"]),
+    )
+
+    if route_time_distribution["probability_of_beating_target"] is not None:
+        logger.info(
+            "Chance of beating %s: %.1f%%.",
+            util.format_route_time(args.target_time),
+            100 * route_time_distribution["probability_of_beating_target"],
+        )
+
+    return route_time_distribution
+
+
+def write_route_page(
+    route_star_ids: set[str],
+    route_time: float,
+    route_is_proven_optimal: bool,
+    problem: Problem,
+    alternative_routes: list[tuple[set[str], float]] | None = None,
+    route_time_distribution: dict | None = None,
+    objective: tuple[str, float] = DEFAULT_OBJECTIVE,
+    route_objective_value: float | None = None,
+    frontier_routes: list[tuple[set[str], float, float]] | None = None,
+    star_exclusion_penalties: dict[str, float | None] | None = None,
+    star_break_even_times: dict[str, dict[str, bool | float | None]] | None = None,
+) -> None:
+    """Write the HTML output page for a route.
+
+    Args:
+        route_star_ids: A set containing the star ids used for the
+          route.
+        route_time: The number of seconds the route takes.
+        route_is_proven_optimal: Whether the route is proven to be
+          optimal.
+        problem: The problem the route is for.
+        alternative_routes: An optional list of tuples (route_star_ids,
+          route_time) for other routes to show.
+        route_time_distribution: An optional simulated distribution of
+          the route's time to show (see the simulate module).
+        objective: The objective the route was optimized for.
+        route_objective_value: The sum of the route's star costs under
+          the objective, if it isn't the mean.
+        frontier_routes: An optional list of three-tuples
+          (route_star_ids, mean time, variance) for the routes on the
+          frontier of mean time against variance to show.
+        star_exclusion_penalties: An optional dictionary containing the
+          route's star IDs as keys and how much slower the optimal route
+          is without the star (in star costs under the objective) as
+          values, or None where no route is possible without it.
+        star_break_even_times: An optional dictionary containing star
+          IDs as keys and dictionaries as values, which contain whether
+          the star is in the fastest route and the average time at which
+          it leaves or enters that route.
+    """
+    # Import this here since the HTML stack is slow to import (FastHTML
+    # pulls in Starlette, httpx, IPython, etc.) and many runs never
+    # render a page
+    from .html import generate_page_html
+
     page_html = generate_page_html(
-        route_star_ids=route_star_ids_set,
+        route_star_ids=route_star_ids,
         route_time=route_time,
-        star_times_dict=star_times_dict,
-        num_stars_per_location_dict=util.build_num_stars_per_location_dict(
-            route_star_ids=route_star_ids_set, course_data=processed_course_data
-        ),
-        num_stars_per_course_dict=util.build_num_stars_per_course_dict(
-            route_star_ids=route_star_ids_set, course_data=processed_course_data
-        ),
-        course_data=processed_course_data,
+        route_is_proven_optimal=route_is_proven_optimal,
+        problem=problem,
+        alternative_routes=alternative_routes,
+        route_time_distribution=route_time_distribution,
+        objective=objective,
+        route_objective_value=route_objective_value,
+        frontier_routes=frontier_routes,
+        star_exclusion_penalties=star_exclusion_penalties,
+        star_break_even_times=star_break_even_times,
     )
 
     with open(OUTPUT_HTML_FILE, "w", encoding="utf-8") as f:
@@ -1,21 +1,43 @@
-"""Contains functionality to find an optimal 70 star route."""
-
+"""Contains functionality to find an optimal 70 star route.
+
+Internally, the optimizer represents sets of stars as integer bitmasks.
+Each star eligible for the route is assigned the bit whose index is the
+star's index in the sorted star time tuples list, so that, e.g., the
+union of two sets is a bitwise or, membership is a bit test, and the
+set bits of a bitmask are visited in order of increasing star time.
+"""
+
+import bisect
+from collections.abc import Callable, Iterator
+import concurrent.futures
 import heapq
 import itertools
+import logging
 import math
+import multiprocessing
+from multiprocessing.sharedctypes import Synchronized
+from multiprocessing.synchronize import Event as EventType
+import signal
+from time import monotonic
 from .constants import (
-    ALL_LOCATIONS,
     DataKeys,
     NUM_STARS_IN_ROUTE,
-    STAR_TIME_TUPLE_STAR_ID_INDEX,
+    PARTIAL_PARTITIONS_PER_WORKER,
     UPPER_LEVEL_LOCATIONS,
 )
 from .exceptions import InsufficientRemainingStars, NoValidRoutePossible
 from .optimize_helpers import (
+    build_star_bitmask,
     find_descendants,
-    get_topological_sort_of_prerequisites,
+    get_100_coin_star_candidate_groups,
+    get_bitmask_indices,
+    get_ordered_base_special_stars,
+    get_special_star_components,
 )
-from . import util
+
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
 
 
 def get_optimal_route(
@@ -25,19 +47,97 @@ def get_optimal_route(
     base_star_alts_dict: dict[str, str],
     star_locations_dict: dict[str, str],
     num_stars_required_dict: dict[str, int],
+    prune_partitions: bool = True,
+    num_workers: int = 1,
 ) -> tuple[set[str], float]:
     """Find star IDs which form an optimal route.
 
+    See get_optimal_routes for a description of the search and of the
+    arguments.
+
+    Returns:
+        A two-tuple containing (1) the set containing the star IDs which
+        are in the optimal route that was found and (2) the time an
+        optimal route takes.
+
+    Raises:
+        NoValidRoutePossible: If we were unable to form any route due to
+          insufficient time data.
+    """
+    return get_optimal_routes(
+        star_time_tuples,
+        max_num_upper_level_stars,
+        adjacency_list_dict,
+        base_star_alts_dict,
+        star_locations_dict,
+        num_stars_required_dict,
+        prune_partitions=prune_partitions,
+        num_workers=num_workers,
+    )[0][0]
+
+
+def get_optimal_routes(
+    star_time_tuples: list[tuple[float, str]],
+    max_num_upper_level_stars: int,
+    adjacency_list_dict: dict[str, list[str]],
+    base_star_alts_dict: dict[str, str],
+    star_locations_dict: dict[str, str],
+    num_stars_required_dict: dict[str, int],
+    prune_partitions: bool = True,
+    num_workers: int = 1,
+    num_routes: int = 1,
+    time_budget: float | None = None,
+    initial_routes: list[set[str]] | None = None,
+) -> tuple[list[tuple[set[str], float]], bool]:
+    """Find star IDs which form the fastest routes.
+
     The general idea is to consider each valid way to partition special
     stars (prerequisites and base stars with 100 coin star alternatives,
     along with the 100 coin star alternatives that exist for either of
     those) into either being included in the route or being excluded
     from the route. For a given partition, we add stars which are not
-    excluded and which we have the required star count for. We gather
-    70 - max_num_upper_level_stars stars which are not on the upper
-    levels first, then we get the remaining max_num_upper_level_stars
-    from any location. We account for 100 coin stars by having each of
-    them count as two stars towards the total.
+    excluded and which we have the required star count for, where the
+    included special stars only count towards the star count once we
+    have their required star count. If that takes too many stars from
+    the upper levels, we swap upper level stars out for stars from
+    elsewhere, cheapest swap first (see swap_out_upper_level_stars),
+    which gives the fastest route for the partition under the upper
+    level star limit. We account for 100 coin stars by having each of
+    them count as two stars towards the total (and towards the number of
+    upper level stars).
+
+    Unless disabled, partitions are pruned with branch-and-bound: while
+    partitions are being built up, any partial partition whose lower
+    bound on route time (see get_partial_partition_lower_bound) is no
+    better than the best route found so far is skipped, along with
+    every partition that would have been built from it. The special
+    stars are partitioned one independent component at a time, and the
+    lower bound accounts for the special stars which haven't been
+    partitioned yet using a summary of each remaining component's
+    options (see get_remaining_special_star_summaries).
+
+    With more than one worker, the partitions are split up by
+    partitioning the first few special stars, and the partitions built
+    from each of the resulting partial partitions are searched in a
+    separate process. The processes share the best route time found so
+    far for pruning.
+
+    When more than one route is asked for, the fastest num_routes
+    routes are kept in a bounded max-heap, and partial partitions are
+    only pruned if they can't beat the slowest of those. Each partition
+    can have several of the fastest routes, so its routes are gone
+    through in order of increasing time until they're too slow to keep.
+    Routes are distinct if they have different stars, even if they take
+    exactly as long.
+
+    Partitions likely to lead to fast routes are built first: for each
+    special star, the faster of it and its 100 coin star alternative is
+    included first, and it's excluded first if neither of them is among
+    the fastest 70 stars. This finds fast routes early, which helps
+    pruning, and means that if the search is stopped early—because the
+    time budget ran out or because of a keyboard interrupt—the routes
+    found so far are likely to be good ones. They're returned, but
+    aren't proven to be the fastest.
 
     Args:
         star_time_tuples: A list of tuples (time, star_id) where
@@ -56,16 +156,36 @@ def get_optimal_route(
           their locations as values.
         num_stars_required_dict: A dictionary which has star IDs as keys
           and the star count they require as values.
+        prune_partitions: A flag to skip partial partitions which can't
+          lead to a better route than the best found so far.
+        num_workers: The number of processes to search partitions with.
+        num_routes: The maximum number of routes to return.
+        time_budget: An optional number of seconds after which to stop
+          searching.
+        initial_routes: An optional list of sets of star IDs which form
+          valid routes (e.g., the fastest routes found before some star
+          times changed) to start the search with. These make pruning
+          effective right away, and any of them which aren't beaten are
+          returned as if they had been found by the search.
 
     Returns:
-        A two-tuple containing (1) the set containing the star IDs which
-        are in the optimal route that was found and (2) the time an
-        optimal route takes.
+        A two-tuple containing (1) a non-empty list of up to num_routes
+        two-tuples, in order of increasing time, each containing the set
+        containing the star IDs which are in a route that was found and
+        the time the route takes, and (2) whether the search finished,
+        in which case the routes are proven to be the fastest routes
+        (so the first route is an optimal route).
 
     Raises:
         NoValidRoutePossible: If we were unable to form any route due to
-          insufficient time data.
+          insufficient time data, or if the search was stopped before
+          any route was found.
     """
+    if time_budget is not None:
+        deadline = monotonic() + time_budget
+    else:
+        deadline = None
+
     # For each 100 coin star, half its time; we're going to treat them
     # as two stars with the same ID, each of which has half the time
     hundred_coin_star_ids = set(base_star_alts_dict.values())
@@ -80,94 +200,652 @@ def get_optimal_route(
     # Sort the star time tuples in order of increasing time
     star_time_tuples.sort()
 
-    # Build a dictionary containing star IDs as keys and times as values
-    star_times_dict = util.build_star_times_dict_from_star_time_tuples(star_time_tuples)
+    # Build lists of star data indexed by bit index (i.e., the index in
+    # the sorted star time tuples list)
+    star_ids = [star_id for _, star_id in star_time_tuples]
+    star_bit_dict = {star_id: 1 << idx for idx, star_id in enumerate(star_ids)}
+    star_mults = [2 if star_id in hundred_coin_star_ids else 1 for star_id in star_ids]
+
+    # Find the fastest stars which make up a 70 star count, ignoring
+    # every constraint, to decide which partitions to build first
+    promising_stars_bitmask = 0
+    star_count = 0
+
+    for idx, mult in enumerate(star_mults):
+        if star_count >= NUM_STARS_IN_ROUTE:
+            break
+
+        promising_stars_bitmask |= 1 << idx
+        star_count += mult
 
     # For each valid partitioning of the special stars, add valid stars
-    # from shortest to longest until we reach the desired star total.
-    # Keep track of the shortest total time and the star IDs that lead
-    # to this total time.
-    best_time = math.inf
-    best_star_ids_set: set[str] | None = None
+    # from shortest to longest until we reach the desired star total,
+    # keeping track of the fastest route
+    star_num_stars_required = [num_stars_required_dict[star_id] for star_id in star_ids]
+
+    search_kwargs = {
+        "star_bit_dict": star_bit_dict,
+        "star_times": [time for time, _ in star_time_tuples],
+        "star_mults": star_mults,
+        "star_num_stars_required": star_num_stars_required,
+        "unlocked_stars_bitmasks": get_unlocked_stars_bitmasks(star_num_stars_required),
+        "upper_level_stars_bitmask": build_star_bitmask(
+            (
+                star_id
+                for star_id in star_ids
+                if star_locations_dict[star_id] in UPPER_LEVEL_LOCATIONS
+            ),
+            star_bit_dict,
+        ),
+        "hundred_coin_stars_bitmask": build_star_bitmask(
+            hundred_coin_star_ids, star_bit_dict
+        ),
+        "max_num_upper_level_stars": max_num_upper_level_stars,
+        "adjacency_list_dict": adjacency_list_dict,
+        "base_star_alts_dict": base_star_alts_dict,
+        "prune_partitions": prune_partitions,
+        "num_routes": num_routes,
+        "promising_stars_bitmask": promising_stars_bitmask,
+        "deadline": deadline,
+    }
+
+    if initial_routes:
+        # Keep the fastest distinct initial routes
+        initial_route_times_dict = {}
+
+        for route_star_ids in initial_routes:
+            bitmask = build_star_bitmask(route_star_ids, star_bit_dict)
+            route_time = sum(
+                star_mults[idx] * search_kwargs["star_times"][idx]
+                for idx in get_bitmask_indices(bitmask)
+            )
+            initial_route_times_dict.setdefault(bitmask, route_time)
+
+        search_kwargs["initial_route_tuples"] = sorted(
+            (route_time, bitmask)
+            for bitmask, route_time in initial_route_times_dict.items()
+        )[:num_routes]
+
+    if prune_partitions:
+        search_kwargs["remaining_special_star_summaries"] = (
+            get_remaining_special_star_summaries(
+                adjacency_list_dict,
+                base_star_alts_dict,
+                star_bit_dict,
+                search_kwargs["star_times"],
+                search_kwargs["star_mults"],
+                search_kwargs["upper_level_stars_bitmask"],
+                max_num_upper_level_stars,
+            )
+        )
 
-    for star_ids_set, excluded_set in get_valid_special_star_partitions(
-        adjacency_list_dict,
-        base_star_alts_dict,
-        eligible_stars=set(star_times_dict.keys()),
-    ):
-        # Get the total time, star count, and number of upper level
-        # stars for the stars already in the set
-        starting_total_time = 0
-        starting_star_count = 0
-        num_upper_level_stars = 0
+    if num_workers > 1:
+        (
+            route_tuples,
+            num_partitions_evaluated,
+            num_partitions_pruned,
+            search_completed,
+        ) = _search_special_star_partitions_in_parallel(num_workers, search_kwargs)
+    else:
+        (
+            route_tuples,
+            num_partitions_evaluated,
+            num_partitions_pruned,
+            search_completed,
+        ) = search_special_star_partitions(**search_kwargs)
+
+    logger.info(
+        "Evaluated %d special star partitions; pruned %d partial partitions.",
+        num_partitions_evaluated,
+        num_partitions_pruned,
+    )
 
-        for star_id in star_ids_set:
-            mult = 2 if star_id in hundred_coin_star_ids else 1
+    if not search_completed:
+        logger.warning(
+            "Stopped searching before every special star partition was"
+            " considered; routes found may not be optimal."
+        )
 
-            starting_total_time += mult * star_times_dict[star_id]
-            starting_star_count += mult
+    # Return stars IDs which form the fastest routes
+    if route_tuples:
+        return (
+            [
+                ({star_ids[idx] for idx in get_bitmask_indices(bitmask)}, route_time)
+                for route_time, bitmask in route_tuples
+            ],
+            search_completed,
+        )
 
-            if star_locations_dict[star_id] in UPPER_LEVEL_LOCATIONS:
-                num_upper_level_stars += 1
+    if not search_completed:
+        raise NoValidRoutePossible(
+            f"Stopped searching before any {NUM_STARS_IN_ROUTE} star route"
+            " was found."
+        )
 
-        # If we've exceeded the maximum number of upper level stars,
-        # skip this iteration
-        if num_upper_level_stars > max_num_upper_level_stars:
-            continue
+    raise NoValidRoutePossible(
+        f"Unable to form any {NUM_STARS_IN_ROUTE} star route due "
+        "to insufficient eligible stars."
+    )
 
-        # Now add stars from the star time tuples list until we reach
-        # the desired count
-        try:
-            # Add in stars which aren't on the upper levels
-            min_num_non_upper_level_stars = (
-                NUM_STARS_IN_ROUTE - max_num_upper_level_stars
-            )
-            star_count_to_reach_from_non_upper_levels = (
-                min_num_non_upper_level_stars + num_upper_level_stars
+
+def search_special_star_partitions(
+    star_bit_dict: dict[str, int],
+    star_times: list[float],
+    star_mults: list[int],
+    star_num_stars_required: list[int],
+    unlocked_stars_bitmasks: list[int],
+    upper_level_stars_bitmask: int,
+    hundred_coin_stars_bitmask: int,
+    max_num_upper_level_stars: int,
+    adjacency_list_dict: dict[str, list[str]],
+    base_star_alts_dict: dict[str, str],
+    prune_partitions: bool,
+    remaining_special_star_summaries: (
+        list[tuple[int, dict[int, tuple[list[int], list[float]]]]] | None
+    ) = None,
+    num_routes: int = 1,
+    initial_route_tuples: list[tuple[float, int]] | None = None,
+    promising_stars_bitmask: int | None = None,
+    deadline: float | None = None,
+    partial_partition: tuple[int, int, int] | None = None,
+    shared_best_time: Synchronized | None = None,
+    stop_event: EventType | None = None,
+) -> tuple[list[tuple[float, int]], int, int, bool]:
+    """Find the fastest routes over special star partitions.
+
+    See get_optimal_routes for a description of the search.
+
+    Args:
+        star_bit_dict: A dictionary with the star IDs eligible for the
+          optimal route as keys and the single-bit integers representing
+          them as values. Bit indices are in order of increasing time.
+        star_times: A list containing the time each star takes (halved
+          for 100 coin stars), indexed by bit index.
+        star_mults: A list containing the number of stars each star
+          counts as (two for 100 coin stars), indexed by bit index.
+        star_num_stars_required: A list containing the star count each
+          star requires, indexed by bit index.
+        unlocked_stars_bitmasks: The output of
+          get_unlocked_stars_bitmasks.
+        upper_level_stars_bitmask: A bitmask of the stars on the upper
+          levels (upstairs and tippy).
+        hundred_coin_stars_bitmask: A bitmask of the 100 coin stars.
+        max_num_upper_level_stars: The maximum number of stars from the
+          upper levels (upstairs and tippy) that can be added to the
+          route.
+        adjacency_list_dict: A dictionary which has non-100 coin star
+          IDs as keys and non-empty lists of star IDs the key star is a
+          prerequisite for as values.
+        base_star_alts_dict: A dictionary with base star IDs as keys and
+          100 coin star IDs that can be used to replace the base star as
+          values.
+        prune_partitions: A flag to skip partial partitions which can't
+          lead to a better route than the best found so far.
+        remaining_special_star_summaries: The output of
+          get_remaining_special_star_summaries, which is required if
+          prune_partitions is set.
+        num_routes: The number of fastest routes to keep.
+        initial_route_tuples: An optional list of up to num_routes
+          tuples (time, bitmask) with distinct bitmasks for routes to
+          start with, as if they had already been found.
+        promising_stars_bitmask: An optional bitmask of stars likely to
+          be in a fast route. See get_valid_special_star_partitions.
+        deadline: An optional time.monotonic() value at which to stop
+          searching.
+        partial_partition: An optional partial partition to only search
+          partitions built from. See get_valid_special_star_partitions.
+        shared_best_time: An optional shared value holding a route time
+          which num_routes routes found by some process are at least as
+          fast as, used for pruning and updated when faster routes are
+          found.
+        stop_event: An optional event which, once set, stops the search.
+
+    Returns:
+        A four-tuple containing (1) a list of up to num_routes tuples
+        (time, bitmask) for the fastest routes found, in order of
+        increasing time, (2) the number of partitions evaluated, (3) the
+        number of partial partitions pruned, and (4) whether every
+        partition was either evaluated or pruned (i.e., the search
+        wasn't stopped early by the deadline, the stop event, or a
+        keyboard interrupt).
+    """
+    all_stars_bitmask = (1 << len(star_times)) - 1
+    upper_level_hundred_coin_stars_bitmask = (
+        upper_level_stars_bitmask & hundred_coin_stars_bitmask
+    )
+
+    def _count_upper_level_stars(bitmask: int) -> int:
+        """Count the upper level stars in a bitmask.
+
+        100 coin stars count as two stars.
+
+        Args:
+            bitmask: A bitmask of stars.
+
+        Returns:
+            The number of upper level stars in the bitmask.
+        """
+        return (bitmask & upper_level_stars_bitmask).bit_count() + (
+            bitmask & upper_level_hundred_coin_stars_bitmask
+        ).bit_count()
+
+    # Keep the fastest routes found so far in a max-heap of (-time,
+    # bitmask) tuples. Routes which are already kept (e.g., initial
+    # routes) aren't kept again.
+    route_heap = [
+        (-route_time, bitmask) for route_time, bitmask in initial_route_tuples or []
+    ]
+    route_bitmasks = {bitmask for _, bitmask in route_heap}
+
+    heapq.heapify(route_heap)
+
+    # Once we have enough routes, a new route needs to be faster than
+    # the slowest of them
+    if len(route_heap) == num_routes:
+        time_to_beat = -route_heap[0][0]
+    else:
+        time_to_beat = math.inf
+
+    # Keep track of how many partitions we evaluate and how many partial
+    # partitions we prune
+    num_partitions_evaluated = 0
+    num_partitions_pruned = 0
+
+    # Keep track of whether we've stopped early
+    search_completed = True
+
+    def _should_stop() -> bool:
+        """Decide whether to stop searching early.
+
+        Returns:
+            Whether we've passed the deadline or have been asked to
+            stop.
+        """
+        nonlocal search_completed
+
+        if (deadline is not None and monotonic() >= deadline) or (
+            stop_event is not None and stop_event.is_set()
+        ):
+            search_completed = False
+
+        return not search_completed
+
+    def _prune_partial_partition(star_idx: int, included: int, excluded: int) -> bool:
+        """Decide whether a partial partition can be skipped.
+
+        Args:
+            star_idx: The number of base special stars which have been
+              partitioned.
+            included: A bitmask of the stars which are included in the
+              partial partition.
+            excluded: A bitmask of the stars which are excluded in the
+              partial partition.
+
+        Returns:
+            Whether no partition built from the partial partition can
+            lead to a route faster than the routes kept so far.
+        """
+        nonlocal num_partitions_pruned
+
+        # Skip everything that's left if we're stopping early
+        if _should_stop():
+            return True
+
+        # Use the time found by any process if we have it
+        time_to_beat_here = time_to_beat
+
+        if shared_best_time is not None:
+            time_to_beat_here = min(time_to_beat_here, shared_best_time.value)
+
+        # Stars are only ever added to the included set, so too many
+        # upper level stars can't be fixed further down
+        num_upper_level_stars = _count_upper_level_stars(included)
+
+        if (
+            num_upper_level_stars > max_num_upper_level_stars
+            or get_partial_partition_lower_bound(
+                included,
+                excluded,
+                *remaining_special_star_summaries[star_idx],
+                max_num_upper_level_stars - num_upper_level_stars,
+                star_times,
+                star_mults,
+                upper_level_stars_bitmask,
             )
+            >= time_to_beat_here
+        ):
+            num_partitions_pruned += 1
+
+            return True
+
+        return False
+
+    def _fill_partition(
+        fixed_bitmask: int, excluded_bitmask: int
+    ) -> tuple[float, int] | None:
+        """Find the fastest route for a partition.
+
+        Args:
+            fixed_bitmask: A bitmask of the stars which must be in the
+              route: the special stars included in the partition, and
+              possibly other stars.
+            excluded_bitmask: A bitmask of the stars that are excluded
+              from the route.
+
+        Returns:
+            A two-tuple containing the time the fastest route takes and
+            its bitmask, or None if there's no route.
+        """
+        # Get the total time for the stars already in the set. The fixed
+        # stars are collected as soon as we meet their required star
+        # counts, so keep them in a min-heap of (stars_required, mult)
+        # tuples.
+        starting_total_time = 0
+        special_star_heap = []
+
+        for idx in get_bitmask_indices(fixed_bitmask):
+            starting_total_time += star_mults[idx] * star_times[idx]
+            special_star_heap.append((star_num_stars_required[idx], star_mults[idx]))
 
-            total_time, star_ids_set = add_non_special_stars_to_star_set(
+        heapq.heapify(special_star_heap)
+
+        # Now add stars in order of increasing time until we reach the
+        # desired count
+        try:
+            total_time, _, included_bitmask = add_non_special_stars_to_star_set(
                 starting_total_time,
-                starting_star_count,
-                star_count_to_reach_from_non_upper_levels,
-                ALL_LOCATIONS - UPPER_LEVEL_LOCATIONS,
-                star_ids_set,
-                excluded_set,
-                star_time_tuples,
-                hundred_coin_star_ids,
-                star_locations_dict,
-                num_stars_required_dict,
+                0,
+                NUM_STARS_IN_ROUTE,
+                all_stars_bitmask,
+                fixed_bitmask,
+                excluded_bitmask,
+                special_star_heap,
+                star_times,
+                star_mults,
+                unlocked_stars_bitmasks,
             )
 
-            # Add in stars from anywhere
-            total_time, star_ids_set = add_non_special_stars_to_star_set(
-                total_time,
-                max(starting_star_count, star_count_to_reach_from_non_upper_levels),
-                NUM_STARS_IN_ROUTE,
-                ALL_LOCATIONS,
-                star_ids_set,
-                excluded_set,
-                star_time_tuples,
-                hundred_coin_star_ids,
-                star_locations_dict,
-                num_stars_required_dict,
+            # Skip routes with fixed stars whose required star counts
+            # were never met
+            if special_star_heap:
+                return None
+
+            # Swap out upper level stars until we're within the limit
+            num_upper_level_stars = _count_upper_level_stars(included_bitmask)
+
+            if num_upper_level_stars > max_num_upper_level_stars:
+                total_time, included_bitmask = swap_out_upper_level_stars(
+                    total_time,
+                    num_upper_level_stars - max_num_upper_level_stars,
+                    included_bitmask,
+                    excluded_bitmask,
+                    fixed_bitmask,
+                    upper_level_stars_bitmask,
+                    star_times,
+                    star_mults,
+                    star_num_stars_required,
+                )
+        except InsufficientRemainingStars:
+            return None
+
+        return (total_time, included_bitmask)
+
+    def _keep_route(total_time: float, included_bitmask: int) -> None:
+        """Keep a route if it's fast enough and distinct.
+
+        Args:
+            total_time: The time the route takes.
+            included_bitmask: A bitmask of the stars in the route.
+        """
+        nonlocal time_to_beat
+
+        if total_time >= time_to_beat or included_bitmask in route_bitmasks:
+            return
+
+        if len(route_heap) == num_routes:
+            _, slowest_bitmask = heapq.heappushpop(
+                route_heap, (-total_time, included_bitmask)
             )
+            route_bitmasks.remove(slowest_bitmask)
+        else:
+            heapq.heappush(route_heap, (-total_time, included_bitmask))
 
-            # Update best time and stars set
-            if total_time < best_time:
-                best_time = total_time
-                best_star_ids_set = star_ids_set
+        route_bitmasks.add(included_bitmask)
 
-        except InsufficientRemainingStars:
-            pass
+        logger.debug(
+            "Found route taking %.2f seconds after %d partitions.",
+            total_time,
+            num_partitions_evaluated,
+        )
 
-    # Return stars IDs which form an optimal route
-    if best_star_ids_set is not None:
-        return (best_star_ids_set, best_time)
+        if len(route_heap) == num_routes:
+            time_to_beat = -route_heap[0][0]
 
-    raise NoValidRoutePossible(
-        f"Unable to form any {NUM_STARS_IN_ROUTE} star route due "
-        "to insufficient eligible stars."
+            # Let other processes prune using this time
+            if shared_best_time is not None:
+                with shared_best_time.get_lock():
+                    if time_to_beat < shared_best_time.value:
+                        shared_best_time.value = time_to_beat
+
+    partitions = get_valid_special_star_partitions(
+        adjacency_list_dict,
+        base_star_alts_dict,
+        star_bit_dict,
+        prune_partial_partition=(
+            _prune_partial_partition if prune_partitions else None
+        ),
+        partial_partition=partial_partition,
+        promising_stars_bitmask=promising_stars_bitmask,
+    )
+
+    # Stop early (keeping the routes found so far) if we pass the
+    # deadline, are asked to stop, or are interrupted
+    try:
+        for special_stars_bitmask, excluded_bitmask in partitions:
+            if _should_stop():
+                break
+
+            num_partitions_evaluated += 1
+
+            # If we've exceeded the maximum number of upper level stars
+            # with the special stars alone, skip this iteration
+            if (
+                _count_upper_level_stars(special_stars_bitmask)
+                > max_num_upper_level_stars
+            ):
+                continue
+
+            route_tuple = _fill_partition(special_stars_bitmask, excluded_bitmask)
+
+            if route_tuple is None:
+                continue
+
+            if num_routes == 1:
+                _keep_route(*route_tuple)
+
+                continue
+
+            # Go through the partition's routes in order of increasing
+            # time until they're too slow to keep. Other than the fastest
+            # route, each of a route's stars which the partition doesn't
+            # fix is either left out or fixed in the route in turn, so
+            # every route is found exactly once (Lawler's method).
+            candidate_heap = [(*route_tuple, special_stars_bitmask, excluded_bitmask)]
+
+            while (
+                candidate_heap
+                and candidate_heap[0][0] < time_to_beat
+                and not _should_stop()
+            ):
+                total_time, included_bitmask, fixed_bitmask, excluded_bitmask = (
+                    heapq.heappop(candidate_heap)
+                )
+                _keep_route(total_time, included_bitmask)
+
+                for idx in get_bitmask_indices(included_bitmask & ~fixed_bitmask):
+                    route_tuple = _fill_partition(
+                        fixed_bitmask, excluded_bitmask | 1 << idx
+                    )
+
+                    if route_tuple is not None and route_tuple[0] < time_to_beat:
+                        heapq.heappush(
+                            candidate_heap,
+                            (*route_tuple, fixed_bitmask, excluded_bitmask | 1 << idx),
+                        )
+
+                    fixed_bitmask |= 1 << idx
+    except KeyboardInterrupt:
+        search_completed = False
+
+    return (
+        sorted((-negative_time, bitmask) for negative_time, bitmask in route_heap),
+        num_partitions_evaluated,
+        num_partitions_pruned,
+        search_completed,
+    )
+
+
+# Search arguments shared by every task in a worker process. These are
+# set once per process by _init_worker rather than being sent along
+# with every task.
+_worker_search_kwargs: dict = {}
+
+
+def _init_worker(
+    search_kwargs: dict, shared_best_time: Synchronized, stop_event: EventType
+) -> None:
+    """Store the search arguments for a worker process.
+
+    Keyboard interrupts are ignored in worker processes: the main
+    process handles them by setting the stop event, so that each worker
+    returns the routes it has found so far.
+
+    Args:
+        search_kwargs: Keyword arguments for
+          search_special_star_partitions shared by every task.
+        shared_best_time: A shared value holding a route time which
+          enough routes found by some process are at least as fast as.
+        stop_event: An event which, once set, stops the search.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    _worker_search_kwargs.update(
+        search_kwargs, shared_best_time=shared_best_time, stop_event=stop_event
+    )
+
+
+def _search_from_partial_partition(
+    partial_partition: tuple[int, int, int],
+) -> tuple[list[tuple[float, int]], int, int, bool]:
+    """Search partitions built from a partial partition in a worker process.
+
+    Args:
+        partial_partition: The partial partition to search partitions
+          built from. See get_valid_special_star_partitions.
+
+    Returns:
+        The output of search_special_star_partitions.
+    """
+    return search_special_star_partitions(
+        **_worker_search_kwargs, partial_partition=partial_partition
+    )
+
+
+def _search_special_star_partitions_in_parallel(
+    num_workers: int, search_kwargs: dict
+) -> tuple[list[tuple[float, int]], int, int, bool]:
+    """Find the fastest routes over special star partitions using processes.
+
+    Args:
+        num_workers: The number of processes to search partitions with.
+        search_kwargs: Keyword arguments for
+          search_special_star_partitions.
+
+    Returns:
+        The same output as search_special_star_partitions, combined over
+        all processes.
+    """
+    adjacency_list_dict = search_kwargs["adjacency_list_dict"]
+    base_star_alts_dict = search_kwargs["base_star_alts_dict"]
+
+    # Partition the first few base special stars to split up the work,
+    # partitioning more of them until there are enough partial
+    # partitions to keep every process busy
+    num_base_special_stars = len(
+        get_ordered_base_special_stars(adjacency_list_dict, base_star_alts_dict)
+    )
+    num_split_stars = 0
+
+    while True:
+        partial_partitions = [
+            (num_split_stars, included, excluded)
+            for included, excluded in get_valid_special_star_partitions(
+                adjacency_list_dict,
+                base_star_alts_dict,
+                search_kwargs["star_bit_dict"],
+                max_num_base_special_stars=num_split_stars,
+                promising_stars_bitmask=search_kwargs["promising_stars_bitmask"],
+            )
+        ]
+
+        if (
+            len(partial_partitions) >= PARTIAL_PARTITIONS_PER_WORKER * num_workers
+            or num_split_stars >= num_base_special_stars
+        ):
+            break
+
+        num_split_stars += 1
+
+    # Search each partial partition in a process, and then combine the
+    # results. Going through the results in order means ties are broken
+    # the same way as when searching in a single process. Each process
+    # shares the time of the slowest of its routes once it has enough of
+    # them, since at least that many routes are that fast overall.
+    shared_best_time = multiprocessing.Value("d", math.inf)
+    stop_event = multiprocessing.Event()
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=num_workers,
+        initializer=_init_worker,
+        initargs=(search_kwargs, shared_best_time, stop_event),
+    ) as executor:
+        futures = [
+            executor.submit(_search_from_partial_partition, partial_partition)
+            for partial_partition in partial_partitions
+        ]
+
+        # On a keyboard interrupt, have the processes stop and wait for
+        # the routes they've found so far
+        try:
+            concurrent.futures.wait(futures)
+        except KeyboardInterrupt:
+            stop_event.set()
+
+            concurrent.futures.wait(futures)
+
+        results = [future.result() for future in futures]
+
+    route_times_dict: dict[int, float] = {}
+    num_partitions_evaluated = 0
+    num_partitions_pruned = 0
+    search_completed = True
+
+    for route_tuples, num_evaluated, num_pruned, completed in results:
+        for route_time, bitmask in route_tuples:
+            route_times_dict.setdefault(bitmask, route_time)
+
+        num_partitions_evaluated += num_evaluated
+        num_partitions_pruned += num_pruned
+        search_completed = search_completed and completed
+
+    return (
+        sorted(
+            ((route_time, bitmask) for bitmask, route_time in route_times_dict.items()),
+            key=lambda route_tuple: route_tuple[0],
+        )[: search_kwargs["num_routes"]],
+        num_partitions_evaluated,
+        num_partitions_pruned,
+        search_completed,
     )
 
 
@@ -175,51 +853,60 @@ def add_non_special_stars_to_star_set(
     starting_time: float,
     starting_star_count: int,
     max_star_count: int,
-    allowed_locations: set[str],
-    included_set: set[str],
-    excluded_set: set[str],
-    star_time_tuples: list[tuple[float, str]],
-    hundred_coin_star_ids: set[str],
-    star_locations_dict: dict[str, str],
-    num_stars_required_dict: dict[str, int],
-) -> tuple[float, set[str]]:
+    allowed_bitmask: int,
+    included_bitmask: int,
+    excluded_bitmask: int,
+    special_star_heap: list[tuple[int, int]],
+    star_times: list[float],
+    star_mults: list[int],
+    unlocked_stars_bitmasks: list[int],
+) -> tuple[float, int, int]:
     """
-    Add non-special star IDs to a star ID set.
+    Add non-special stars to a set of stars.
 
     The strategy here is iterate until we reach the desired number of
-    stars. First we try to look for a star to add from a min-heap that
-    we meet the required star count for (the heap is ordered on required
-    star count). If there is no such star on the heap, we look at the
-    sorted star time tuples list: any stars which are not already
-    included or excluded and have an allowed location that we do not
-    meet the required star for count are added to the heap; we continue
-    until we find a valid star we meet the required star count for. We
-    then move to the next iteration, keeping track of what index we were
-    last at in the star time tuples list.
+    stars, each time adding the fastest allowed star we meet the
+    required star count for. Since bit indices are in order of
+    increasing time, that's the lowest set bit of the bitmask of allowed
+    stars which we haven't already included or excluded, masked by the
+    bitmask of stars unlocked at the current star count, so no stars
+    are looked at other than the ones we add. This also means a later
+    call can carry on from where an earlier call left off (e.g., with
+    more allowed stars) just by being passed its output.
+
+    Special stars are already in the set, but are only counted once we
+    meet their required star count. The special stars which haven't
+    been counted yet are kept in a min-heap which is updated in place,
+    so that we can carry on from where we left off.
 
     Args:
         starting_time: The time taken by the stars initially included in
           the included set.
         starting_star_count: The star count of the stars initially
-          included in the included set.
-        max_star_count: The maximum number of stars to get.
-        allowed_locations: A set of locations for which we can add stars
-          from.
-        included_set: A set of star IDs that are included in the route.
-        excluded_set: A set of star IDs that are excluded from the
-          route.
-        star_time_tuples: A list of tuples (time, star_id) where
-          star_ids are the star IDs eligible for the optimal route and
-          time is the time a star takes.
-        hundred_coin_star_ids: A set of 100 coin star IDs.
-        star_locations_dict: A dictionary which has star IDs as keys and
-          their locations as values.
-        num_stars_required_dict: A dictionary which has star IDs as keys
-          and the star count they require as values.
+          included in the included set, not counting the special stars
+          in the special star heap.
+        max_star_count: The maximum number of stars to get, counting
+          the special stars in the special star heap.
+        allowed_bitmask: A bitmask of the stars we can add (e.g., the
+          stars from allowed locations).
+        included_bitmask: A bitmask of the stars that are included in
+          the route.
+        excluded_bitmask: A bitmask of the stars that are excluded from
+          the route.
+        special_star_heap: A min-heap of (stars_required, mult) tuples
+          for the special stars which haven't been counted yet.
+        star_times: A list containing the time each star takes (halved
+          for 100 coin stars), indexed by bit index.
+        star_mults: A list containing the number of stars each star
+          counts as (two for 100 coin stars), indexed by bit index.
+        unlocked_stars_bitmasks: The output of
+          get_unlocked_stars_bitmasks.
 
     Returns:
-        A two-tuple containing the total time taken by the stars in the
-        route, and a set of star IDs included in the route.
+        A three-tuple containing the total time taken by the stars in
+        the route, the star count of the stars in the route (not
+        counting the special stars remaining in the special star heap),
+        and a bitmask of the stars included in the route.
 
     Raises:
         InsufficientRemainingStars: If there weren't enough remaining
@@ -227,76 +914,537 @@ def add_non_special_stars_to_star_set(
     """
     total_time = starting_time
     star_count = starting_star_count
+    num_uncounted_special_stars = sum(mult for _, mult in special_star_heap)
 
-    # Make min-heap holding tuples (stars_required, star_time_tuple)
-    # (where star_time_tuple is a two-tuple (time, star_id))
-    STAR_REQUIREMENT_INDEX = 0  # pylint: disable=invalid-name
+    # Keep track of the stars we have yet to add
+    remaining_bitmask = allowed_bitmask & ~(included_bitmask | excluded_bitmask)
 
-    heap: list[tuple[int, tuple[float, str]]] = []
+    # Add in stars until we have the required number
+    while True:
+        # Count the special stars we now meet the required star count
+        # for
+        while special_star_heap and special_star_heap[0][0] <= star_count:
+            mult = heapq.heappop(special_star_heap)[1]
+            star_count += mult
+            num_uncounted_special_stars -= mult
 
-    # Keep track of index in star time tuples list
-    star_time_tuples_idx = 0
+        if star_count + num_uncounted_special_stars >= max_star_count:
+            break
 
-    # Add in stars until we have the required number
-    while star_count < max_star_count:
-        star_time_tuple_to_add: tuple[float, str] | None = None
+        # Find the fastest star we can add
+        addable_bitmask = remaining_bitmask & unlocked_stars_bitmasks[star_count]
 
-        # Try adding from the heap
-        if heap and heap[0][STAR_REQUIREMENT_INDEX] <= star_count:
-            _, star_time_tuple_to_add = heapq.heappop(heap)
+        if not addable_bitmask:
+            # Ran out of isolated stars
+            raise InsufficientRemainingStars
 
-        # Try adding from the star time tuples list
-        while star_time_tuple_to_add is None:
-            try:
-                star_time_tuple = star_time_tuples[star_time_tuples_idx]
-            except IndexError as e:
-                # Ran out of isolated stars
-                raise InsufficientRemainingStars from e
+        bit_to_add = addable_bitmask & -addable_bitmask
+        idx_to_add = bit_to_add.bit_length() - 1
 
-            # Increment index for next iteration
-            star_time_tuples_idx += 1
+        # Add to the included stars, total time, and star count
+        included_bitmask |= bit_to_add
+        remaining_bitmask ^= bit_to_add
 
-            # Skip this star ID if it's already included or excluded or
-            # if it's from an unallowed location
-            star_id = star_time_tuple[STAR_TIME_TUPLE_STAR_ID_INDEX]
+        total_time += star_mults[idx_to_add] * star_times[idx_to_add]
+        star_count += star_mults[idx_to_add]
 
-            if (
-                star_id in included_set
-                or star_id in excluded_set
-                or star_locations_dict[star_id] not in allowed_locations
+    return (total_time, star_count, included_bitmask)
+
+
+def swap_out_upper_level_stars(
+    starting_time: float,
+    num_stars_to_swap: int,
+    included_bitmask: int,
+    excluded_bitmask: int,
+    special_stars_bitmask: int,
+    upper_level_stars_bitmask: int,
+    star_times: list[float],
+    star_mults: list[int],
+    star_num_stars_required: list[int],
+) -> tuple[float, int]:
+    """
+    Swap upper level stars in a route for stars from elsewhere.
+
+    The route must be the fastest route containing its special stars
+    (e.g., as formed by add_non_special_stars_to_star_set without an
+    upper level star limit). Each swap takes out a non-special upper
+    level star and puts in a star from elsewhere which isn't special,
+    excluded, or already in the route, choosing the swap which slows
+    the route down the least while keeping every star in it
+    collectable. The stars' star count requirements make the sets of
+    non-special stars which can complete the route the bases of a
+    matroid, so the route after each swap is the fastest route
+    containing the special stars with that many upper level stars (see
+    Gabow and Tarjan's "Efficient algorithms for a family of matroid
+    intersection problems").
+
+    If the stars in a route are collected in ascending order of star
+    count requirement, a star with star count requirement r can be
+    collected exactly when the stars with requirements below r count
+    for at least r stars. A swap which takes out a star with requirement
+    r_out and puts in a star with requirement r_in > r_out lowers that
+    count by one for each r in (r_out, r_in], so it's allowed exactly
+    when none of those counts is tight.
+
+    Args:
+        starting_time: The time taken by the stars in the route.
+        num_stars_to_swap: The number of upper level stars to swap out.
+        included_bitmask: A bitmask of the stars in the route.
+        excluded_bitmask: A bitmask of the stars that are excluded from
+          the route.
+        special_stars_bitmask: A bitmask of the special stars in the
+          route, which can't be swapped out.
+        upper_level_stars_bitmask: A bitmask of the stars on the upper
+          levels (upstairs and tippy).
+        star_times: A list containing the time each star takes (halved
+          for 100 coin stars), indexed by bit index.
+        star_mults: A list containing the number of stars each star
+          counts as (two for 100 coin stars), indexed by bit index.
+        star_num_stars_required: A list containing the star count each
+          star requires, indexed by bit index.
+
+    Returns:
+        A two-tuple containing the total time taken by the stars in the
+        route and a bitmask of the stars included in the route.
+
+    Raises:
+        InsufficientRemainingStars: If there weren't enough stars from
+          elsewhere to swap in.
+    """
+    total_time = starting_time
+    non_upper_level_stars_bitmask = ((1 << len(star_times)) - 1) & ~(
+        upper_level_stars_bitmask
+    )
+
+    for _ in range(num_stars_to_swap):
+        # Count the stars in the route with requirements below each star
+        # count, and find the highest tight star count at or below each
+        # star count
+        star_counts_below = [0] * (NUM_STARS_IN_ROUTE + 2)
+
+        for idx in get_bitmask_indices(included_bitmask):
+            star_counts_below[star_num_stars_required[idx] + 1] += star_mults[idx]
+
+        last_tight_star_counts = [0] * (NUM_STARS_IN_ROUTE + 1)
+
+        for star_count in range(1, NUM_STARS_IN_ROUTE + 1):
+            star_counts_below[star_count] += star_counts_below[star_count - 1]
+            last_tight_star_counts[star_count] = (
+                star_count
+                if star_counts_below[star_count] <= star_count
+                else last_tight_star_counts[star_count - 1]
+            )
+
+        # Find the slowest star we can swap out among those with at
+        # least each star count requirement
+        slowest_indices: list[int | None] = [None] * (NUM_STARS_IN_ROUTE + 2)
+
+        for idx in get_bitmask_indices(
+            included_bitmask & upper_level_stars_bitmask & ~special_stars_bitmask
+        ):
+            slowest_indices[star_num_stars_required[idx]] = idx
+
+        for star_count in range(NUM_STARS_IN_ROUTE, -1, -1):
+            if slowest_indices[star_count + 1] is not None and (
+                slowest_indices[star_count] is None
+                or slowest_indices[star_count + 1] > slowest_indices[star_count]
             ):
+                slowest_indices[star_count] = slowest_indices[star_count + 1]
+
+        # Find the swap which slows the route down the least
+        best_swap = None
+
+        for idx_in in get_bitmask_indices(
+            non_upper_level_stars_bitmask & ~(included_bitmask | excluded_bitmask)
+        ):
+            if star_num_stars_required[idx_in] > NUM_STARS_IN_ROUTE:
                 continue
 
-            # If we meet the required star count, add this star;
-            # otherwise throw it on the heap
-            if (num_stars_required := num_stars_required_dict[star_id]) <= star_count:
-                star_time_tuple_to_add = star_time_tuple
-            else:
-                # Not enough stars required. Add it to the heap.
-                heapq.heappush(heap, (num_stars_required, star_time_tuple))
+            idx_out = slowest_indices[
+                last_tight_star_counts[star_num_stars_required[idx_in]]
+            ]
 
-        # Unpack the star to add
-        time_to_add, star_id_to_add = star_time_tuple_to_add
+            if idx_out is None:
+                continue
 
-        # Add to star IDs set
-        included_set.add(star_id_to_add)
+            time_change = star_times[idx_in] - star_times[idx_out]
 
-        # Add to total time, star count, and number of upper level
-        # stars
-        mult = 2 if star_id_to_add in hundred_coin_star_ids else 1
+            if best_swap is None or time_change < best_swap[0]:
+                best_swap = (time_change, idx_in, idx_out)
 
-        total_time += mult * time_to_add
-        star_count += mult
+        if best_swap is None:
+            raise InsufficientRemainingStars
+
+        time_change, idx_in, idx_out = best_swap
+
+        included_bitmask ^= 1 << idx_in | 1 << idx_out
+        total_time += time_change
+
+    return (total_time, included_bitmask)
+
+
+def get_unlocked_stars_bitmasks(star_num_stars_required: list[int]) -> list[int]:
+    """Get bitmasks of the stars unlocked at each star count.
+
+    Args:
+        star_num_stars_required: A list containing the star count each
+          star requires, indexed by bit index.
+
+    Returns:
+        A list of length 71 whose element at index star_count is a
+        bitmask of the stars requiring at most star_count stars.
+    """
+    # Bucket the stars by the star count they require, and then
+    # accumulate the buckets
+    unlocked_stars_bitmasks = [0] * (NUM_STARS_IN_ROUTE + 1)
+
+    for idx, num_stars_required in enumerate(star_num_stars_required):
+        if num_stars_required <= NUM_STARS_IN_ROUTE:
+            unlocked_stars_bitmasks[num_stars_required] |= 1 << idx
+
+    for star_count in range(1, NUM_STARS_IN_ROUTE + 1):
+        unlocked_stars_bitmasks[star_count] |= unlocked_stars_bitmasks[star_count - 1]
+
+    return unlocked_stars_bitmasks
+
+
+def get_remaining_special_star_summaries(
+    adjacency_list_dict: dict[str, list[str]],
+    base_star_alts_dict: dict[str, str],
+    star_bit_dict: dict[str, int],
+    star_times: list[float],
+    star_mults: list[int],
+    upper_level_stars_bitmask: int,
+    max_num_upper_level_stars: int,
+) -> list[tuple[int, dict[int, tuple[list[int], list[float]]]]]:
+    """Summarize the options for the special stars left to partition.
+
+    Each component of special stars (see get_special_star_components) is
+    partitioned on its own, and each of its partitions is summarized by
+    the star count, number of upper level stars, and time of its
+    included stars, keeping only the fastest partition for each star
+    count and number of upper level stars. The summaries of the
+    components are then combined knapsack-style: the summary of several
+    components is built from the summary of all but the first of them
+    by trying each option of the first. This takes time proportional to
+    the sum of the components' numbers of partitions rather than their
+    product.
+
+    Since DDD1 (or its 100 coin star alternative) is included before
+    partitioning starts, it's left out of the summaries.
+
+    Args:
+        adjacency_list_dict: A dictionary which has non-100 coin star
+          IDs as keys and non-empty lists of star IDs the key star is a
+          prerequisite for as values.
+        base_star_alts_dict: A dictionary with base star IDs as keys and
+          100 coin star IDs that can be used to replace the base star as
+          values.
+        star_bit_dict: A dictionary with the star IDs eligible for the
+          optimal route as keys and the single-bit integers representing
+          them as values.
+        star_times: A list containing the time each star takes (halved
+          for 100 coin stars), indexed by bit index.
+        star_mults: A list containing the number of stars each star
+          counts as (two for 100 coin stars), indexed by bit index.
+        upper_level_stars_bitmask: A bitmask of the stars on the upper
+          levels (upstairs and tippy).
+        max_num_upper_level_stars: The maximum number of stars from the
+          upper levels (upstairs and tippy) that can be added to the
+          route.
+
+    Returns:
+        A list indexed by the number of base special stars (in the order
+        given by get_ordered_base_special_stars) which have been
+        partitioned. Each element is a two-tuple containing (1) a
+        bitmask of the special stars in the components which haven't
+        been partitioned at all and (2) the summary of those components.
+        A summary is a dictionary with star counts (capped at 70) as
+        keys and two-tuples as values containing a list of increasing
+        numbers of upper level stars and a list of the decreasing
+        fastest times possible with at most that many upper level
+        stars.
+    """
+    # Only keep track of upper level stars if the limit can matter
+    track_upper_level_stars = max_num_upper_level_stars < NUM_STARS_IN_ROUTE
 
-    return (total_time, included_set)
+    def _summarize_component(
+        start_idx: int, end_idx: int
+    ) -> dict[tuple[int, int], float]:
+        """Summarize the partitions of a component.
+
+        Args:
+            start_idx: The index of the first base special star in the
+              component.
+            end_idx: One past the index of the last base special star in
+              the component.
+
+        Returns:
+            A dictionary with (star_count, num_upper_level_stars) tuples
+            as keys and the fastest time of the component's included
+            stars for them as values.
+        """
+        summary: dict[tuple[int, int], float] = {}
+
+        for included, _ in get_valid_special_star_partitions(
+            adjacency_list_dict,
+            base_star_alts_dict,
+            star_bit_dict,
+            max_num_base_special_stars=end_idx,
+            partial_partition=(start_idx, 0, 0),
+        ):
+            time = 0
+            star_count = 0
+            num_upper_level_stars = 0
+
+            for idx in get_bitmask_indices(included):
+                time += star_mults[idx] * star_times[idx]
+                star_count += star_mults[idx]
+
+                if track_upper_level_stars and 1 << idx & upper_level_stars_bitmask:
+                    num_upper_level_stars += star_mults[idx]
+
+            key = (min(star_count, NUM_STARS_IN_ROUTE), num_upper_level_stars)
+
+            if num_upper_level_stars <= max_num_upper_level_stars and time < (
+                summary.get(key, math.inf)
+            ):
+                summary[key] = time
+
+        return summary
+
+    def _convert_summary(
+        summary: dict[tuple[int, int], float],
+    ) -> dict[int, tuple[list[int], list[float]]]:
+        """Convert a summary into lists of fastest times by star count.
+
+        Args:
+            summary: A dictionary with (star_count,
+              num_upper_level_stars) tuples as keys and times as values.
+
+        Returns:
+            A summary in the form described in the outer function.
+        """
+        converted_summary: dict[int, tuple[list[int], list[float]]] = {}
+
+        for (star_count, num_upper_level_stars), time in sorted(summary.items()):
+            nums_upper_level_stars, times = converted_summary.setdefault(
+                star_count, ([], [])
+            )
+
+            # Only keep options faster than those with fewer upper level
+            # stars
+            if not times or time < times[-1]:
+                nums_upper_level_stars.append(num_upper_level_stars)
+                times.append(time)
+
+        return converted_summary
+
+    # Find where each component starts and ends in the partitioning order
+    component_bounds = []
+    start_idx = 0
+
+    for component in get_special_star_components(
+        adjacency_list_dict, base_star_alts_dict
+    ):
+        component_bounds.append((start_idx, start_idx + len(component)))
+        start_idx += len(component)
+
+    num_base_special_stars = start_idx
+
+    # Combine the summaries of the components from last to first
+    summary: dict[tuple[int, int], float] = {(0, 0): 0}
+    remaining_special_stars_bitmask = 0
+    ordered_base_special_stars = get_ordered_base_special_stars(
+        adjacency_list_dict, base_star_alts_dict
+    )
+
+    remaining_special_star_summaries = [None] * (num_base_special_stars + 1)
+    remaining_special_star_summaries[num_base_special_stars] = (
+        0,
+        _convert_summary(summary),
+    )
+
+    for start_idx, end_idx in reversed(component_bounds):
+        # While a component is partially partitioned, its remaining
+        # special stars are left out of the summary
+        for star_idx in range(start_idx + 1, end_idx):
+            remaining_special_star_summaries[star_idx] = (
+                remaining_special_star_summaries[end_idx]
+            )
+
+        # Add the component to the summary
+        component_summary = _summarize_component(start_idx, end_idx)
+        combined_summary: dict[tuple[int, int], float] = {}
+
+        for (star_count, num_upper_level_stars), time in component_summary.items():
+            for (
+                other_star_count,
+                other_num_upper_level_stars,
+            ), other_time in summary.items():
+                key = (
+                    min(star_count + other_star_count, NUM_STARS_IN_ROUTE),
+                    num_upper_level_stars + other_num_upper_level_stars,
+                )
+
+                if key[1] <= max_num_upper_level_stars and time + other_time < (
+                    combined_summary.get(key, math.inf)
+                ):
+                    combined_summary[key] = time + other_time
+
+        summary = combined_summary
+
+        for base_star_id in ordered_base_special_stars[start_idx:end_idx]:
+            remaining_special_stars_bitmask |= build_star_bitmask(
+                (base_star_id, base_star_alts_dict.get(base_star_id, "")),
+                star_bit_dict,
+            )
+
+        remaining_special_star_summaries[start_idx] = (
+            remaining_special_stars_bitmask,
+            _convert_summary(summary),
+        )
+
+    return remaining_special_star_summaries
+
+
+def get_partial_partition_lower_bound(
+    included_bitmask: int,
+    excluded_bitmask: int,
+    remaining_special_stars_bitmask: int,
+    remaining_special_star_summary: dict[int, tuple[list[int], list[float]]],
+    max_num_remaining_upper_level_stars: int,
+    star_times: list[float],
+    star_mults: list[int],
+    upper_level_stars_bitmask: int,
+) -> float:
+    """Get a lower bound on the time of any route built from a partition.
+
+    Any route built from a (possibly partial) partition contains the
+    included stars, one option for the special stars in the components
+    which haven't been partitioned at all, and enough other stars which
+    aren't excluded to reach 70 stars. The fastest the option can be for
+    a given star count and number of upper level stars is given by the
+    summary of those components (see
+    get_remaining_special_star_summaries). Ignoring star count
+    requirements, prerequisites, and mutual exclusivity, the fastest the
+    other stars can be is the fastest stars which are neither included,
+    excluded, nor in those components, taking no more upper level stars
+    than are allowed. Each 100 coin star counts as two stars, each with
+    half of the 100 coin star's time, which may be taken separately
+    here.
+
+    Args:
+        included_bitmask: A bitmask of the stars that are included in
+          the route.
+        excluded_bitmask: A bitmask of the stars that are excluded from
+          the route.
+        remaining_special_stars_bitmask: A bitmask of the special stars
+          in the components which haven't been partitioned at all.
+        remaining_special_star_summary: The summary of the components
+          which haven't been partitioned at all.
+        max_num_remaining_upper_level_stars: The number of upper level
+          stars which can still be added to the route.
+        star_times: A list containing the time each star takes (halved
+          for 100 coin stars), indexed by bit index, in order of
+          increasing time.
+        star_mults: A list containing the number of stars each star
+          counts as (two for 100 coin stars), indexed by bit index.
+        upper_level_stars_bitmask: A bitmask of the stars on the upper
+          levels (upstairs and tippy).
+
+    Returns:
+        A lower bound on the time of any route built from the partition,
+        or infinity if there aren't enough stars left to form a route.
+    """
+    total_time = 0
+    star_count = 0
+
+    # Add in the included stars
+    for idx in get_bitmask_indices(included_bitmask):
+        total_time += star_mults[idx] * star_times[idx]
+        star_count += star_mults[idx]
+
+    # Find the fastest total times for each number of other stars from
+    # the upper levels and from elsewhere, along with how many of the
+    # fastest other stars overall are from the upper levels, up to the
+    # most other stars we could need
+    num_other_stars_needed = (
+        NUM_STARS_IN_ROUTE - star_count - min(remaining_special_star_summary, default=0)
+    )
+    non_upper_level_times = [0.0]
+    upper_level_times = [0.0]
+    nums_upper_level_stars_among_fastest = [0]
+
+    available_bitmask = ((1 << len(star_times)) - 1) & ~(
+        included_bitmask | excluded_bitmask | remaining_special_stars_bitmask
+    )
+
+    for idx in get_bitmask_indices(available_bitmask):
+        if len(non_upper_level_times) > num_other_stars_needed:
+            break
+
+        times = (
+            upper_level_times
+            if 1 << idx & upper_level_stars_bitmask
+            else non_upper_level_times
+        )
+
+        for _ in range(star_mults[idx]):
+            times.append(times[-1] + star_times[idx])
+
+            if len(nums_upper_level_stars_among_fastest) <= num_other_stars_needed:
+                nums_upper_level_stars_among_fastest.append(len(upper_level_times) - 1)
+
+    # Find the fastest combination of an option for the remaining
+    # special stars and other stars. The fastest way to get some number
+    # of other stars with a limited number from the upper levels takes
+    # as many of the fastest other stars overall from the upper levels as
+    # the limit allows.
+    best_remaining_time = math.inf
+
+    for remaining_star_count, (
+        nums_upper_level_stars,
+        times,
+    ) in remaining_special_star_summary.items():
+        num_other_stars = max(0, NUM_STARS_IN_ROUTE - star_count - remaining_star_count)
+
+        if num_other_stars >= len(nums_upper_level_stars_among_fastest):
+            continue
+
+        for num_upper_level_stars, time in zip(nums_upper_level_stars, times):
+            if num_upper_level_stars > max_num_remaining_upper_level_stars:
+                break
+
+            num_other_upper_level_stars = min(
+                max_num_remaining_upper_level_stars - num_upper_level_stars,
+                nums_upper_level_stars_among_fastest[num_other_stars],
+            )
+            num_other_non_upper_level_stars = (
+                num_other_stars - num_other_upper_level_stars
+            )
+
+            if num_other_non_upper_level_stars < len(non_upper_level_times):
+                best_remaining_time = min(
+                    best_remaining_time,
+                    time
+                    + upper_level_times[num_other_upper_level_stars]
+                    + non_upper_level_times[num_other_non_upper_level_stars],
+                )
+
+    return total_time + best_remaining_time
 
 
 def get_valid_special_star_partitions(
     adjacency_list_dict: dict[str, list[str]],
     base_star_alts_dict: dict[str, str],
-    eligible_stars: set[str],
-) -> list[tuple[set[str], set[str]]]:
-    """Return a list of special star IDs partitioned into two disjoint sets.
+    star_bit_dict: dict[str, int],
+    prune_partial_partition: Callable[[int, int, int], bool] | None = None,
+    max_num_base_special_stars: int | None = None,
+    partial_partition: tuple[int, int, int] | None = None,
+    promising_stars_bitmask: int | None = None,
+) -> Iterator[tuple[int, int]]:
+    """Yield special stars partitioned into two disjoint sets.
 
     The special stars are prerequisite stars and base stars which have
     100 coin star alternatives along with those 100 coin star
@@ -304,7 +1452,9 @@ def get_valid_special_star_partitions(
     stars to be excluded, and the partitioning is valid under the
     prerequisite relationships given by the adjacency lists and the
     mutual exclusivity relationships introduced by the 100 coin star
-    alternatives.
+    alternatives: a base star and its alternative, and the alternatives
+    which are candidates for the same 100 coin star, are mutually
+    exclusive.
 
     Since DDD1 needs to be in the route, we initialize the route
     including it (or its 100 coin star alternative, if that exists).
@@ -313,6 +1463,11 @@ def get_valid_special_star_partitions(
     also there's no reason why you would ever want DDD1 to have
     ancestors, so ancestors are not considered.
 
+    Partitions are yielded lazily as they are built up, so memory use
+    doesn't grow with the number of partitions, and a caller can change
+    what prune_partial_partition decides (e.g., by finding a faster
+    route) in between partitions.
+
     Args:
         adjacency_list_dict: A dictionary which has non-100 coin star
           IDs as keys and non-empty lists of star IDs the key star is a
@@ -320,93 +1475,135 @@ def get_valid_special_star_partitions(
         base_star_alts_dict: A dictionary with base star IDs as keys and
           100 coin star IDs that can be used to replace the base star as
           values.
-        eligible_stars: A set containing star IDs which are eligible to
-          be in the route.
-
-    Returns:
-        A list of two-tuples, each containing a partitioning of special
-        star IDs to be included (the set in the first element of the
-        tuple) and to be excluded (the set in the second element), where
-        the excluded set also includes non-special star IDs which need
-        to be excluded as a consequence of the partitioning scheme.
+        star_bit_dict: A dictionary with the star IDs eligible to be in
+          the route as keys and the single-bit integers representing
+          them as values.
+        prune_partial_partition: An optional function which takes the
+          number of base special stars partitioned and the included and
+          excluded bitmasks of a partial partition and returns whether
+          that partial partition, along with every partition that would
+          be built from it, should be skipped.
+        max_num_base_special_stars: If given, only this many base
+          special stars (in the order given by
+          get_ordered_base_special_stars) are partitioned, and the
+          yielded partitions are partial partitions.
+        partial_partition: If given, a three-tuple (star_idx, included,
+          excluded) containing a partial partition obtained using
+          max_num_base_special_stars=star_idx. Only partitions built
+          from this partial partition are yielded.
+        promising_stars_bitmask: If given, a bitmask of stars which are
+          likely to be in a fast route, used to yield partitions likely
+          to lead to fast routes first. For each base special star, the
+          faster of it and its 100 coin star alternative is included
+          first, and it's excluded first if neither of them is
+          promising.
+
+    Yields:
+        Two-tuples, each containing a partitioning of special stars into
+        a bitmask of stars to be included (the first element of the
+        tuple) and a bitmask of stars to be excluded (the second
+        element), where the excluded bitmask also includes non-special
+        stars which need to be excluded as a consequence of the
+        partitioning scheme.
     """
-    # Get an ordering of base star special star IDs which contain,
-    # first, a topologically sorted list of base star prerequisite star
-    # IDs, and then, after, the remaining base star IDs with 100 coin
-    # star alternatives
-    sorted_base_star_prerequisite_ids = get_topological_sort_of_prerequisites(
-        adjacency_list_dict
-    )
-    remaining_base_stars_with_alternatives = [
-        base_star
-        for base_star in base_star_alts_dict
-        if base_star not in adjacency_list_dict
-    ]
-    ordered_base_special_stars = (
-        sorted_base_star_prerequisite_ids + remaining_base_stars_with_alternatives
+    # Get an ordering of base star special star IDs
+    ordered_base_special_stars = get_ordered_base_special_stars(
+        adjacency_list_dict, base_star_alts_dict
     )
+    num_stars_to_partition = len(ordered_base_special_stars)
+
+    if max_num_base_special_stars is not None:
+        num_stars_to_partition = min(num_stars_to_partition, max_num_base_special_stars)
 
-    # Put valid partitions in here
-    valid_partitions: list[tuple[set[str], set[str]]] = []
+    # For each base special star, get the bitmask of stars to exclude
+    # when excluding it: itself, its 100 coin star alternative (if it
+    # exists), and its descendants
+    exclusion_bitmask_dict = {}
 
-    def _get_star_and_alternative_id_pairs(
-        base_star_id: str, excluded_star_id_set: set[str]
-    ) -> list[tuple[str, str | None]]:
-        """Returns pairings of a base star ID and its 100 coin alternative ID.
+    for base_star_id in ordered_base_special_stars:
+        excluded_star_ids = {base_star_id} | find_descendants(
+            base_star_id, adjacency_list_dict, base_star_alts_dict
+        )
+
+        if base_star_id in base_star_alts_dict:
+            excluded_star_ids.add(base_star_alts_dict[base_star_id])
+
+        exclusion_bitmask_dict[base_star_id] = build_star_bitmask(
+            excluded_star_ids, star_bit_dict
+        )
+
+    # For each base star with a 100 coin star alternative, get the
+    # bitmask of the other candidates for the same 100 coin star, which
+    # are excluded when including the alternative
+    other_candidates_bitmask_dict = {}
+
+    for base_star_ids in get_100_coin_star_candidate_groups(
+        base_star_alts_dict
+    ).values():
+        for base_star_id in base_star_ids:
+            other_candidates_bitmask_dict[base_star_id] = build_star_bitmask(
+                (
+                    base_star_alts_dict[other_base_star_id]
+                    for other_base_star_id in base_star_ids
+                    if other_base_star_id != base_star_id
+                ),
+                star_bit_dict,
+            )
+
+    def _get_star_and_alternative_bit_pairs(
+        base_star_id: str, excluded_bitmask: int
+    ) -> list[tuple[int, int]]:
+        """Returns pairings of a base star's bit and its 100 coin alternative's bit.
 
         The idea here is that we want to iterative over tuples, given a
-        base star, containing first the base star ID and, second, the
-        100 coin star alternative ID; and also the other way around. The
-        first element of each two-tuple is always an eligible star. If a
-        star does not have an eligible alternative but is itself
-        eligible, the alternative ID is None and the output contains a
-        single pair (star, alternative). If neither the base star nor
-        the 100 coin alternative are eligible, the output is an empty
-        list.
+        base star, containing first the base star's bit and, second, the
+        100 coin star alternative's bit; and also the other way around.
+        The first element of each two-tuple is always the bit of an
+        eligible star. If a star does not have an eligible alternative
+        but is itself eligible, the alternative's bit is 0 and the
+        output contains a single pair (star, alternative). If neither
+        the base star nor the 100 coin alternative are eligible, the
+        output is an empty list. When the first element is the 100 coin
+        alternative's bit, the second element also has the bits of the
+        other candidates for the same 100 coin star set, since they're
+        excluded along with the base star.
 
         Args:
             base_star_id: The base star ID to get pairings for.
-            excluded_star_id_set: A set of excluded star IDs.
+            excluded_bitmask: A bitmask of excluded stars.
 
         Returns:
-            A list of tuples containing base star ID and 100 coin
-            alternative ID pairings subject to their existence and
+            A list of tuples containing base star and 100 coin
+            alternative bit pairings subject to their existence and
             eligibility.
         """
-        # Get the 100 coin alternative ID (or set it to None if it
-        # doesn't exist or isn't eligible)
-        if (
-            base_star_id in base_star_alts_dict
-            and base_star_alts_dict[base_star_id] in eligible_stars
-            and base_star_alts_dict[base_star_id] not in excluded_star_id_set
-        ):
-            hundred_coin_alternative_star_id = base_star_alts_dict[base_star_id]
-        else:
-            hundred_coin_alternative_star_id = None
-
-        # Replace the base star ID with None if it isn't eligible
-        if base_star_id not in eligible_stars or base_star_id in excluded_star_id_set:
-            base_star_id = None
+        # Get the bits of the base star and its 100 coin alternative
+        # (or set them to 0 if they don't exist or aren't eligible)
+        base_star_bit = star_bit_dict.get(base_star_id, 0) & ~excluded_bitmask
+        hundred_coin_alternative_star_bit = (
+            star_bit_dict.get(base_star_alts_dict.get(base_star_id), 0)
+            & ~excluded_bitmask
+        )
 
         # Build the output
         pairs = []
 
-        for main_id, alternative_id in itertools.permutations(
-            (base_star_id, hundred_coin_alternative_star_id)
+        for main_bit, alternative_bit in itertools.permutations(
+            (base_star_bit, hundred_coin_alternative_star_bit)
         ):
-            if main_id is not None:
-                pairs.append((main_id, alternative_id))
+            if main_bit:
+                if main_bit == hundred_coin_alternative_star_bit:
+                    alternative_bit |= other_candidates_bitmask_dict[base_star_id]
+
+                pairs.append((main_bit, alternative_bit))
 
         return pairs
 
     def _generate_valid_partitions_recursive(
-        star_idx: int, included: set[str], excluded: set[str]
-    ) -> None:
+        star_idx: int, included: int, excluded: int
+    ) -> Iterator[tuple[int, int]]:
         """Recursively generate all valid partitions.
 
-        This adds partitions to the valid_partitions list in the outer
-        function.
-
         This algorithm works by going through the base special stars in
         the order prescribed in the outer function. For each base
         special star, we try including it (if possible), including a 100
@@ -419,22 +1616,29 @@ def get_valid_special_star_partitions(
         base special star, we ensure that all descendents of that star
         are also excluded.
 
-        Note that we're being careful in this function to ensure that
-        each function call gets new copies of the included and excluded
-        sets.
-
         Args:
             star_idx: The index of the ordered_base_special_stars list
               we are currently processing.
-            included: A set containing star IDs which are included in
-              the partition.
-            excluded: A set containing star IDs which are excluded in
-              the partition.
+            included: A bitmask of the stars which are included in the
+              partition.
+            excluded: A bitmask of the stars which are excluded in the
+              partition.
+
+        Yields:
+            Two-tuples containing the included and excluded bitmasks of
+            valid partitions.
         """
-        # Base case: processed all special stars. Add the partitions to
-        # the valid partitions list.
-        if star_idx >= len(ordered_base_special_stars):
-            valid_partitions.append((included, excluded))
+        # Skip this partial partition if nothing built from it is worth
+        # considering
+        if prune_partial_partition is not None and prune_partial_partition(
+            star_idx, included, excluded
+        ):
+            return
+
+        # Base case: processed all special stars we're partitioning.
+        # Yield the partition.
+        if star_idx >= num_stars_to_partition:
+            yield (included, excluded)
 
             return
 
@@ -445,55 +1649,62 @@ def get_valid_special_star_partitions(
         # prerequisite index: it or it's 100 coin alternative are
         # already included when we started the recursion.
         if current_star_id == DataKeys.STAR_DDD1_ID:
-            _generate_valid_partitions_recursive(star_idx + 1, included, excluded)
+            yield from _generate_valid_partitions_recursive(
+                star_idx + 1, included, excluded
+            )
+
+            return
 
         # Try including the current base star (and excluding its 100
         # coin star alterative if it exists); and do the other way
         # around.
-        for included_star_id, excluded_star_id in _get_star_and_alternative_id_pairs(
-            current_star_id, excluded
-        ):
-            # Add current star to included set
-            next_included = included | {included_star_id}
-
-            # Add a possible mutually exclusive star the the excluded
-            # set
-            next_excluded = excluded.copy()
-
-            if excluded_star_id is not None:
-                next_excluded.update({excluded_star_id})
-
-            _generate_valid_partitions_recursive(
-                star_idx + 1, next_included, next_excluded
+        bit_pairs = _get_star_and_alternative_bit_pairs(current_star_id, excluded)
+        exclude_first = False
+
+        if promising_stars_bitmask is not None:
+            # Bits are in order of increasing time, so sorting puts the
+            # faster star first
+            bit_pairs.sort()
+            exclude_first = not any(
+                included_bit & promising_stars_bitmask for included_bit, _ in bit_pairs
             )
 
+        branches = [
+            (included | included_bit, excluded | excluded_bit)
+            for included_bit, excluded_bit in bit_pairs
+        ]
+
         # Try excluding the current base star and its 100 coin star
         # alternative (if it exists). Also exclude any descendants.
-        next_excluded = (
-            excluded
-            | {current_star_id}
-            | find_descendants(
-                current_star_id, adjacency_list_dict, base_star_alts_dict
-            )
+        exclusion_branch = (
+            included,
+            excluded | exclusion_bitmask_dict[current_star_id],
         )
 
-        if current_star_id in base_star_alts_dict:
-            next_excluded.update({base_star_alts_dict[current_star_id]})
+        if exclude_first:
+            branches.insert(0, exclusion_branch)
+        else:
+            branches.append(exclusion_branch)
 
-        _generate_valid_partitions_recursive(
-            star_idx + 1, included.copy(), next_excluded
-        )
+        for branch_included, branch_excluded in branches:
+            yield from _generate_valid_partitions_recursive(
+                star_idx + 1, branch_included, branch_excluded
+            )
+
+    # Generate valid partitions built from the given partial partition
+    if partial_partition is not None:
+        yield from _generate_valid_partitions_recursive(*partial_partition)
 
-    # Generate and return valid partitions, initializing each partition
-    # with either DDD1 or its 100 coin star alternative
-    for included_star_id, excluded_star_id in _get_star_and_alternative_id_pairs(
+        return
+
+    # Generate valid partitions, initializing each partition with either
+    # DDD1 or its 100 coin star alternative
+    for included_bit, excluded_bit in _get_star_and_alternative_bit_pairs(
         base_star_id=DataKeys.STAR_DDD1_ID,
-        excluded_star_id_set=set(),
+        excluded_bitmask=0,
     ):
-        _generate_valid_partitions_recursive(
+        yield from _generate_valid_partitions_recursive(
             star_idx=0,
-            included=set([included_star_id]),
-            excluded=set([] if excluded_star_id is None else [excluded_star_id]),
+            included=included_bit,
+            excluded=excluded_bit,
         )
-
-    return valid_partitions
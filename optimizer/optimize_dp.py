@@ -0,0 +1,441 @@
+"""Contains a dynamic programming engine to find an optimal 70 star route.
+
+This is an alternative to the partition search in the optimize module.
+Rather than enumerating partitions of special stars, we make a single
+pass over all stars in order of decreasing star count requirement,
+deciding for each star whether it's in the route.
+
+The pass works because of the following observation. Suppose stars in a
+route are collected in order of increasing star count requirement. Then
+a star with requirement r can be collected exactly when the stars
+collected before it count for at least r stars. Since the route has 70
+stars in total, this is the same as the stars collected *after* it—the
+stars we've already decided on in the pass—counting for at most
+70 - r - (the star's own count) stars. So whether a star can be added
+only depends on how many stars we've already added, not which ones.
+
+Each state of the pass is a three-tuple containing (1) the number of
+stars added so far; (2) the number of upper level stars added so far
+(only tracked while upper level stars remain to be decided on, since
+after that it can't matter); and (3) a bitmask of prerequisite stars
+that must be added because a star depending on them was added. Stars
+which depend on a prerequisite have a star count requirement at least
+as high as the prerequisite's, and ties are broken so that dependants
+come first, so each prerequisite is decided on after all of its
+dependants. A prerequisite's bit is only "live" in between, which keeps
+the number of states small when the prerequisite relationships are
+mostly local to courses. A 100 coin star with several candidates (see
+get_100_coin_star_candidates in the util module) similarly gets a bit
+which is set once one of its candidates has been added, so that no
+other candidate can be, and which is only live until the last of its
+candidates has been decided on.
+"""
+
+import functools
+import logging
+import math
+from .constants import DataKeys, NUM_STARS_IN_ROUTE, UPPER_LEVEL_LOCATIONS
+from .exceptions import NoValidRoutePossible
+from .optimize_helpers import get_100_coin_star_candidate_groups
+from . import util
+
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+
+def get_optimal_route_dp(
+    star_time_tuples: list[tuple[float, str]],
+    max_num_upper_level_stars: int,
+    adjacency_list_dict: dict[str, list[str]],
+    base_star_alts_dict: dict[str, str],
+    star_locations_dict: dict[str, str],
+    num_stars_required_dict: dict[str, int],
+) -> tuple[set[str], float]:
+    """Find star IDs which form an optimal route using dynamic programming.
+
+    The arguments and output are the same as for the get_optimal_route
+    function in the optimize module.
+
+    Args:
+        star_time_tuples: A list of tuples (time, star_id) where
+          star_ids are the star IDs eligible for the optimal route and
+          time is the time a star takes.
+        max_num_upper_level_stars: The maximum number of stars from the
+          upper levels (upstairs and tippy) that can be added to the
+          route.
+        adjacency_list_dict: A dictionary which has non-100 coin star
+          IDs as keys and non-empty lists of star IDs the key star is a
+          prerequisite for as values.
+        base_star_alts_dict: A dictionary with base star IDs as keys and
+          100 coin star IDs that can be used to replace the base star as
+          values.
+        star_locations_dict: A dictionary which has star IDs as keys and
+          their locations as values.
+        num_stars_required_dict: A dictionary which has star IDs as keys
+          and the star count they require as values.
+
+    Returns:
+        A two-tuple containing (1) the set containing the star IDs which
+        are in the optimal route that was found and (2) the time an
+        optimal route takes.
+
+    Raises:
+        NoValidRoutePossible: If we were unable to form any route due to
+          insufficient time data.
+    """
+    routes_dict = get_optimal_routes_by_num_upper_level_stars(
+        star_time_tuples,
+        max_num_upper_level_stars,
+        adjacency_list_dict,
+        base_star_alts_dict,
+        star_locations_dict,
+        num_stars_required_dict,
+    )
+
+    if not routes_dict:
+        raise NoValidRoutePossible(
+            f"Unable to form any {NUM_STARS_IN_ROUTE} star route due "
+            "to insufficient eligible stars."
+        )
+
+    return min(routes_dict.values(), key=lambda route: route[1])
+
+
+def get_optimal_routes_for_all_upper_level_limits(
+    star_time_tuples: list[tuple[float, str]],
+    adjacency_list_dict: dict[str, list[str]],
+    base_star_alts_dict: dict[str, str],
+    star_locations_dict: dict[str, str],
+    num_stars_required_dict: dict[str, int],
+) -> list[tuple[set[str], float] | None]:
+    """Find optimal routes for every limit on upper level stars at once.
+
+    This makes a single pass which keeps track of the number of upper
+    level stars throughout, rather than a pass for each limit.
+
+    Args:
+        star_time_tuples: A list of tuples (time, star_id) where
+          star_ids are the star IDs eligible for the optimal route and
+          time is the time a star takes.
+        adjacency_list_dict: A dictionary which has non-100 coin star
+          IDs as keys and non-empty lists of star IDs the key star is a
+          prerequisite for as values.
+        base_star_alts_dict: A dictionary with base star IDs as keys and
+          100 coin star IDs that can be used to replace the base star as
+          values.
+        star_locations_dict: A dictionary which has star IDs as keys and
+          their locations as values.
+        num_stars_required_dict: A dictionary which has star IDs as keys
+          and the star count they require as values.
+
+    Returns:
+        A list indexed by the maximum number of upper level stars, from
+        0 to 70, containing two-tuples of (1) the set containing the
+        star IDs which are in an optimal route and (2) the time that
+        route takes; or None where no route is possible.
+    """
+    routes_dict = get_optimal_routes_by_num_upper_level_stars(
+        star_time_tuples,
+        NUM_STARS_IN_ROUTE,
+        adjacency_list_dict,
+        base_star_alts_dict,
+        star_locations_dict,
+        num_stars_required_dict,
+        keep_num_upper_level_stars=True,
+    )
+
+    # The best route for a limit is the best route with at most that
+    # many upper level stars
+    routes: list[tuple[set[str], float] | None] = []
+    best_route = None
+
+    for num_upper_level_stars in range(NUM_STARS_IN_ROUTE + 1):
+        route = routes_dict.get(num_upper_level_stars)
+
+        if route is not None and (best_route is None or route[1] < best_route[1]):
+            best_route = route
+
+        routes.append(best_route)
+
+    return routes
+
+
+def get_optimal_routes_by_num_upper_level_stars(
+    star_time_tuples: list[tuple[float, str]],
+    max_num_upper_level_stars: int,
+    adjacency_list_dict: dict[str, list[str]],
+    base_star_alts_dict: dict[str, str],
+    star_locations_dict: dict[str, str],
+    num_stars_required_dict: dict[str, int],
+    keep_num_upper_level_stars: bool = False,
+) -> dict[int, tuple[set[str], float]]:
+    """Find optimal routes by making a pass over all stars.
+
+    See the module docstring for a description of the pass.
+
+    Args:
+        star_time_tuples: A list of tuples (time, star_id) where
+          star_ids are the star IDs eligible for the optimal route and
+          time is the time a star takes.
+        max_num_upper_level_stars: The maximum number of stars from the
+          upper levels (upstairs and tippy) that can be added to the
+          route.
+        adjacency_list_dict: A dictionary which has non-100 coin star
+          IDs as keys and non-empty lists of star IDs the key star is a
+          prerequisite for as values.
+        base_star_alts_dict: A dictionary with base star IDs as keys and
+          100 coin star IDs that can be used to replace the base star as
+          values.
+        star_locations_dict: A dictionary which has star IDs as keys and
+          their locations as values.
+        num_stars_required_dict: A dictionary which has star IDs as keys
+          and the star count they require as values.
+        keep_num_upper_level_stars: A flag to keep track of the number
+          of upper level stars for the whole pass, rather than only
+          while it can matter for the limit.
+
+    Returns:
+        A dictionary with numbers of upper level stars as keys and
+        two-tuples as values containing (1) the set containing the star
+        IDs which are in an optimal route with that many upper level
+        stars and (2) the time that route takes. Unless
+        keep_num_upper_level_stars is set, every route is under the key
+        0. The dictionary is empty if no route is possible.
+    """
+    star_times_dict = util.build_star_times_dict_from_star_time_tuples(star_time_tuples)
+    hundred_coin_star_ids = set(base_star_alts_dict.values())
+
+    # Group stars which are mutually exclusive (a base star and its 100
+    # coin star alternative) into a single decision, keyed by the base
+    # star ID. Prerequisites get a decision even if they have no times,
+    # so that their dependants can't be added.
+    base_star_ids_dict = {
+        hundred_coin_star_id: base_star_id
+        for base_star_id, hundred_coin_star_id in base_star_alts_dict.items()
+    }
+    decision_star_ids_dict: dict[str, list[str]] = {
+        prerequisite_id: [] for prerequisite_id in adjacency_list_dict
+    }
+
+    for star_id in star_times_dict:
+        decision_star_ids_dict.setdefault(
+            base_star_ids_dict.get(star_id, star_id), []
+        ).append(star_id)
+
+    # Assign each prerequisite a bit and find the bits of each star's
+    # direct prerequisites
+    prerequisite_bit_dict = {
+        prerequisite_id: 1 << idx
+        for idx, prerequisite_id in enumerate(adjacency_list_dict)
+    }
+    prerequisites_bitmask_dict: dict[str, int] = {}
+
+    for prerequisite_id, dependants in adjacency_list_dict.items():
+        for dependant in dependants:
+            prerequisites_bitmask_dict[dependant] = (
+                prerequisites_bitmask_dict.get(dependant, 0)
+                | prerequisite_bit_dict[prerequisite_id]
+            )
+
+    @functools.cache
+    def _find_depth(star_id: str) -> int:
+        """Find the length of the longest prerequisite chain ending at a star.
+
+        Args:
+            star_id: The ID of the star we're processing.
+
+        Returns:
+            0 if the star has no prerequisites; otherwise one more than
+            the greatest depth of any of its prerequisites.
+        """
+        return max(
+            (
+                _find_depth(prerequisite_id) + 1
+                for prerequisite_id, dependants in adjacency_list_dict.items()
+                if star_id in dependants
+            ),
+            default=0,
+        )
+
+    # Order the decisions by decreasing star count requirement, with
+    # dependants before their prerequisites
+    ordered_base_star_ids = sorted(
+        decision_star_ids_dict,
+        key=lambda star_id: (
+            -num_stars_required_dict[star_id],
+            -_find_depth(star_id),
+            star_id,
+        ),
+    )
+
+    # Assign each 100 coin star with several candidates a bit after the
+    # prerequisites' bits, and find the last decision on one of its
+    # candidates, after which the bit can be dropped
+    candidate_group_bit_dict: dict[str, int] = {}
+    last_candidate_base_star_ids = set()
+    candidate_group_bit = 1 << len(prerequisite_bit_dict)
+    decision_indices_dict = {
+        base_star_id: idx for idx, base_star_id in enumerate(ordered_base_star_ids)
+    }
+
+    for base_star_ids in get_100_coin_star_candidate_groups(
+        base_star_alts_dict
+    ).values():
+        base_star_ids = [
+            base_star_id
+            for base_star_id in base_star_ids
+            if base_star_alts_dict[base_star_id] in star_times_dict
+        ]
+
+        if len(base_star_ids) < 2:
+            continue
+
+        for base_star_id in base_star_ids:
+            candidate_group_bit_dict[base_star_id] = candidate_group_bit
+
+        last_candidate_base_star_ids.add(
+            max(base_star_ids, key=decision_indices_dict.__getitem__)
+        )
+        candidate_group_bit <<= 1
+
+    # Only track the number of upper level stars while it can matter
+    if keep_num_upper_level_stars:
+        last_upper_level_idx = len(ordered_base_star_ids)
+    elif max_num_upper_level_stars < NUM_STARS_IN_ROUTE:
+        last_upper_level_idx = max(
+            (
+                idx
+                for idx, base_star_id in enumerate(ordered_base_star_ids)
+                if star_locations_dict[base_star_id] in UPPER_LEVEL_LOCATIONS
+            ),
+            default=-1,
+        )
+    else:
+        last_upper_level_idx = -1
+
+    # Go through each decision. States map (star_count,
+    # num_upper_level_stars, required_prerequisites_bitmask) to the
+    # fastest time for that state, where the bitmask also holds the bits
+    # of the 100 coin stars with a candidate added. For each decision we
+    # also keep a dictionary mapping each new state to its previous state
+    # and the star ID added (or None), which we use to recover the route.
+    states: dict[tuple[int, int, int], float] = {(0, 0, 0): 0}
+    back_pointer_dicts: list[dict[tuple[int, int, int], tuple]] = []
+
+    for idx, base_star_id in enumerate(ordered_base_star_ids):
+        max_star_count = NUM_STARS_IN_ROUTE - num_stars_required_dict[base_star_id]
+        track_upper_level_stars = idx < last_upper_level_idx
+        is_upper_level = star_locations_dict[base_star_id] in UPPER_LEVEL_LOCATIONS
+        prerequisite_bit = prerequisite_bit_dict.get(base_star_id, 0)
+        prerequisites_bitmask = prerequisites_bitmask_dict.get(base_star_id, 0)
+        is_required = base_star_id == DataKeys.STAR_DDD1_ID
+        candidate_group_bit = candidate_group_bit_dict.get(base_star_id, 0)
+        dropped_bitmask = prerequisite_bit | (
+            candidate_group_bit if base_star_id in last_candidate_base_star_ids else 0
+        )
+
+        new_states: dict[tuple[int, int, int], float] = {}
+        back_pointer_dict: dict[tuple[int, int, int], tuple] = {}
+
+        for state, time in states.items():
+            star_count, num_upper_level_stars, required_bitmask = state
+            remaining_required_bitmask = required_bitmask & ~dropped_bitmask
+
+            # Gather tuples (new_state, new_time, star_id) for each
+            # choice we can make
+            transitions: list[tuple[tuple[int, int, int], float, str | None]] = []
+
+            # Leave the stars out (if we're allowed to)
+            if not (required_bitmask & prerequisite_bit or is_required):
+                transitions.append(
+                    (
+                        (
+                            star_count,
+                            num_upper_level_stars if track_upper_level_stars else 0,
+                            remaining_required_bitmask,
+                        ),
+                        time,
+                        None,
+                    )
+                )
+
+            # Add one of the stars (if we can)
+            for star_id in decision_star_ids_dict[base_star_id]:
+                is_100_coin = star_id in hundred_coin_star_ids
+                mult = 2 if is_100_coin else 1
+                new_star_count = star_count + mult
+
+                # Only one candidate for a 100 coin star can be added
+                if is_100_coin and required_bitmask & candidate_group_bit:
+                    continue
+
+                new_num_upper_level_stars = num_upper_level_stars + (
+                    mult if is_upper_level else 0
+                )
+
+                if (
+                    new_star_count > max_star_count
+                    or new_num_upper_level_stars > max_num_upper_level_stars
+                ):
+                    continue
+
+                transitions.append(
+                    (
+                        (
+                            new_star_count,
+                            (
+                                new_num_upper_level_stars
+                                if track_upper_level_stars
+                                else 0
+                            ),
+                            remaining_required_bitmask
+                            | prerequisites_bitmask
+                            | (
+                                candidate_group_bit & ~dropped_bitmask
+                                if is_100_coin
+                                else 0
+                            ),
+                        ),
+                        time + star_times_dict[star_id],
+                        star_id,
+                    )
+                )
+
+            # Keep the fastest way of reaching each new state
+            for new_state, new_time, star_id in transitions:
+                if new_time < new_states.get(new_state, math.inf):
+                    new_states[new_state] = new_time
+                    back_pointer_dict[new_state] = (state, star_id)
+
+        states = new_states
+        back_pointer_dicts.append(back_pointer_dict)
+
+    logger.info(
+        "Decided on %d stars; largest number of states was %d.",
+        len(ordered_base_star_ids),
+        max((len(d) for d in back_pointer_dicts), default=0),
+    )
+
+    # Walk back through the decisions from each state with the right
+    # number of stars to recover the routes
+    routes_dict = {}
+
+    for final_state, time in states.items():
+        star_count, num_upper_level_stars, required_bitmask = final_state
+
+        if star_count != NUM_STARS_IN_ROUTE or required_bitmask:
+            continue
+
+        route_star_ids_set = set()
+        state = final_state
+
+        for back_pointer_dict in reversed(back_pointer_dicts):
+            state, star_id = back_pointer_dict[state]
+
+            if star_id is not None:
+                route_star_ids_set.add(star_id)
+
+        routes_dict[num_upper_level_stars] = (route_star_ids_set, time)
+
+    return routes_dict
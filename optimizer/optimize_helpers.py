@@ -1,8 +1,10 @@
 """Contains useful functionality for the optimize module."""
 
 from collections import defaultdict, deque
+from collections.abc import Iterable, Iterator
 import functools
 import typing
+from . import util
 
 
 def get_topological_sort_of_prerequisites(
@@ -61,6 +63,134 @@ def get_topological_sort_of_prerequisites(
     return stack
 
 
+def get_100_coin_star_candidate_groups(
+    base_star_alts_dict: dict[str, str],
+) -> dict[str, list[str]]:
+    """Group 100 coin star alternatives by the 100 coin star they're for.
+
+    A course with several 100 coin star candidates has an alternative
+    for each candidate, and at most one of them can be in a route.
+
+    Args:
+        base_star_alts_dict: A dictionary with base star IDs as keys and
+          100 coin star IDs that can be used to replace the base star as
+          values.
+
+    Returns:
+        A dictionary with the IDs of 100 coin stars as listed in the
+        user's config as keys and lists of the base stars whose 100 coin
+        star alternatives are candidates for them as values.
+    """
+    candidate_groups_dict: dict[str, list[str]] = {}
+
+    for base_star_id, hundred_coin_star_id in base_star_alts_dict.items():
+        candidate_groups_dict.setdefault(
+            util.get_config_star_id(hundred_coin_star_id), []
+        ).append(base_star_id)
+
+    return candidate_groups_dict
+
+
+def get_special_star_components(
+    adjacency_list_dict: dict[str, list[str]],
+    base_star_alts_dict: dict[str, str],
+) -> list[list[str]]:
+    """Return base special star IDs grouped into independent components.
+
+    Two base special stars are in the same component if one is a
+    prerequisite of the other, possibly through other base special
+    stars, or if their 100 coin star alternatives are candidates for
+    the same 100 coin star. (100 coin star alternatives belong to the
+    component of the base star they replace.) Choices made for special
+    stars in one component never constrain the choices available in
+    another.
+
+    Args:
+        adjacency_list_dict: A dictionary which has non-100 coin star
+          IDs as keys and non-empty lists of star IDs the key star is a
+          prerequisite for as values.
+        base_star_alts_dict: A dictionary with base star IDs as keys and
+          100 coin star IDs that can be used to replace the base star as
+          values.
+
+    Returns:
+        A list of components, each of which is a list of base special
+        star IDs containing, first, a topologically sorted list of base
+        star prerequisite star IDs, and then, after, the remaining base
+        star IDs with 100 coin star alternatives.
+    """
+    sorted_base_star_prerequisite_ids = get_topological_sort_of_prerequisites(
+        adjacency_list_dict
+    )
+    remaining_base_stars_with_alternatives = [
+        base_star
+        for base_star in base_star_alts_dict
+        if base_star not in adjacency_list_dict
+    ]
+    base_special_star_ids = (
+        sorted_base_star_prerequisite_ids + remaining_base_stars_with_alternatives
+    )
+
+    # Join up components with a disjoint-set forest
+    parent_dict = {star_id: star_id for star_id in base_special_star_ids}
+
+    def _find_root(star_id: str) -> str:
+        """Find the root of the tree a star is in, compressing the path."""
+        while parent_dict[star_id] != star_id:
+            parent_dict[star_id] = parent_dict[parent_dict[star_id]]
+            star_id = parent_dict[star_id]
+
+        return star_id
+
+    for prerequisite, dependants in adjacency_list_dict.items():
+        for dependant in dependants:
+            if dependant in parent_dict:
+                parent_dict[_find_root(dependant)] = _find_root(prerequisite)
+
+    for base_star_ids in get_100_coin_star_candidate_groups(
+        base_star_alts_dict
+    ).values():
+        for base_star_id in base_star_ids[1:]:
+            parent_dict[_find_root(base_star_id)] = _find_root(base_star_ids[0])
+
+    # Group the stars by component, keeping their relative order
+    components_dict: dict[str, list[str]] = {}
+
+    for star_id in base_special_star_ids:
+        components_dict.setdefault(_find_root(star_id), []).append(star_id)
+
+    return list(components_dict.values())
+
+
+def get_ordered_base_special_stars(
+    adjacency_list_dict: dict[str, list[str]],
+    base_star_alts_dict: dict[str, str],
+) -> list[str]:
+    """Return base special star IDs in the order they're partitioned in.
+
+    The ordering contains the components given by
+    get_special_star_components one after the other.
+
+    Args:
+        adjacency_list_dict: A dictionary which has non-100 coin star
+          IDs as keys and non-empty lists of star IDs the key star is a
+          prerequisite for as values.
+        base_star_alts_dict: A dictionary with base star IDs as keys and
+          100 coin star IDs that can be used to replace the base star as
+          values.
+
+    Returns:
+        A list of base special star IDs.
+    """
+    return [
+        star_id
+        for component in get_special_star_components(
+            adjacency_list_dict, base_star_alts_dict
+        )
+        for star_id in component
+    ]
+
+
 def find_descendants(
     star_id: str,
     adjacency_list_dict: dict[str, list[str]],
@@ -114,3 +244,40 @@ def find_descendants(
         return frozenset(descendants)
 
     return _find_descendants(star_id)
+
+
+def build_star_bitmask(star_ids: Iterable[str], star_bit_dict: dict[str, int]) -> int:
+    """Build a bitmask representing a set of star IDs.
+
+    Args:
+        star_ids: An iterable of star IDs. Star IDs without a bit are
+          ignored.
+        star_bit_dict: A dictionary with star IDs as keys and the
+          single-bit integers representing them as values.
+
+    Returns:
+        An integer with the bits of each star ID set.
+    """
+    bitmask = 0
+
+    for star_id in star_ids:
+        bitmask |= star_bit_dict.get(star_id, 0)
+
+    return bitmask
+
+
+def get_bitmask_indices(bitmask: int) -> Iterator[int]:
+    """Yield the indices of the set bits of a bitmask in increasing order.
+
+    Args:
+        bitmask: A non-negative integer.
+
+    Yields:
+        The index of each set bit, starting from the least significant.
+    """
+    while bitmask:
+        lowest_bit = bitmask & -bitmask
+
+        yield lowest_bit.bit_length() - 1
+
+        bitmask ^= lowest_bit
@@ -0,0 +1,147 @@
+"""Contains functions to find routes trading mean time against variance.
+
+A route's mean time and the variance of its time (assuming star times
+are independent) are both sums over its stars, so minimizing a weighted
+sum of the two is an ordinary route optimization with each star costing
+a weighted sum of its mean and variance. Every such route is on the
+Pareto frontier of mean time against variance, and we find all of them
+(the frontier's corners) with a parametric sweep: between two frontier
+routes, we minimize with the weights that make both routes cost the
+same, and any route found which costs less is a new frontier route
+between them. Only a few optimizations are needed per frontier route,
+and each starts from the previous route in a single optimizer session
+(see the session module), which reuses the special star partition
+enumeration.
+"""
+
+import logging
+from .constants import FRONTIER_LOWEST_VARIANCE_MEAN_WEIGHT
+from .problem import Problem
+from .risk import get_star_time_statistics
+from .session import OptimizerSession
+
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+
+def get_mean_variance_frontier(
+    problem: Problem,
+    excluded_course_ids: set[str],
+    excluded_star_ids: set[str],
+    max_num_upper_level_stars: int,
+    prune_partitions: bool = True,
+    num_workers: int = 1,
+) -> list[tuple[set[str], float, float]]:
+    """Find the routes on the frontier of mean time against variance.
+
+    Only routes which minimize some weighted sum of the mean time and
+    the variance are found, which are the corners of the frontier.
+
+    Args:
+        problem: The problem to find routes for.
+        excluded_course_ids: A set containing course IDs to exclude.
+        excluded_star_ids: A set containing star IDs to exclude.
+        max_num_upper_level_stars: The maximum number of upper level
+          stars allowed in the routes.
+        prune_partitions: Whether to skip special star partitions which
+          can't lead to a faster route.
+        num_workers: The number of processes to search with.
+
+    Returns:
+        A list of three-tuples containing (1) the set of star IDs in a
+        route, (2) the route's mean time, and (3) the variance of the
+        route's time, in order of increasing mean time (and decreasing
+        variance).
+
+    Raises:
+        NoValidRoutePossible: If we were unable to form any route due to
+          insufficient time data.
+    """
+    star_means, star_standard_deviations = get_star_time_statistics(
+        problem.star_time_samples
+    )
+    star_time_tuples = problem.get_eligible_star_time_tuples(
+        excluded_course_ids=excluded_course_ids,
+        excluded_star_ids=excluded_star_ids,
+    )
+    eligible_star_indices = {
+        star_id: problem.star_indices[star_id] for _, star_id in star_time_tuples
+    }
+
+    session = OptimizerSession(
+        star_time_tuples=star_time_tuples,
+        max_num_upper_level_stars=max_num_upper_level_stars,
+        prune_partitions=prune_partitions,
+        num_workers=num_workers,
+        **problem.get_structure_kwargs(),
+    )
+
+    def _find_route(
+        mean_weight: float, variance_weight: float
+    ) -> tuple[set[str], float, float]:
+        """Find the route minimizing a weighted sum of mean and variance.
+
+        Args:
+            mean_weight: The weight of the mean time.
+            variance_weight: The weight of the variance.
+
+        Returns:
+            A three-tuple containing the set of star IDs in the route,
+            the route's mean time, and the variance of its time.
+        """
+        route_star_ids, _ = session.update_star_times(
+            {
+                star_id: float(
+                    mean_weight * star_means[star_index]
+                    + variance_weight * star_standard_deviations[star_index] ** 2
+                )
+                for star_id, star_index in eligible_star_indices.items()
+            }
+        )
+
+        route_star_indices = [
+            eligible_star_indices[star_id] for star_id in route_star_ids
+        ]
+
+        return (
+            route_star_ids,
+            float(star_means[route_star_indices].sum()),
+            float((star_standard_deviations[route_star_indices] ** 2).sum()),
+        )
+
+    # Start with the fastest and the lowest variance routes, and then
+    # look for frontier routes between each pair of adjacent routes
+    fastest_route = _find_route(1, 0)
+    lowest_variance_route = _find_route(FRONTIER_LOWEST_VARIANCE_MEAN_WEIGHT, 1)
+
+    frontier_routes = [fastest_route]
+    route_pairs = [(fastest_route, lowest_variance_route)]
+
+    if lowest_variance_route[1:] != fastest_route[1:]:
+        frontier_routes.append(lowest_variance_route)
+    else:
+        route_pairs = []
+
+    while route_pairs:
+        faster_route, steadier_route = route_pairs.pop()
+
+        # Weight the mean and variance so that both routes cost the same
+        mean_weight = faster_route[2] - steadier_route[2]
+        variance_weight = steadier_route[1] - faster_route[1]
+
+        if mean_weight <= 0 or variance_weight <= 0:
+            continue
+
+        route = _find_route(mean_weight, variance_weight)
+
+        route_cost = mean_weight * route[1] + variance_weight * route[2]
+        pair_cost = mean_weight * faster_route[1] + variance_weight * faster_route[2]
+
+        if route_cost < pair_cost - 1e-9 * abs(pair_cost):
+            frontier_routes.append(route)
+            route_pairs += [(faster_route, route), (route, steadier_route)]
+
+    logger.info("Found %d routes on the frontier.", len(frontier_routes))
+
+    return sorted(frontier_routes, key=lambda route: route[1])
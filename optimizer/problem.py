@@ -0,0 +1,461 @@
+"""Contains a compiled description of a route optimization problem."""
+
+import copy
+import logging
+from .constants import ALL_LOCATIONS, ConfigKeys, DataKeys, Objectives
+from .exceptions import InvalidExcludedStarIds
+from . import util
+
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+
+def get_structure_key(config_data: dict[str, dict]) -> str:
+    """Get a key identifying the structure of the problem for a config.
+
+    Configs with the same key have the same prerequisites and 100 coin
+    star pairings, so they only differ by their star times.
+
+    Args:
+        config_data: The user's configuration data.
+
+    Returns:
+        A hash of the config's prerequisites and 100 coin star pairings.
+    """
+    return util.get_canonical_hash(
+        {
+            "prerequisites": {
+                star_id: sorted(prerequisites)
+                for star_id, prerequisites in config_data[
+                    ConfigKeys.PREREQUISITES_TABLE
+                ].items()
+            },
+            "hundred_coin_combined_with": {
+                star_id: star_data[ConfigKeys.HUNDRED_COIN_COMBINED_WITH]
+                for star_id, star_data in util.get_100_coin_star_candidates(
+                    config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE]
+                ).items()
+            },
+        }
+    )
+
+
+class Problem:
+    """Everything needed to find and show routes for a user's config.
+
+    The course data is processed once: star count requirements are
+    adjusted according to prerequisite relationships and the user's 100
+    coin stars are added in. Each star in the processed course data is
+    then given a dense integer index (in course order), and its
+    properties are kept in parallel lists indexed by it, so that later
+    stages (filtering, optimization, and HTML output) look properties up
+    rather than re-deriving them from the course data.
+
+    Attributes:
+        course_data: Course data with star count requirements adjusted
+          according to prerequisite relationships and with 100 coin
+          stars added in.
+        course_ids: A list of course IDs indexed by course index.
+        star_ids: A list of star IDs indexed by star index.
+        star_indices: A dictionary containing star IDs as keys and star
+          indices as values.
+        star_times: A list indexed by star index of the average time of
+          each star, or None for stars without times.
+        star_time_samples: A list indexed by star index of the times
+          recorded for each star (empty for stars without times, and
+          only the generated time for fake times).
+        star_location_codes: A list indexed by star index of the index
+          of each star's location in ALL_LOCATIONS.
+        star_course_indices: A list indexed by star index of the course
+          index of each star's course.
+        star_num_stars_required: A list indexed by star index of the
+          star count each star requires.
+        star_is_100_coin: A list indexed by star index of whether each
+          star is a 100 coin star.
+        adjacency_list_dict: A dictionary which has star IDs as keys and
+          lists of star IDs the key star is a prerequisite for as
+          values.
+        base_star_alts_dict: A dictionary with base star IDs as keys and
+          100 coin star IDs that can be used to replace the base star
+          as values.
+    """
+
+    def __init__(
+        self, config_data: dict[str, dict], generate_fake_times: bool = False
+    ) -> None:
+        """Compile the problem.
+
+        Args:
+            config_data: The user's configuration data.
+            generate_fake_times: A flag for the program to generate fake
+              times for each star.
+        """
+        prerequisites_dict = config_data[ConfigKeys.PREREQUISITES_TABLE]
+        config_100_coin_times = config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE]
+
+        self.course_data = util.adjust_and_augment_course_data(
+            prerequisites_dict=prerequisites_dict,
+            config_100_coin_times=config_100_coin_times,
+        )
+        self.adjacency_list_dict = util.get_adjacency_list_dict_from_prerequisites_dict(
+            prerequisites_dict=prerequisites_dict
+        )
+        self.base_star_alts_dict = util.build_base_star_alts_dict(
+            config_100_coin_times=config_100_coin_times
+        )
+
+        hundred_coin_star_ids = set(self.base_star_alts_dict.values())
+
+        # Index courses and stars
+        location_codes_dict = {
+            location: location_code
+            for location_code, location in enumerate(ALL_LOCATIONS)
+        }
+
+        self.course_ids: list[str] = []
+        self.star_ids: list[str] = []
+        self.star_location_codes: list[int] = []
+        self.star_course_indices: list[int] = []
+        self.star_num_stars_required: list[int] = []
+        self.star_is_100_coin: list[bool] = []
+
+        for course_index, course in enumerate(self.course_data):
+            self.course_ids.append(course[DataKeys.COURSE_ID])
+
+            for star in course[DataKeys.COURSE_STARS]:
+                self.star_ids.append(star[DataKeys.STAR_ID])
+                self.star_location_codes.append(
+                    location_codes_dict[star[DataKeys.STAR_LOCATION]]
+                )
+                self.star_course_indices.append(course_index)
+                self.star_num_stars_required.append(
+                    star[DataKeys.STAR_NUM_STARS_REQUIRED]
+                )
+                self.star_is_100_coin.append(
+                    star[DataKeys.STAR_ID] in hundred_coin_star_ids
+                )
+
+        self.star_indices = {
+            star_id: star_index for star_index, star_id in enumerate(self.star_ids)
+        }
+
+        self.star_times, self.star_time_samples = self._get_star_times(
+            config_data, generate_fake_times
+        )
+
+    def with_config_times(
+        self, config_data: dict[str, dict], generate_fake_times: bool = False
+    ) -> "Problem":
+        """Get a problem with this problem's structure and a config's times.
+
+        Everything but the star times is shared with this problem, which
+        is much faster than compiling a new problem.
+
+        Args:
+            config_data: A user's configuration data with the same
+              prerequisites and 100 coin star pairings as the config
+              this problem was compiled from (see get_structure_key).
+            generate_fake_times: A flag for the program to generate fake
+              times for each star.
+
+        Returns:
+            A new problem.
+        """
+        return self.with_star_times(
+            *self._get_star_times(config_data, generate_fake_times)
+        )
+
+    def with_star_times(
+        self,
+        star_times: list[float | None],
+        star_time_samples: list[list[float]],
+    ) -> "Problem":
+        """Get a problem with this problem's structure and given star times.
+
+        Args:
+            star_times: A list indexed by star index of the average time
+              of each star, or None for stars without times.
+            star_time_samples: A list indexed by star index of the times
+              recorded for each star.
+
+        Returns:
+            A new problem.
+        """
+        problem = copy.copy(self)
+        problem.star_times = star_times
+        problem.star_time_samples = star_time_samples
+
+        return problem
+
+    def with_objective(self, objective: tuple[str, float]) -> "Problem":
+        """Get a problem whose star times are costs under an objective.
+
+        Optimizing the new problem minimizes the objective (see the risk
+        module). The recorded times are kept, so the average times can
+        still be taken from this problem.
+
+        Args:
+            objective: A two-tuple containing an objective kind and its
+              parameter (see Objectives in the constants module).
+
+        Returns:
+            A new problem, or this problem if the objective is the mean.
+        """
+        if objective[0] == Objectives.MEAN:
+            return self
+
+        # Import this here since NumPy is slow to import and only needed
+        # here
+        from .risk import get_objective_star_times
+
+        return self.with_star_times(
+            get_objective_star_times(
+                star_times=self.star_times,
+                star_time_samples=self.star_time_samples,
+                objective=objective,
+            ),
+            self.star_time_samples,
+        )
+
+    def _get_star_times(
+        self, config_data: dict[str, dict], generate_fake_times: bool
+    ) -> tuple[list[float | None], list[list[float]]]:
+        """Get the average and recorded times of each star from a config.
+
+        Args:
+            config_data: The user's configuration data.
+            generate_fake_times: A flag for the program to generate fake
+              times for each star.
+
+        Returns:
+            A two-tuple containing (1) a list indexed by star index of the
+            average time of each star, or None for stars without times,
+            and (2) a list indexed by star index of the times recorded
+            for each star. Fake times have only the generated time
+            recorded.
+        """
+        star_times_list_dict = util.get_star_times_list_dict(
+            config_times=config_data[ConfigKeys.TIMES_TABLE],
+            config_100_coin_times=config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE],
+        )
+
+        star_times: list[float | None] = [None] * len(self.star_ids)
+        star_time_samples: list[list[float]] = [[] for _ in self.star_ids]
+
+        for time, star_id in util.get_star_time_tuples(
+            star_times_list_dict=star_times_list_dict,
+            generate_fake_times=generate_fake_times,
+        ):
+            star_index = self.star_indices[star_id]
+
+            star_times[star_index] = time
+            star_time_samples[star_index] = (
+                [time] if generate_fake_times else star_times_list_dict[star_id]
+            )
+
+        return star_times, star_time_samples
+
+    def get_star_times_dict(self) -> dict[str, float]:
+        """Get the average time of each star with times.
+
+        Returns:
+            A dictionary containing star IDs as keys and average times
+            as values.
+        """
+        return {
+            star_id: time
+            for star_id, time in zip(self.star_ids, self.star_times)
+            if time is not None
+        }
+
+    def validate_excluded_star_ids(self, excluded_star_ids: set[str]) -> None:
+        """Check that excluding stars still leaves a route possible.
+
+        Args:
+            excluded_star_ids: A set containing star IDs to exclude.
+              Excluding a 100 coin star excludes each of its candidates.
+
+        Raises:
+            InvalidExcludedStarIds: If DDD1 and its 100 coin star
+              alternative have been excluded.
+        """
+        # Ensure at least one of the following is true:
+        #
+        # - DDD1 has a time and is not excluded
+        # - DDD_100 (or one of its candidates) is combined with DDD1 and
+        #   has a time and is not excluded
+        #
+        # Note that a validation check in the configuration module has
+        # already ensured that one of DDD1 or DDD_100 combined with DDD1
+        # has a time, so any error here is due to excluded star IDs.
+        star_times_dict = self.get_star_times_dict()
+
+        ddd1_okay = (
+            DataKeys.STAR_DDD1_ID in star_times_dict
+            and DataKeys.STAR_DDD1_ID not in excluded_star_ids
+        )
+
+        ddd1_alternative_id = self.base_star_alts_dict.get(DataKeys.STAR_DDD1_ID)
+
+        ddd_100_okay = (
+            ddd1_alternative_id in star_times_dict
+            and util.get_config_star_id(ddd1_alternative_id) == DataKeys.STAR_DDD_100_ID
+            and not {ddd1_alternative_id, DataKeys.STAR_DDD_100_ID} & excluded_star_ids
+        )
+
+        if not ddd1_okay and not ddd_100_okay:
+            raise InvalidExcludedStarIds(
+                f"Times exist for {DataKeys.STAR_DDD1_ID} (or its 100 coin"
+                " alternative) but all have been excluded."
+            )
+
+    def get_eligible_star_time_tuples(
+        self, excluded_course_ids: set[str], excluded_star_ids: set[str]
+    ) -> list[tuple[float, str]]:
+        """Get (time, star_id) tuples for the stars eligible for the route.
+
+        Args:
+            excluded_course_ids: A set containing course IDs to exclude.
+            excluded_star_ids: A set containing star IDs to exclude.
+              Excluding a 100 coin star excludes each of its candidates.
+
+        Returns:
+            A list of (time, star_id) tuples for stars which have times
+            and haven't been excluded.
+        """
+        excluded_course_indices = {
+            course_index
+            for course_index, course_id in enumerate(self.course_ids)
+            if course_id in excluded_course_ids
+        }
+
+        return [
+            (time, star_id)
+            for star_id, time, course_index in zip(
+                self.star_ids, self.star_times, self.star_course_indices
+            )
+            if time is not None
+            and course_index not in excluded_course_indices
+            and star_id not in excluded_star_ids
+            and util.get_config_star_id(star_id) not in excluded_star_ids
+        ]
+
+    def get_structure_kwargs(self) -> dict:
+        """Get the arguments describing the problem's structure.
+
+        Returns:
+            A dictionary containing the adjacency_list_dict,
+            base_star_alts_dict, star_locations_dict, and
+            num_stars_required_dict arguments of the functions in the
+            optimize and optimize_dp modules.
+        """
+        return {
+            "adjacency_list_dict": self.adjacency_list_dict,
+            "base_star_alts_dict": self.base_star_alts_dict,
+            "star_locations_dict": {
+                star_id: ALL_LOCATIONS[location_code]
+                for star_id, location_code in zip(
+                    self.star_ids, self.star_location_codes
+                )
+            },
+            "num_stars_required_dict": dict(
+                zip(self.star_ids, self.star_num_stars_required)
+            ),
+        }
+
+    def get_route_time(self, route_star_ids: set[str]) -> float:
+        """Get the sum of the star times of a route.
+
+        Args:
+            route_star_ids: A set containing the star IDs used for the
+              route, each of which must have a time.
+
+        Returns:
+            The number of seconds the route takes.
+        """
+        return sum(
+            self.star_times[self.star_indices[star_id]] for star_id in route_star_ids
+        )
+
+    def count_route_stars_per_location(
+        self, route_star_ids: set[str]
+    ) -> dict[str, int]:
+        """Count the stars in a route from each location.
+
+        100 coin stars count as two stars.
+
+        Args:
+            route_star_ids: A set containing the star IDs in a route.
+
+        Returns:
+            A dictionary with locations as keys and the number of stars
+            in the route from that location as values.
+        """
+        location_counts = [0] * len(ALL_LOCATIONS)
+
+        for star_id in route_star_ids:
+            star_index = self.star_indices[star_id]
+
+            location_counts[self.star_location_codes[star_index]] += (
+                2 if self.star_is_100_coin[star_index] else 1
+            )
+
+        return dict(zip(ALL_LOCATIONS, location_counts))
+
+    def count_route_stars_per_course(self, route_star_ids: set[str]) -> dict[str, int]:
+        """Count the stars in a route from each course.
+
+        100 coin stars count as two stars. Every course ID is included,
+        not just those of courses for which the user has times.
+
+        Args:
+            route_star_ids: A set containing the star IDs in a route.
+
+        Returns:
+            A dictionary with course IDs as keys and the number of stars
+            in the route from that course as values.
+        """
+        course_counts = [0] * len(self.course_ids)
+
+        for star_id in route_star_ids:
+            star_index = self.star_indices[star_id]
+
+            course_counts[self.star_course_indices[star_index]] += (
+                2 if self.star_is_100_coin[star_index] else 1
+            )
+
+        return dict(zip(self.course_ids, course_counts))
+
+    def get_route_json(self, route_star_ids: set[str]) -> dict:
+        """Get the stars of a route in the form used for JSON output.
+
+        100 coin star candidate IDs are only used within the optimizer
+        (see get_100_coin_star_candidates in the util module), so 100
+        coin stars are listed under their IDs in the user's config and
+        the stars they're combined with are listed separately.
+
+        Args:
+            route_star_ids: A set containing the star IDs in a route.
+
+        Returns:
+            A dictionary containing the sorted star IDs of the route
+            ("route_star_ids") and a dictionary with the IDs of the
+            route's 100 coin stars as keys and the IDs of the stars
+            they're combined with as values ("combined_with").
+        """
+        combined_with_star_ids = {
+            hundred_coin_star_id: base_star_id
+            for base_star_id, hundred_coin_star_id in self.base_star_alts_dict.items()
+        }
+
+        return {
+            "route_star_ids": sorted(
+                {util.get_config_star_id(star_id) for star_id in route_star_ids}
+            ),
+            "combined_with": {
+                util.get_config_star_id(star_id): combined_with_star_ids[star_id]
+                for star_id in sorted(route_star_ids)
+                if star_id in combined_with_star_ids
+            },
+        }
@@ -0,0 +1,164 @@
+"""Contains functions to cache optimal routes on disk.
+
+Each cache entry is a JSON file in the cache directory named after the
+hash of the problem it solves. The hash covers everything a route
+depends on, including the course data, so changing any of it (or the
+cache format version) gives a different hash, and stale entries are
+never read; they're evicted once the cache grows too big.
+"""
+
+import json
+import logging
+import os
+import pathlib
+import tempfile
+from .constants import RESULT_CACHE_VERSION
+from .course_data import COURSES
+from .problem import get_structure_key
+from . import util
+
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+
+def get_route_problem_hash(
+    star_times_dict: dict[str, float],
+    config_data: dict[str, dict],
+    max_num_upper_level_stars: int,
+    engine: str,
+    num_routes: int,
+) -> str:
+    """Get a hash identifying the problem of finding optimal routes.
+
+    Args:
+        star_times_dict: A dictionary containing the IDs of the stars
+          eligible for the route (i.e., not excluded) as keys and their
+          times as values.
+        config_data: The user's configuration data.
+        max_num_upper_level_stars: The maximum number of upper level
+          stars allowed in the route.
+        engine: The optimization engine used.
+        num_routes: The number of fastest distinct routes found.
+
+    Returns:
+        A hex digest of the problem's hash.
+    """
+    return util.get_canonical_hash(
+        {
+            "version": RESULT_CACHE_VERSION,
+            "courses": COURSES,
+            "star_times": star_times_dict,
+            "structure": get_structure_key(config_data),
+            "max_upper_level_stars": max_num_upper_level_stars,
+            "engine": engine,
+            "num_routes": num_routes,
+        }
+    )
+
+
+def load_routes(
+    cache_dir: pathlib.Path, problem_hash: str
+) -> list[tuple[set[str], float]] | None:
+    """Load cached routes for a problem.
+
+    Args:
+        cache_dir: The cache directory.
+        problem_hash: The hash of the problem.
+
+    Returns:
+        A list of tuples (route_star_ids, route_time) in the order the
+        routes were stored, or None if no routes are cached for the
+        problem.
+    """
+    entry_path = cache_dir / f"{problem_hash}.json"
+
+    try:
+        with open(entry_path, encoding="utf-8") as f:
+            entry = json.load(f)
+
+        routes = [
+            (set(route_star_ids), route_time)
+            for route_star_ids, route_time in entry["routes"]
+        ]
+
+        # Mark the entry as recently used so it's evicted last
+        entry_path.touch()
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("Ignoring unreadable cache entry %s: %s", entry_path, e)
+
+        return None
+
+    return routes
+
+
+def store_routes(
+    cache_dir: pathlib.Path,
+    problem_hash: str,
+    routes: list[tuple[set[str], float]],
+    max_cache_size: int,
+) -> None:
+    """Cache routes for a problem and evict old entries if necessary.
+
+    Failing to write to the cache is logged but otherwise ignored.
+
+    Args:
+        cache_dir: The cache directory, which is created if it doesn't
+          exist.
+        problem_hash: The hash of the problem.
+        routes: A list of tuples (route_star_ids, route_time).
+        max_cache_size: The maximum total size of the cache entries in
+          bytes.
+    """
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first so that an entry is never read
+        # half written
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=cache_dir, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(
+                {
+                    "routes": [
+                        (sorted(route_star_ids), route_time)
+                        for route_star_ids, route_time in routes
+                    ]
+                },
+                f,
+            )
+
+        os.replace(f.name, cache_dir / f"{problem_hash}.json")
+
+        evict_entries(cache_dir, max_cache_size)
+    except OSError as e:
+        logger.warning("Couldn't write to cache %s: %s", cache_dir, e)
+
+
+def evict_entries(cache_dir: pathlib.Path, max_cache_size: int) -> None:
+    """Remove least recently used entries until the cache is small enough.
+
+    Args:
+        cache_dir: The cache directory.
+        max_cache_size: The maximum total size of the cache entries in
+          bytes.
+    """
+    # Sort entries from most to least recently used
+    entries = sorted(
+        (
+            (entry_stat.st_mtime, entry_stat.st_size, entry_path)
+            for entry_path in cache_dir.glob("*.json")
+            for entry_stat in [entry_path.stat()]
+        ),
+        reverse=True,
+    )
+
+    cache_size = 0
+
+    for _, entry_size, entry_path in entries:
+        cache_size += entry_size
+
+        if cache_size > max_cache_size:
+            entry_path.unlink(missing_ok=True)
@@ -0,0 +1,152 @@
+"""Contains functions to compute risk-aware star costs.
+
+By default the optimizer minimizes the sum of the average times of the
+stars in a route. A risk-aware objective (see Objectives in the
+constants module) instead gives each star a cost which also accounts
+for how consistent the star is, so that a slightly slower but much more
+reliable star can be preferred. The costs are still summed over the
+route, so every optimization engine works with them unchanged.
+
+Each star's statistics are computed in one vectorized pass over all of
+the recorded times, rather than star by star.
+"""
+
+import numpy as np
+from .constants import Objectives
+
+
+def _get_flat_samples(
+    star_time_samples: list[list[float]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Put the recorded times of every star with times in one array.
+
+    Args:
+        star_time_samples: A list indexed by star index of the times
+          recorded for each star.
+
+    Returns:
+        A four-tuple containing (1) the indices of the stars with times,
+        (2) an array containing the times of those stars, one star after
+        the other, (3) the number of times of each of those stars, and
+        (4) the index in the times array of each of those stars' first
+        time.
+    """
+    counts = np.array([len(samples) for samples in star_time_samples])
+    star_indices = np.flatnonzero(counts)
+    counts = counts[star_indices]
+
+    flat_times = np.concatenate(
+        [np.asarray(star_time_samples[i], dtype=np.float64) for i in star_indices]
+    )
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    return star_indices, flat_times, counts, offsets
+
+
+def get_star_time_statistics(
+    star_time_samples: list[list[float]],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Get the mean and standard deviation of each star's times.
+
+    The standard deviation is the population standard deviation, so a
+    star with a single time has a standard deviation of 0.
+
+    Args:
+        star_time_samples: A list indexed by star index of the times
+          recorded for each star.
+
+    Returns:
+        A two-tuple containing arrays indexed by star index of (1) the
+        mean and (2) the standard deviation of each star's times, which
+        are NaN for stars without times.
+    """
+    star_indices, flat_times, counts, offsets = _get_flat_samples(star_time_samples)
+
+    means = np.add.reduceat(flat_times, offsets) / counts
+    variances = (
+        np.add.reduceat((flat_times - np.repeat(means, counts)) ** 2, offsets) / counts
+    )
+
+    star_means = np.full(len(star_time_samples), np.nan)
+    star_standard_deviations = np.full(len(star_time_samples), np.nan)
+    star_means[star_indices] = means
+    star_standard_deviations[star_indices] = np.sqrt(variances)
+
+    return star_means, star_standard_deviations
+
+
+def get_star_time_quantiles(
+    star_time_samples: list[list[float]], quantile: float
+) -> np.ndarray:
+    """Get a quantile of each star's times.
+
+    Quantiles are linearly interpolated between times, as with NumPy's
+    default quantile method.
+
+    Args:
+        star_time_samples: A list indexed by star index of the times
+          recorded for each star.
+        quantile: The quantile to get, from 0 to 1.
+
+    Returns:
+        An array indexed by star index of the quantile of each star's
+        times, which is NaN for stars without times.
+    """
+    star_indices, flat_times, counts, offsets = _get_flat_samples(star_time_samples)
+
+    # Sort each star's times in place within the array
+    sorted_times = flat_times[
+        np.lexsort((flat_times, np.repeat(np.arange(len(counts)), counts)))
+    ]
+
+    positions = quantile * (counts - 1)
+    lower_positions = np.floor(positions).astype(np.intp)
+    upper_positions = np.ceil(positions).astype(np.intp)
+    lower_times = sorted_times[offsets + lower_positions]
+    upper_times = sorted_times[offsets + upper_positions]
+
+    star_quantiles = np.full(len(star_time_samples), np.nan)
+    star_quantiles[star_indices] = lower_times + (positions - lower_positions) * (
+        upper_times - lower_times
+    )
+
+    return star_quantiles
+
+
+def get_objective_star_times(
+    star_times: list[float | None],
+    star_time_samples: list[list[float]],
+    objective: tuple[str, float],
+) -> list[float | None]:
+    """Get the cost of each star under an objective.
+
+    Args:
+        star_times: A list indexed by star index of the average time of
+          each star, or None for stars without times.
+        star_time_samples: A list indexed by star index of the times
+          recorded for each star.
+        objective: A two-tuple containing an objective kind and its
+          parameter.
+
+    Returns:
+        A list indexed by star index of the cost of each star, or None
+        for stars without times.
+    """
+    objective_kind, objective_parameter = objective
+
+    if objective_kind == Objectives.MEAN:
+        return star_times
+
+    if objective_kind == Objectives.MEAN_PLUS_SD:
+        _, star_standard_deviations = get_star_time_statistics(star_time_samples)
+        star_costs = (
+            np.array(star_times, dtype=np.float64)
+            + objective_parameter * star_standard_deviations
+        )
+    else:
+        star_costs = get_star_time_quantiles(star_time_samples, objective_parameter)
+
+    return [
+        None if time is None else float(cost)
+        for time, cost in zip(star_times, star_costs)
+    ]
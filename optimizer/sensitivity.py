@@ -0,0 +1,362 @@
+"""Contains functions to find how much a route depends on its stars.
+
+The exclusion penalty of a star in an optimal route is how much slower
+the optimal route gets if the star is excluded. There's a search for
+each star in the route, which share the work that doesn't depend on the
+excluded star: the structure arguments are built once, and the fastest
+route found so far without a star (by an earlier star's search) is a
+valid route once the star is excluded, so the star's search starts from
+it and prunes with it right away.
+
+The break-even time of a star is the average time at which it enters or
+leaves the optimal route. Every route's time is the sum of its star
+times, so as one star's time changes, the optimal route time is the
+smaller of (1) the time of the fastest route without the star, which
+doesn't change, and (2) the time of the fastest route with the star,
+which changes one for one with the star's time. The star's break-even
+time is where the two meet, so one search per star finds it exactly:
+for a star in the optimal route, the search without it (which its
+exclusion penalty comes from), and for any other star, a search with
+the star's time set to 0, which starts from the optimal route.
+
+The same searches tell how much faster the route gets if a star is
+improved by any amount, so stars are ranked for practice without a
+search per star and improvement.
+"""
+
+import logging
+from .exceptions import InvalidExcludedStarIds, NoValidRoutePossible
+from .optimize import get_optimal_routes
+from .problem import Problem
+
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+
+def get_exclusion_penalties(
+    problem: Problem,
+    route_star_ids: set[str],
+    excluded_course_ids: set[str],
+    excluded_star_ids: set[str],
+    max_num_upper_level_stars: int,
+    prune_partitions: bool = True,
+    num_workers: int = 1,
+) -> dict[str, float | None]:
+    """Find the exclusion penalty of every star in an optimal route.
+
+    For a route optimized for a risk-aware objective, pass the problem
+    from Problem.with_objective, so that the penalties are how much the
+    route's sum of star costs grows.
+
+    Args:
+        problem: The problem the route is optimal for.
+        route_star_ids: A set containing the star IDs of an optimal
+          route.
+        excluded_course_ids: A set containing course IDs excluded from
+          the route.
+        excluded_star_ids: A set containing star IDs excluded from the
+          route.
+        max_num_upper_level_stars: The maximum number of upper level
+          stars allowed in the route.
+        prune_partitions: Whether to skip special star partitions which
+          can't lead to a faster route.
+        num_workers: The number of processes to search with.
+
+    Returns:
+        A dictionary containing the route's star IDs as keys and the
+        number of seconds the optimal route slows down by if the star is
+        excluded as values, or None where no route is possible without
+        the star.
+    """
+    route_time = problem.get_route_time(route_star_ids)
+    structure_kwargs = problem.get_structure_kwargs()
+
+    known_routes: list[tuple[set[str], float]] = []
+    exclusion_penalties: dict[str, float | None] = {}
+
+    for star_id in sorted(route_star_ids):
+        # Excluding the star might leave DDD without an eligible star,
+        # which the optimizer doesn't check for
+        try:
+            problem.validate_excluded_star_ids(excluded_star_ids | {star_id})
+        except InvalidExcludedStarIds:
+            exclusion_penalties[star_id] = None
+
+            continue
+
+        # Search starting from the fastest known route without the star
+        initial_routes = sorted(
+            (
+                (time, star_ids)
+                for star_ids, time in known_routes
+                if star_id not in star_ids
+            ),
+            key=lambda route: route[0],
+        )[:1]
+
+        try:
+            routes, _ = get_optimal_routes(
+                star_time_tuples=problem.get_eligible_star_time_tuples(
+                    excluded_course_ids=excluded_course_ids,
+                    excluded_star_ids=excluded_star_ids | {star_id},
+                ),
+                max_num_upper_level_stars=max_num_upper_level_stars,
+                prune_partitions=prune_partitions,
+                num_workers=num_workers,
+                initial_routes=[star_ids for _, star_ids in initial_routes],
+                **structure_kwargs,
+            )
+        except NoValidRoutePossible:
+            exclusion_penalties[star_id] = None
+
+            continue
+
+        known_routes.append(routes[0])
+        exclusion_penalties[star_id] = routes[0][1] - route_time
+
+    logger.info("Found exclusion penalties for %d stars.", len(exclusion_penalties))
+
+    return exclusion_penalties
+
+
+def get_break_even_times(
+    problem: Problem,
+    route_star_ids: set[str],
+    route_time: float,
+    excluded_course_ids: set[str],
+    excluded_star_ids: set[str],
+    max_num_upper_level_stars: int,
+    exclusion_penalties: dict[str, float | None] | None = None,
+    prune_partitions: bool = True,
+    num_workers: int = 1,
+) -> dict[str, dict[str, bool | float | None]]:
+    """Find the break-even time of every eligible star.
+
+    Break-even times are for the route with the fastest average time.
+
+    Args:
+        problem: The problem to find break-even times for.
+        route_star_ids: A set containing the star IDs of the route with
+          the fastest average time.
+        route_time: The average time the route takes.
+        excluded_course_ids: A set containing course IDs to exclude.
+        excluded_star_ids: A set containing star IDs to exclude.
+        max_num_upper_level_stars: The maximum number of upper level
+          stars allowed in the route.
+        exclusion_penalties: An optional dictionary containing the
+          exclusion penalties of the route's stars (see
+          get_exclusion_penalties), which are found if not given.
+        prune_partitions: Whether to skip special star partitions which
+          can't lead to a faster route.
+        num_workers: The number of processes to search with.
+
+    Returns:
+        A dictionary containing the star IDs of stars which have times
+        and haven't been excluded as keys and dictionaries as values,
+        which contain whether the star is in the optimal route
+        ("in_route") and the average time above which the star leaves
+        the optimal route or below which it enters it
+        ("break_even_time"), or None if the star never leaves or never
+        enters it.
+    """
+    star_time_tuples = problem.get_eligible_star_time_tuples(
+        excluded_course_ids=excluded_course_ids,
+        excluded_star_ids=excluded_star_ids,
+    )
+
+    search_kwargs = {
+        "max_num_upper_level_stars": max_num_upper_level_stars,
+        "prune_partitions": prune_partitions,
+        "num_workers": num_workers,
+        **problem.get_structure_kwargs(),
+    }
+
+    # A star in the route leaves it once its time goes up by more than
+    # its exclusion penalty
+    if exclusion_penalties is None:
+        exclusion_penalties = get_exclusion_penalties(
+            problem=problem,
+            route_star_ids=route_star_ids,
+            excluded_course_ids=excluded_course_ids,
+            excluded_star_ids=excluded_star_ids,
+            max_num_upper_level_stars=max_num_upper_level_stars,
+            prune_partitions=prune_partitions,
+            num_workers=num_workers,
+        )
+
+    entering_times = _get_entering_times(
+        star_time_tuples=star_time_tuples,
+        route_star_ids=route_star_ids,
+        route_time=route_time,
+        search_kwargs=search_kwargs,
+    )
+
+    break_even_times = {}
+
+    for star_time, star_id in star_time_tuples:
+        if star_id in route_star_ids:
+            exclusion_penalty = exclusion_penalties[star_id]
+
+            break_even_times[star_id] = {
+                "in_route": True,
+                "break_even_time": (
+                    None if exclusion_penalty is None else star_time + exclusion_penalty
+                ),
+            }
+        else:
+            break_even_times[star_id] = {
+                "in_route": False,
+                "break_even_time": entering_times[star_id],
+            }
+
+    logger.info("Found break-even times for %d stars.", len(break_even_times))
+
+    return break_even_times
+
+
+def get_practice_priorities(
+    problem: Problem,
+    improvement: tuple[float, float],
+    excluded_course_ids: set[str],
+    excluded_star_ids: set[str],
+    max_num_upper_level_stars: int,
+    prune_partitions: bool = True,
+    num_workers: int = 1,
+) -> list[tuple[str, float, float, bool, float]]:
+    """Rank stars by how much improving each would speed up the route.
+
+    Improving a star in the fastest route speeds the route up by exactly
+    the improvement, and improving any other star speeds it up by how
+    far the star's new time is below its break-even time, if at all, so
+    the whole ranking only needs a search for each star not in the
+    route.
+
+    Args:
+        problem: The problem to rank stars for.
+        improvement: A two-tuple containing the number of seconds and
+          the fraction of its average time by which each star is
+          improved (see parse_improvement in the util module).
+        excluded_course_ids: A set containing course IDs to exclude.
+        excluded_star_ids: A set containing star IDs to exclude.
+        max_num_upper_level_stars: The maximum number of upper level
+          stars allowed in the route.
+        prune_partitions: Whether to skip special star partitions which
+          can't lead to a faster route.
+        num_workers: The number of processes to search with.
+
+    Returns:
+        A list containing, for each star which has times and hasn't been
+        excluded, five-tuples of (1) the star ID, (2) the star's average
+        time, (3) the star's improved time, (4) whether the star is in
+        the fastest route, and (5) how many seconds faster the fastest
+        route gets if the star is improved, in order of decreasing
+        route time gain.
+
+    Raises:
+        NoValidRoutePossible: If we were unable to form any route due to
+          insufficient time data.
+    """
+    improvement_seconds, improvement_fraction = improvement
+
+    star_time_tuples = problem.get_eligible_star_time_tuples(
+        excluded_course_ids=excluded_course_ids,
+        excluded_star_ids=excluded_star_ids,
+    )
+
+    search_kwargs = {
+        "max_num_upper_level_stars": max_num_upper_level_stars,
+        "prune_partitions": prune_partitions,
+        "num_workers": num_workers,
+        **problem.get_structure_kwargs(),
+    }
+
+    routes, _ = get_optimal_routes(
+        star_time_tuples=list(star_time_tuples), **search_kwargs
+    )
+    route_star_ids, route_time = routes[0]
+
+    entering_times = _get_entering_times(
+        star_time_tuples=star_time_tuples,
+        route_star_ids=route_star_ids,
+        route_time=route_time,
+        search_kwargs=search_kwargs,
+    )
+
+    practice_priorities = []
+
+    for star_time, star_id in star_time_tuples:
+        improved_star_time = max(
+            star_time - improvement_seconds - improvement_fraction * star_time, 0.0
+        )
+
+        if star_id in route_star_ids:
+            route_time_gain = star_time - improved_star_time
+        elif entering_times[star_id] is None:
+            route_time_gain = 0.0
+        else:
+            route_time_gain = max(entering_times[star_id] - improved_star_time, 0.0)
+
+        practice_priorities.append(
+            (
+                star_id,
+                star_time,
+                improved_star_time,
+                star_id in route_star_ids,
+                route_time_gain,
+            )
+        )
+
+    logger.info("Found route time gains for %d stars.", len(practice_priorities))
+
+    return sorted(practice_priorities, key=lambda row: (-row[4], row[0]))
+
+
+def _get_entering_times(
+    star_time_tuples: list[tuple[float, str]],
+    route_star_ids: set[str],
+    route_time: float,
+    search_kwargs: dict,
+) -> dict[str, float | None]:
+    """Find the time below which each star enters an optimal route.
+
+    Args:
+        star_time_tuples: A list of (time, star_id) tuples for the stars
+          eligible for the route.
+        route_star_ids: A set containing the star IDs of an optimal
+          route.
+        route_time: The time the optimal route takes.
+        search_kwargs: The arguments to search with other than the star
+          time tuples.
+
+    Returns:
+        A dictionary containing the star IDs of the eligible stars not in
+        the route as keys and the average time below which the star
+        enters the optimal route as values, or None if it never does.
+    """
+    entering_times = {}
+
+    for _, star_id in star_time_tuples:
+        if star_id in route_star_ids:
+            continue
+
+        # A star enters the route once its time goes down by more than
+        # the fastest route with it is slower than the route, which is
+        # the time of the fastest route when it takes no time
+        routes, _ = get_optimal_routes(
+            star_time_tuples=[
+                (0.0 if other_star_id == star_id else time, other_star_id)
+                for time, other_star_id in star_time_tuples
+            ],
+            initial_routes=[route_star_ids],
+            **search_kwargs,
+        )
+        zero_time_route_star_ids, zero_time_route_time = routes[0]
+
+        entering_times[star_id] = (
+            route_time - zero_time_route_time
+            if star_id in zero_time_route_star_ids
+            else None
+        )
+
+    return entering_times
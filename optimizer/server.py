@@ -0,0 +1,349 @@
+"""Contains an HTTP service which finds optimal routes.
+
+Clients POST a config to /route, either as TOML (with a Content-Type
+containing "toml") or as JSON with the same structure, and get back an
+optimal route as JSON or, if they ask for it, as an HTML page. Options
+are given as query parameters:
+
+- max_upper_level_stars: the maximum number of upper level stars
+  (defaults to 70)
+- exclude_course_ids: a course ID to exclude (may be repeated)
+- exclude_star_ids: a star ID to exclude (may be repeated)
+- format: either "json" or "html" (defaults to "html" if the Accept
+  header prefers HTML and "json" otherwise)
+
+Routes are found in a pool of processes. Each request is identified by
+a hash of a canonical form of its config and options: identical requests
+made while a route is being found for one of them wait for the same
+result, and the results of recent requests are kept in a least recently
+used cache. The output format isn't part of a request's canonical form,
+so a route found for a JSON request is also used for an HTML request
+with the same config and options, and vice versa.
+"""
+
+import asyncio
+from collections import OrderedDict
+import concurrent.futures
+import contextlib
+import json
+import logging
+import tomllib
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, Response
+from starlette.routing import Route
+import uvicorn
+from .config import validate_config_data
+from .constants import (
+    ConfigKeys,
+    DataKeys,
+    NUM_STARS_IN_ROUTE,
+)
+from .exceptions import (
+    ConfigFileInvalid,
+    InvalidExcludedStarIds,
+    NoValidRoutePossible,
+)
+from .html import generate_page_html
+from .optimize import get_optimal_routes
+from .problem import Problem
+from . import util
+
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+
+# Output formats
+JSON_FORMAT = "json"
+HTML_FORMAT = "html"
+
+
+def serve(host: str, port: int, num_processes: int | None, cache_size: int) -> None:
+    """Serve optimal routes over HTTP until interrupted.
+
+    Args:
+        host: The host to listen on.
+        port: The port to listen on.
+        num_processes: The number of processes to find routes with, or
+          None to use the number of CPUs.
+        cache_size: The maximum number of results to cache.
+    """
+    uvicorn.run(create_app(num_processes, cache_size), host=host, port=port)
+
+
+def create_app(num_processes: int | None, cache_size: int) -> Starlette:
+    """Create the web application.
+
+    Args:
+        num_processes: The number of processes to find routes with, or
+          None to use the number of CPUs.
+        cache_size: The maximum number of results to cache.
+
+    Returns:
+        A Starlette application.
+    """
+    executor: concurrent.futures.ProcessPoolExecutor | None = None
+
+    # Results of recent requests, from least to most recently used, and
+    # tasks for requests being solved, keyed by request hash
+    results_cache: OrderedDict[str, dict] = OrderedDict()
+    solve_tasks: dict[str, asyncio.Task] = {}
+
+    @contextlib.asynccontextmanager
+    async def _lifespan(_):
+        """Run the process pool while the application is running."""
+        nonlocal executor
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=num_processes
+        ) as executor:
+            yield
+
+    async def _solve(request_hash: str, route_request: dict) -> dict:
+        """Solve a route request in the process pool and cache the result.
+
+        Args:
+            request_hash: The hash of the route request.
+            route_request: The route request, as returned by
+              parse_route_request.
+
+        Returns:
+            The output of solve_route_request.
+        """
+        logger.info("Finding optimal route for request %s.", request_hash)
+
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                executor, solve_route_request, route_request
+            )
+        finally:
+            del solve_tasks[request_hash]
+
+        results_cache[request_hash] = result
+
+        if len(results_cache) > cache_size:
+            results_cache.popitem(last=False)
+
+        return result
+
+    async def _route(request: Request) -> Response:
+        """Find an optimal route for a config.
+
+        Args:
+            request: The request, containing a config and options.
+
+        Returns:
+            A response containing the route or an error.
+        """
+        try:
+            output_format = get_output_format(
+                query_params=request.query_params,
+                accept=request.headers.get("accept", ""),
+            )
+            route_request = parse_route_request(
+                await request.body(),
+                content_type=request.headers.get("content-type", ""),
+                query_params=request.query_params,
+            )
+            request_hash = util.get_canonical_hash(route_request)
+
+            if request_hash in results_cache:
+                results_cache.move_to_end(request_hash)
+
+                result = results_cache[request_hash]
+            else:
+                # Wait for the request to be solved, solving it if nobody
+                # else has asked for it. The task is shielded so
+                # that if this request is cancelled, other requests
+                # waiting for it aren't.
+                if request_hash not in solve_tasks:
+                    solve_tasks[request_hash] = asyncio.create_task(
+                        _solve(request_hash, route_request)
+                    )
+
+                result = await asyncio.shield(solve_tasks[request_hash])
+        except ConfigFileInvalid as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except (InvalidExcludedStarIds, NoValidRoutePossible) as e:
+            return JSONResponse({"error": str(e)}, status_code=422)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Respond rather than letting the exception propagate, which
+            # leaves the client's connection hanging
+            logger.exception("Failed to find a route.")
+
+            return JSONResponse({"error": "Internal server error."}, status_code=500)
+
+        if output_format == HTML_FORMAT:
+            return HTMLResponse(result["html"])
+
+        return JSONResponse(
+            {key: value for key, value in result.items() if key != "html"}
+        )
+
+    return Starlette(
+        routes=[Route("/route", _route, methods=["POST"])], lifespan=_lifespan
+    )
+
+
+def get_output_format(query_params: dict, accept: str) -> str:
+    """Get the output format a route request asks for.
+
+    Args:
+        query_params: The query parameters of the request.
+        accept: The Accept header of the request.
+
+    Returns:
+        The output format, either JSON_FORMAT or HTML_FORMAT.
+
+    Raises:
+        ConfigFileInvalid: If the format was invalid.
+    """
+    output_format = query_params.get(
+        "format", HTML_FORMAT if "text/html" in accept else JSON_FORMAT
+    )
+
+    if output_format not in (JSON_FORMAT, HTML_FORMAT):
+        raise ConfigFileInvalid(f"format must be {JSON_FORMAT} or {HTML_FORMAT}.")
+
+    return output_format
+
+
+def parse_route_request(body: bytes, content_type: str, query_params: dict) -> dict:
+    """Parse and validate a route request into a canonical form.
+
+    The form is canonical in that requests which are bound to have the
+    same result (e.g., which list the same excluded star IDs in a
+    different order) give equal outputs.
+
+    Args:
+        body: The request body, containing a config as TOML or JSON.
+        content_type: The Content-Type header of the request.
+        query_params: The query parameters of the request, which must
+          support a getlist method for repeated parameters.
+
+    Returns:
+        A dictionary containing the config data and options.
+
+    Raises:
+        ConfigFileInvalid: If the config or options were invalid.
+    """
+    # Parse the config
+    try:
+        if "toml" in content_type:
+            config_data = tomllib.loads(body.decode())
+        else:
+            config_data = json.loads(body)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ConfigFileInvalid(f"Config in request could not be parsed: {e}") from e
+
+    if not isinstance(config_data, dict):
+        raise ConfigFileInvalid("Config in request is not a table.")
+
+    config_data = validate_config_data(config_data, config_name="Config in request")
+
+    # Parse the options
+    try:
+        max_num_upper_level_stars = int(
+            query_params.get("max_upper_level_stars", NUM_STARS_IN_ROUTE)
+        )
+    except ValueError as e:
+        raise ConfigFileInvalid("max_upper_level_stars must be an integer.") from e
+
+    if max_num_upper_level_stars < 0:
+        raise ConfigFileInvalid("max_upper_level_stars must not be negative.")
+
+    excluded_course_ids = set(query_params.getlist("exclude_course_ids"))
+    excluded_star_ids = set(query_params.getlist("exclude_star_ids"))
+
+    if excluded_course_ids - (
+        util.get_course_ids() - {DataKeys.COURSE_DIRE_DIRE_DOCKS_ID}
+    ):
+        raise ConfigFileInvalid("exclude_course_ids contains invalid course IDs.")
+
+    if excluded_star_ids - util.get_star_ids():
+        raise ConfigFileInvalid("exclude_star_ids contains invalid star IDs.")
+
+    # Sort everything whose order doesn't matter
+    return {
+        "config": {
+            ConfigKeys.TIMES_TABLE: {
+                star_id: sorted(times)
+                for star_id, times in config_data[ConfigKeys.TIMES_TABLE].items()
+            },
+            ConfigKeys.HUNDRED_COIN_TIMES_TABLE: {
+                star_id: {
+                    **star_data,
+                    ConfigKeys.HUNDRED_COIN_TIMES: sorted(
+                        star_data[ConfigKeys.HUNDRED_COIN_TIMES]
+                    ),
+                }
+                for star_id, star_data in util.get_100_coin_star_candidates(
+                    config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE]
+                ).items()
+            },
+            ConfigKeys.PREREQUISITES_TABLE: {
+                star_id: sorted(prerequisites)
+                for star_id, prerequisites in config_data[
+                    ConfigKeys.PREREQUISITES_TABLE
+                ].items()
+            },
+        },
+        "max_upper_level_stars": max_num_upper_level_stars,
+        "exclude_course_ids": sorted(excluded_course_ids),
+        "exclude_star_ids": sorted(excluded_star_ids),
+    }
+
+
+def solve_route_request(route_request: dict) -> dict:
+    """Find an optimal route for a route request.
+
+    This is run in a worker process.
+
+    Args:
+        route_request: A route request, as returned by
+          parse_route_request.
+
+    Returns:
+        A dictionary containing the stars of the route (see
+        get_route_json in the problem module), the route time, and
+        whether the route is proven to be optimal, along
+        with the HTML page for the route ("html"), so that the result
+        can be used for requests of either format.
+
+    Raises:
+        InvalidExcludedStarIds: If DDD1 and its 100 coin star
+          alternative have been excluded.
+        NoValidRoutePossible: If we were unable to form any route due to
+          insufficient time data.
+    """
+    config_data = route_request["config"]
+    excluded_star_ids = set(route_request["exclude_star_ids"])
+
+    problem = Problem(config_data)
+    problem.validate_excluded_star_ids(excluded_star_ids)
+
+    routes, route_is_proven_optimal = get_optimal_routes(
+        star_time_tuples=problem.get_eligible_star_time_tuples(
+            excluded_course_ids=set(route_request["exclude_course_ids"]),
+            excluded_star_ids=excluded_star_ids,
+        ),
+        max_num_upper_level_stars=route_request["max_upper_level_stars"],
+        **problem.get_structure_kwargs(),
+    )
+    route_star_ids, route_time = routes[0]
+
+    result = {
+        **problem.get_route_json(route_star_ids),
+        "route_time": route_time,
+        "route_is_proven_optimal": route_is_proven_optimal,
+    }
+
+    result["html"] = generate_page_html(
+        route_star_ids=route_star_ids,
+        route_time=route_time,
+        route_is_proven_optimal=route_is_proven_optimal,
+        problem=problem,
+    )
+
+    return result
@@ -0,0 +1,138 @@
+"""Contains functionality to re-optimize a route as star times change."""
+
+import logging
+from .optimize import get_optimal_routes
+
+
+# Set up logging for this module
+logger = logging.getLogger(__name__)
+
+
+class OptimizerSession:
+    """An optimizer which keeps its state between optimizations.
+
+    Everything which doesn't depend on star times (prerequisite
+    relationships, star locations, star count requirements, etc.) is
+    kept from one optimization to the next, along with the fastest
+    route found. When star times change, the route found before the
+    change is still a valid route, so the search is warm-started from
+    it: partial partitions are pruned against that route's time under
+    the new times from the start, rather than only once the search has
+    found a fast route of its own.
+
+    Attributes:
+        star_times_dict: A dictionary containing the IDs of the stars
+          eligible for the route as keys and their times as values.
+        route_star_ids: The set of star IDs of the fastest route found,
+          or None before the first optimization.
+        route_time: The time the fastest route found takes, or None
+          before the first optimization.
+        route_is_proven_optimal: Whether the fastest route found is
+          proven to be optimal.
+    """
+
+    def __init__(
+        self,
+        star_time_tuples: list[tuple[float, str]],
+        max_num_upper_level_stars: int,
+        adjacency_list_dict: dict[str, list[str]],
+        base_star_alts_dict: dict[str, str],
+        star_locations_dict: dict[str, str],
+        num_stars_required_dict: dict[str, int],
+        prune_partitions: bool = True,
+        num_workers: int = 1,
+    ) -> None:
+        """Set up the session.
+
+        See get_optimal_routes in the optimize module for a description
+        of the arguments. The star time tuples aren't modified.
+        """
+        self.star_times_dict = {star_id: time for time, star_id in star_time_tuples}
+        self._optimize_kwargs = {
+            "max_num_upper_level_stars": max_num_upper_level_stars,
+            "adjacency_list_dict": adjacency_list_dict,
+            "base_star_alts_dict": base_star_alts_dict,
+            "star_locations_dict": star_locations_dict,
+            "num_stars_required_dict": num_stars_required_dict,
+            "prune_partitions": prune_partitions,
+            "num_workers": num_workers,
+        }
+
+        self.route_star_ids: set[str] | None = None
+        self.route_time: float | None = None
+        self.route_is_proven_optimal = False
+
+    def optimize(self) -> tuple[set[str], float]:
+        """Find an optimal route, starting from the last route found.
+
+        Returns:
+            A two-tuple containing (1) the set containing the star IDs
+            which are in the optimal route that was found and (2) the
+            time an optimal route takes.
+
+        Raises:
+            NoValidRoutePossible: If we were unable to form any route
+              due to insufficient time data.
+        """
+        routes, self.route_is_proven_optimal = get_optimal_routes(
+            # get_optimal_routes modifies this list, so build a new one
+            # each time
+            star_time_tuples=[
+                (time, star_id) for star_id, time in self.star_times_dict.items()
+            ],
+            initial_routes=(
+                [self.route_star_ids] if self.route_star_ids is not None else None
+            ),
+            **self._optimize_kwargs,
+        )
+
+        self.route_star_ids, self.route_time = routes[0]
+
+        return (self.route_star_ids, self.route_time)
+
+    def update_star_times(
+        self, star_times_dict: dict[str, float]
+    ) -> tuple[set[str], float]:
+        """Change the times of stars and find the new optimal route.
+
+        Args:
+            star_times_dict: A dictionary containing the IDs of stars
+              eligible for the route as keys and their new times as
+              values.
+
+        Returns:
+            The output of the optimize method.
+
+        Raises:
+            KeyError: If a star ID isn't of a star eligible for the
+              route, in which case no times are changed.
+            NoValidRoutePossible: If we were unable to form any route
+              due to insufficient time data.
+        """
+        # Check every star before changing any times, so that a bad
+        # update leaves the session as it was
+        for star_id in star_times_dict:
+            if star_id not in self.star_times_dict:
+                raise KeyError(f"{star_id} is not eligible for the route.")
+
+        self.star_times_dict.update(star_times_dict)
+
+        return self.optimize()
+
+    def update_star_time(self, star_id: str, new_time: float) -> tuple[set[str], float]:
+        """Change the time of a star and find the new optimal route.
+
+        Args:
+            star_id: The ID of a star eligible for the route.
+            new_time: The new time of the star.
+
+        Returns:
+            The output of the optimize method.
+
+        Raises:
+            KeyError: If the star ID isn't of a star eligible for the
+              route.
+            NoValidRoutePossible: If we were unable to form any route
+              due to insufficient time data.
+        """
+        return self.update_star_times({star_id: new_time})
@@ -0,0 +1,109 @@
+"""Contains functions to simulate the distribution of a route's time.
+
+The optimizer only uses the average of each star's times, but a route's
+time varies from run to run. Each trial of a simulation resamples every
+star in the route from the times recorded for it, so the simulated route
+times follow the spread of the user's own times without assuming any
+particular distribution.
+"""
+
+import numpy as np
+from .constants import SIMULATION_BATCH_SIZE, SIMULATION_DEFAULT_NUM_TRIALS
+from .problem import Problem
+
+
+def simulate_route_times(
+    route_star_ids: set[str],
+    problem: Problem,
+    num_trials: int = SIMULATION_DEFAULT_NUM_TRIALS,
+    seed: int | None = None,
+) -> np.ndarray:
+    """Simulate the time a route takes by resampling recorded star times.
+
+    Args:
+        route_star_ids: A set containing the star IDs used for the
+          route, each of which must have times.
+        problem: The problem the route is for.
+        num_trials: The number of route times to simulate.
+        seed: An optional seed for the random number generator.
+
+    Returns:
+        An array containing the simulated route times.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Put every recorded time for the route's stars in one array, so a
+    # batch of trials is sampled with a single indexing operation
+    route_star_time_samples = [
+        problem.star_time_samples[problem.star_indices[star_id]]
+        for star_id in route_star_ids
+    ]
+
+    flat_times = np.concatenate(
+        [np.asarray(samples, dtype=np.float64) for samples in route_star_time_samples]
+    )
+    counts = np.array([len(samples) for samples in route_star_time_samples])
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    route_times = np.empty(num_trials)
+
+    for start in range(0, num_trials, SIMULATION_BATCH_SIZE):
+        batch_size = min(SIMULATION_BATCH_SIZE, num_trials - start)
+
+        # Pick a recorded time for each star in each trial. Scaling
+        # uniform samples is faster than drawing bounded integers.
+        sample_indices = rng.random(
+            (batch_size, len(route_star_time_samples)), dtype=np.float32
+        )
+        sample_indices *= counts
+        sample_indices = sample_indices.astype(np.intp)
+        sample_indices += offsets
+
+        route_times[start : start + batch_size] = np.take(
+            flat_times, sample_indices
+        ).sum(axis=1)
+
+    return route_times
+
+
+def get_route_time_distribution(
+    route_star_ids: set[str],
+    problem: Problem,
+    num_trials: int = SIMULATION_DEFAULT_NUM_TRIALS,
+    target_time: float | None = None,
+) -> dict[str, float | int | None]:
+    """Summarize the simulated distribution of the time a route takes.
+
+    Args:
+        route_star_ids: A set containing the star IDs used for the
+          route, each of which must have times.
+        problem: The problem the route is for.
+        num_trials: The number of route times to simulate.
+        target_time: An optional number of seconds to find the
+          probability of beating.
+
+    Returns:
+        A dictionary containing the number of trials ("num_trials"), the
+        10th, 50th, and 90th percentiles of the route time ("p10",
+        "median", and "p90"), the target time ("target_time"), and the
+        probability of the route being faster than the target time
+        ("probability_of_beating_target"), which is None if no target
+        time was given.
+    """
+    route_times = simulate_route_times(
+        route_star_ids=route_star_ids, problem=problem, num_trials=num_trials
+    )
+    p10, median, p90 = np.percentile(route_times, [10, 50, 90])
+
+    return {
+        "num_trials": num_trials,
+        "p10": float(p10),
+        "median": float(median),
+        "p90": float(p90),
+        "target_time": target_time,
+        "probability_of_beating_target": (
+            None
+            if target_time is None
+            else float(np.count_nonzero(route_times < target_time) / num_trials)
+        ),
+    }
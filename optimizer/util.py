@@ -3,14 +3,21 @@
 from collections.abc import Iterable
 import copy
 import functools
+import hashlib
+import json
 import random
-import re
 import statistics
-from .constants import ALL_LOCATIONS, ConfigKeys, DataKeys
+from .constants import (
+    ConfigKeys,
+    DataKeys,
+    HUNDRED_COIN_CANDIDATE_SEPARATOR,
+    Objectives,
+)
 from .course_data import COURSES
 
 
-def get_course_ids(include_castle: bool = True) -> set[str]:
+@functools.cache
+def get_course_ids(include_castle: bool = True) -> frozenset[str]:
     """Get a set of course IDs.
 
     Args:
@@ -21,29 +28,42 @@ def get_course_ids(include_castle: bool = True) -> set[str]:
     Returns:
         A set of course IDs.
     """
-    course_ids = set()
-
-    for course in COURSES:
-        if (
-            course_id := course[DataKeys.COURSE_ID]
-        ) != DataKeys.COURSE_CASTLE_ID or include_castle:
-            course_ids.add(course_id)
-
-    return course_ids
+    return frozenset(
+        course[DataKeys.COURSE_ID]
+        for course in COURSES
+        if course[DataKeys.COURSE_ID] != DataKeys.COURSE_CASTLE_ID or include_castle
+    )
 
 
-def get_all_possible_100_coin_star_ids() -> set[str]:
+@functools.cache
+def get_all_possible_100_coin_star_ids() -> frozenset[str]:
     """Get a set of all possible 100 coin star IDs.
 
     Returns:
         A set of all possible 100 coin star IDs.
     """
-    return {course_id + "_100" for course_id in get_course_ids(include_castle=False)}
+    return frozenset(
+        get_100_coin_star_id(course_id)
+        for course_id in get_course_ids(include_castle=False)
+    )
 
 
+def get_100_coin_star_id(course_id: str) -> str:
+    """Get the ID of a course's 100 coin star.
+
+    Args:
+        course_id: The ID of a course other than CASTLE.
+
+    Returns:
+        The ID of the course's 100 coin star.
+    """
+    return course_id + "_100"
+
+
+@functools.cache
 def get_star_ids(
     include_all_possible_100_coin_stars: bool = True, include_castle_stars: bool = True
-) -> set[str]:
+) -> frozenset[str]:
     """Get a set of star IDs.
 
     Args:
@@ -71,24 +91,157 @@ def get_star_ids(
     if include_all_possible_100_coin_stars:
         star_ids.update(get_all_possible_100_coin_star_ids())
 
-    return star_ids
+    return frozenset(star_ids)
 
 
 def get_course_id_from_star_id(star_id: str) -> str:
     """Get the course ID given a star ID.
 
     Args:
-        star_id: A star ID.
+        star_id: A star ID, which may be of any possible 100 coin star
+          or 100 coin star candidate.
 
     Returns:
         The passed in star's course's course ID.
     """
-    return re.match(r"^[A-Z]+", star_id).group()
+    return get_star_course_ids_dict()[get_config_star_id(star_id)]
+
+
+def get_100_coin_candidate_star_id(
+    hundred_coin_star_id: str, combined_with_star_id: str
+) -> str:
+    """Get the ID of one of several candidates for a course's 100 coin star.
+
+    Args:
+        hundred_coin_star_id: The ID of the course's 100 coin star.
+        combined_with_star_id: The ID of the star the candidate is
+          combined with.
+
+    Returns:
+        The ID of the candidate, e.g., "BOB_100+BOB3".
+    """
+    return (
+        hundred_coin_star_id + HUNDRED_COIN_CANDIDATE_SEPARATOR + combined_with_star_id
+    )
+
+
+def get_config_star_id(star_id: str) -> str:
+    """Get the ID a star is listed under in the user's config.
+
+    Args:
+        star_id: A star ID, which may be of a 100 coin star candidate.
+
+    Returns:
+        The ID of the candidate's 100 coin star for 100 coin star
+        candidates, and the passed in star ID otherwise.
+    """
+    return star_id.partition(HUNDRED_COIN_CANDIDATE_SEPARATOR)[0]
+
+
+def describe_star_id(star_id: str) -> str:
+    """Describe a star ID for output.
+
+    100 coin star candidate IDs are only used within the optimizer, so a
+    candidate is described by its 100 coin star's ID along with the star
+    it's combined with.
+
+    Args:
+        star_id: A star ID, which may be of a 100 coin star candidate.
+
+    Returns:
+        A description of the star ID, such as "BOB_100 (with BOB3)" for
+        100 coin star candidates, and the passed in star ID otherwise.
+    """
+    config_star_id, _, combined_with_star_id = star_id.partition(
+        HUNDRED_COIN_CANDIDATE_SEPARATOR
+    )
+
+    if not combined_with_star_id:
+        return star_id
+
+    return f"{config_star_id} (with {combined_with_star_id})"
+
+
+def describe_star_ids(star_ids: Iterable[str]) -> str:
+    """Describe star IDs for output.
+
+    Args:
+        star_ids: An iterable of star IDs, which may be of 100 coin star
+          candidates.
+
+    Returns:
+        The sorted descriptions of the star IDs (see describe_star_id),
+        separated by spaces.
+    """
+    return " ".join(sorted(describe_star_id(star_id) for star_id in star_ids))
+
+
+def get_100_coin_star_candidates(
+    config_100_coin_times: dict[str, dict | list[dict]],
+) -> dict[str, dict[str, list[float] | str]]:
+    """Get each 100 coin star the optimizer can choose from.
+
+    A course's 100 coin star is listed in the user's data either with a
+    single star it's combined with or with a list of candidates, each
+    combined with a different star. A 100 coin star with a single
+    candidate keeps its ID; otherwise each candidate gets its own ID
+    (see get_100_coin_candidate_star_id), and the optimizer picks at
+    most one candidate per course.
+
+    Args:
+        config_100_coin_times: A dictionary of 100 coin star times from
+          the user's data.
+
+    Returns:
+        A dictionary of 100 coin star times in the same form as the
+        user's data, but with a single candidate per key.
+    """
+    hundred_coin_star_candidates = {}
+
+    for hundred_coin_star_id, hundred_coin_star_data in config_100_coin_times.items():
+        if isinstance(hundred_coin_star_data, dict):
+            hundred_coin_star_candidates[hundred_coin_star_id] = hundred_coin_star_data
+        elif len(hundred_coin_star_data) == 1:
+            hundred_coin_star_candidates[hundred_coin_star_id] = hundred_coin_star_data[
+                0
+            ]
+        else:
+            for candidate_data in hundred_coin_star_data:
+                hundred_coin_star_candidates[
+                    get_100_coin_candidate_star_id(
+                        hundred_coin_star_id,
+                        candidate_data[ConfigKeys.HUNDRED_COIN_COMBINED_WITH],
+                    )
+                ] = candidate_data
+
+    return hundred_coin_star_candidates
+
+
+@functools.cache
+def get_star_course_ids_dict() -> dict[str, str]:
+    """Build a dictionary which contains each star's course ID.
+
+    Returns:
+        A dictionary which has star IDs (including those of all possible
+        100 coin stars) as keys and their courses' IDs as values.
+    """
+    star_course_ids_dict = {}
+
+    for course in COURSES:
+        course_id = course[DataKeys.COURSE_ID]
+
+        for star in course[DataKeys.COURSE_STARS]:
+            star_course_ids_dict[star[DataKeys.STAR_ID]] = course_id
+
+        if course_id != DataKeys.COURSE_CASTLE_ID:
+            star_course_ids_dict[get_100_coin_star_id(course_id)] = course_id
+
+    return star_course_ids_dict
 
 
 def get_star_times_list_dict(
     config_times: dict[str, list[float]],
-    config_100_coin_times: dict[str, dict[str, list[float] | str]],
+    config_100_coin_times: dict[str, dict | list[dict]],
 ) -> dict[str, list[float]]:
     """Parse all star times from user data into a dictionary.
 
@@ -104,7 +257,9 @@ def get_star_times_list_dict(
     """
     star_times_list_dict = config_times.copy()
 
-    for hundred_coin_star_id, hundred_coin_star_data in config_100_coin_times.items():
+    for hundred_coin_star_id, hundred_coin_star_data in get_100_coin_star_candidates(
+        config_100_coin_times
+    ).items():
         star_times_list_dict[hundred_coin_star_id] = hundred_coin_star_data[
             ConfigKeys.HUNDRED_COIN_TIMES
         ]
@@ -150,36 +305,6 @@ def get_star_time_tuples(
     return star_time_tuples
 
 
-def filter_star_time_tuples(
-    star_time_tuples: Iterable[tuple[float, str]],
-    excluded_course_ids: set[str],
-    excluded_star_ids: set[str],
-) -> list[tuple[float, str]]:
-    """Filter out stars from star time tuples.
-
-    Args:
-        star_time_tuples: An iterable of tuples (time, star_id) where
-            star_ids are star IDs eligible to be in a route and time is
-            the time a star takes.
-        excluded_course_ids: A set containing course IDs to exclude.
-        excluded_star_ids: A set containing star IDs to exclude.
-
-    Returns:
-        A list of star time tuples filtered to exclude stars with given
-        course IDs or star IDs.
-    """
-    new_star_time_tuples = []
-
-    for time, star_id in star_time_tuples:
-        if (
-            get_course_id_from_star_id(star_id) not in excluded_course_ids
-            and star_id not in excluded_star_ids
-        ):
-            new_star_time_tuples.append((time, star_id))
-
-    return new_star_time_tuples
-
-
 def build_star_times_dict_from_star_time_tuples(
     star_time_tuples: Iterable[tuple[float, str]],
 ) -> dict[str, float]:
@@ -197,10 +322,14 @@ def build_star_times_dict_from_star_time_tuples(
 
 
 def build_base_star_alts_dict(
-    config_100_coin_times: dict[str, dict[str, list[float] | str]],
+    config_100_coin_times: dict[str, dict | list[dict]],
 ) -> dict[str, str]:
     """Build a dictionary with 100 coin star alternatives for base stars.
 
+    For a course with several 100 coin star candidates, each candidate
+    is an alternative for the star it's combined with (see
+    get_100_coin_star_candidates).
+
     Args:
         config_100_coin_times: A dictionary of 100 coin star times from
           the user's data.
@@ -211,7 +340,9 @@ def build_base_star_alts_dict(
     """
     base_star_alts_dict = {}
 
-    for hundred_coin_star_id, hundred_coin_star_data in config_100_coin_times.items():
+    for hundred_coin_star_id, hundred_coin_star_data in get_100_coin_star_candidates(
+        config_100_coin_times
+    ).items():
         base_star_alts_dict[
             hundred_coin_star_data[ConfigKeys.HUNDRED_COIN_COMBINED_WITH]
         ] = hundred_coin_star_id
@@ -267,27 +398,6 @@ def build_num_stars_required_dict(course_data: list[dict]) -> dict[str, int]:
     return num_stars_required_dict
 
 
-def build_star_locations_dict(course_data: list[dict]) -> dict[str, int]:
-    """Build a dictionary which contains each star's location.
-
-    Args:
-        course_data: Course data coming from the course_data module or
-          after being processed to adjust star count requirements and add
-          in 100 coin stars from user data.
-
-    Returns:
-        A dictionary which has star IDs as keys and their locations as
-        values.
-    """
-    star_locations_dict = {}
-
-    for course in course_data:
-        for star in course[DataKeys.COURSE_STARS]:
-            star_locations_dict[star[DataKeys.STAR_ID]] = star[DataKeys.STAR_LOCATION]
-
-    return star_locations_dict
-
-
 def adjust_course_data_star_count_requirements_from_prerequisites(
     prerequisites_dict: dict[str, list[str]],
 ) -> list[dict]:
@@ -349,7 +459,7 @@ def adjust_course_data_star_count_requirements_from_prerequisites(
 
 def augment_course_data_with_user_100_coin_stars(
     course_data: list[dict],
-    config_100_coin_times: dict[str, dict[str, list[float] | str]],
+    config_100_coin_times: dict[str, dict | list[dict]],
 ) -> list[dict]:
     """Augment course data with user listed 100 coin stars.
 
@@ -370,7 +480,9 @@ def augment_course_data_with_user_100_coin_stars(
     """
     course_data_copy = copy.deepcopy(course_data)
 
-    for hundred_coin_star_id, hundred_coin_star_data in config_100_coin_times.items():
+    for hundred_coin_star_id, hundred_coin_star_data in get_100_coin_star_candidates(
+        config_100_coin_times
+    ).items():
         # Get course's star list that we want to insert this star into
         course_id = get_course_id_from_star_id(hundred_coin_star_id)
         course = next(d for d in course_data_copy if d[DataKeys.COURSE_ID] == course_id)
@@ -400,7 +512,7 @@ def augment_course_data_with_user_100_coin_stars(
 
 def adjust_and_augment_course_data(
     prerequisites_dict: dict[str, list[str]],
-    config_100_coin_times: dict[str, dict[str, list[float] | str]],
+    config_100_coin_times: dict[str, dict | list[dict]],
 ) -> list[dict]:
     """Adjust the star count requirements and add in 100 coin stars to course data.
 
@@ -425,6 +537,23 @@ def adjust_and_augment_course_data(
     )
 
 
+def get_canonical_hash(data) -> str:
+    """Get a hash of JSON-serializable data.
+
+    Dictionaries which are equal have the same hash regardless of the
+    order of their keys.
+
+    Args:
+        data: The data to hash.
+
+    Returns:
+        A hex digest of the SHA-256 hash of the data's canonical JSON.
+    """
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
 def convert_seconds_to_minutes_and_remaining_seconds(
     seconds: float,
 ) -> tuple[int, float]:
@@ -439,72 +568,232 @@ def convert_seconds_to_minutes_and_remaining_seconds(
     return (int(seconds // 60), seconds % 60)
 
 
-def build_num_stars_per_location_dict(
-    route_star_ids: set[str], course_data: list[dict]
-) -> dict[str, int]:
-    """Build a dictionary which enumerates each location's star count given a route.
+def format_route_time(seconds: float) -> str:
+    """Format a number of seconds as minutes and seconds (e.g., 61:05.55).
 
     Args:
-        route_star_ids: A set containing the star IDs in a route.
-        course_data: Course data coming from the course_data module; the
-          data should be augmented with the 100 coin stars listed in the
-          user config data using functionality in the util module.
+        seconds: The number of seconds to format.
 
     Returns:
-        A dictionary with locations as keys and the number of stars in
-        the route from that location as values.
+        The formatted time.
     """
-    num_stars_per_location_dict = {location: 0 for location in ALL_LOCATIONS}
+    minutes, remaining_seconds = convert_seconds_to_minutes_and_remaining_seconds(
+        seconds
+    )
 
-    hundred_coin_star_ids = get_all_possible_100_coin_star_ids()
+    return f"{minutes}:{remaining_seconds:05.2f}"
 
-    for course in course_data:
-        for star in course[DataKeys.COURSE_STARS]:
-            star_id = star[DataKeys.STAR_ID]
 
-            if star_id in route_star_ids:
-                star_increment = 2 if star_id in hundred_coin_star_ids else 1
+def convert_time_string_to_seconds(time_string: str) -> float:
+    """Convert a time given as seconds or as minutes and seconds to seconds.
 
-                num_stars_per_location_dict[
-                    star[DataKeys.STAR_LOCATION]
-                ] += star_increment
+    Args:
+        time_string: A time such as "3665.5" or "61:05.5".
 
-    return num_stars_per_location_dict
+    Returns:
+        The number of seconds.
 
+    Raises:
+        ValueError: If the time isn't in either format.
+    """
+    minutes, _, seconds = time_string.rpartition(":")
 
-def build_num_stars_per_course_dict(
-    route_star_ids: set[str], course_data: list[dict]
-) -> dict[str, int]:
-    """Build a dictionary which enumerates each course's star count given a route.
+    return int(minutes or 0) * 60 + float(seconds)
 
-    This includes all course IDs as keys, not just for courses for which
-    the user has times.
+
+def parse_objective(objective_string: str) -> tuple[str, float]:
+    """Parse an objective such as "mean", "mean+1.5sd", or "p90".
 
     Args:
-        route_star_ids: A set containing the star IDs in a route.
-        course_data: Course data coming from the course_data module; the
-          data should be augmented with the 100 coin stars listed in the
-          user config data using functionality in the util module.
+        objective_string: The objective: "mean"; "mean+Ksd" for the
+          mean plus K standard deviations; or "pN" for the Nth
+          percentile.
 
     Returns:
-        A dictionary with course IDs as keys and the number of stars in
-        the route from that course as values.
+        A two-tuple containing the objective kind and its parameter (see
+        Objectives in the constants module).
+
+    Raises:
+        ValueError: If the objective isn't in any of the formats.
     """
-    num_stars_per_course_dict = {}
+    if objective_string == Objectives.MEAN:
+        return (Objectives.MEAN, 0.0)
 
-    hundred_coin_star_ids = get_all_possible_100_coin_star_ids()
+    if objective_string.startswith("mean+") and objective_string.endswith("sd"):
+        num_standard_deviations = float(objective_string[len("mean+") : -len("sd")])
 
-    for course in course_data:
-        course_id = course[DataKeys.COURSE_ID]
+        if num_standard_deviations >= 0:
+            return (Objectives.MEAN_PLUS_SD, num_standard_deviations)
 
-        num_stars_per_course_dict[course_id] = 0
+    if objective_string.startswith("p"):
+        percentile = float(objective_string[len("p") :])
+
+        if 0 <= percentile <= 100:
+            return (Objectives.QUANTILE, percentile / 100)
+
+    raise ValueError(f"Invalid objective {objective_string!r}.")
 
-        for star in course[DataKeys.COURSE_STARS]:
-            star_id = star[DataKeys.STAR_ID]
 
-            if star_id in route_star_ids:
-                star_increment = 2 if star_id in hundred_coin_star_ids else 1
+def parse_improvement(improvement_string: str) -> tuple[float, float]:
+    """Parse a star time improvement such as "5" or "10%".
 
-                num_stars_per_course_dict[course_id] += star_increment
+    Args:
+        improvement_string: The improvement: a number of seconds; or a
+          percentage of the star's average time, ending in "%".
+
+    Returns:
+        A two-tuple containing the number of seconds and the fraction of
+        the star's average time by which the star is improved, one of
+        which is 0.
+
+    Raises:
+        ValueError: If the improvement isn't in either of the formats or
+          is negative.
+    """
+    if improvement_string.endswith("%"):
+        improvement = (0.0, float(improvement_string[: -len("%")]) / 100)
+    else:
+        improvement = (float(improvement_string), 0.0)
+
+    if min(improvement) < 0:
+        raise ValueError(f"Invalid improvement {improvement_string!r}.")
+
+    return improvement
+
+
+def describe_objective(objective: tuple[str, float]) -> str:
+    """Describe an objective in words.
+
+    Args:
+        objective: A two-tuple containing an objective kind and its
+          parameter.
+
+    Returns:
+        A description of the objective, such as "mean + 1.5 SD".
+    """
+    objective_kind, objective_parameter = objective
+
+    if objective_kind == Objectives.MEAN_PLUS_SD:
+        return f"mean + {objective_parameter:g} SD"
+
+    if objective_kind == Objectives.QUANTILE:
+        return f"{100 * objective_parameter:g}th percentile"
+
+    return "mean"
+
+
+def build_upper_level_sweep_table(
+    routes: list[tuple[set[str], float] | None],
+) -> str:
+    """Build a plain text table of the routes for each upper level limit.
+
+    Args:
+        routes: A list indexed by the maximum number of upper level
+          stars containing two-tuples of (1) the set containing the star
+          IDs in a route and (2) the time that route takes; or None where
+          no route is possible.
+
+    Returns:
+        A string containing a table with a row for each limit giving the
+        route time and the star IDs in the route.
+    """
+    lines = [f"{'Cap':>3}  {'Route time':>10}  Stars"]
+
+    for max_num_upper_level_stars, route in enumerate(routes):
+        if route is None:
+            lines.append(f"{max_num_upper_level_stars:>3}  {'-':>10}  -")
+
+            continue
+
+        route_star_ids, route_time = route
+        route_minutes, route_remaining_seconds = (
+            convert_seconds_to_minutes_and_remaining_seconds(route_time)
+        )
+
+        lines.append(
+            f"{max_num_upper_level_stars:>3}"
+            f"  {route_minutes:>4}:{route_remaining_seconds:05.2f}"
+            f"  {describe_star_ids(route_star_ids)}"
+        )
+
+    return "\n".join(lines)
+
+
+def build_risk_sweep_table(
+    rows: list[tuple[float, float, float, float, set[str]]],
+) -> str:
+    """Build a plain text table of the routes for each risk level.
+
+    Args:
+        rows: A list containing, for each risk level, five-tuples of (1)
+          the number of standard deviations added to each star's mean
+          time, (2) the sum of the route's star costs, (3) the time the
+          route takes, (4) the standard deviation of the route's time,
+          and (5) the set containing the star IDs in the route.
+
+    Returns:
+        A string containing a table with a row for each risk level
+        giving the route's cost, time, and standard deviation, and the
+        star IDs in the route.
+    """
+    lines = [f"{'K':>5}  {'Cost':>8}  {'Route time':>10}  {'SD':>6}  Stars"]
+
+    for (
+        num_standard_deviations,
+        route_objective_value,
+        route_time,
+        route_standard_deviation,
+        route_star_ids,
+    ) in rows:
+        lines.append(
+            f"{num_standard_deviations:>5g}"
+            f"  {format_route_time(route_objective_value):>8}"
+            f"  {format_route_time(route_time):>10}"
+            f"  {route_standard_deviation:>6.2f}"
+            f"  {describe_star_ids(route_star_ids)}"
+        )
+
+    return "\n".join(lines)
+
+
+def build_practice_priority_table(
+    rows: list[tuple[str, float, float, bool, float]],
+) -> str:
+    """Build a plain text table of stars ranked for practice.
+
+    Args:
+        rows: A list containing, for each star, five-tuples of (1) the
+          star ID, (2) the star's average time, (3) the star's improved
+          time, (4) whether the star is in the fastest route, and (5)
+          how many seconds faster the fastest route gets if the star is
+          improved.
+
+    Returns:
+        A string containing a table with a row for each star giving its
+        time, improved time, the route time gain, and whether it's in
+        the route.
+    """
+    # Make the star column wide enough for 100 coin star candidates
+    star_column_width = max([12, *(len(describe_star_id(row[0])) for row in rows)])
+
+    lines = [
+        f"{'Star':<{star_column_width}}  {'Time':>7}  {'Improved':>8}"
+        f"  {'Gain':>6}  In route"
+    ]
+
+    for (
+        star_id,
+        star_time,
+        improved_star_time,
+        star_is_in_route,
+        route_time_gain,
+    ) in rows:
+        lines.append(
+            f"{describe_star_id(star_id):<{star_column_width}}"
+            f"  {star_time:>7.2f}"
+            f"  {improved_star_time:>8.2f}"
+            f"  {route_time_gain:>6.2f}"
+            f"  {'yes' if star_is_in_route else 'no'}"
+        )
 
-    return num_stars_per_course_dict
+    return "\n".join(lines)
@@ -0,0 +1,167 @@
+"""Tests for 100 coin stars with several candidates."""
+
+import unittest
+from optimizer.config import validate_config_data
+from optimizer.constants import ConfigKeys, HUNDRED_COIN_CANDIDATE_SEPARATOR
+from optimizer.exceptions import ConfigFileInvalid
+from optimizer.optimize import get_optimal_routes
+from optimizer.optimize_dp import get_optimal_route_dp
+from optimizer.problem import Problem
+from optimizer.util import (
+    describe_star_id,
+    get_100_coin_star_candidates,
+    get_config_star_id,
+)
+from .test_engines import make_config_data
+
+
+def make_candidates_config_data(seed: int) -> dict:
+    """Make config data in which two 100 coin stars have two candidates.
+
+    BOB_100 can be combined with BOB1 or BOB3 and DDD_100 with DDD1 or
+    DDD2. The candidates are fast enough that routes use them, and which
+    of each is faster depends on the seed.
+
+    Args:
+        seed: The seed for the random star times.
+
+    Returns:
+        The config data.
+    """
+    config_data = make_config_data(seed)
+    first_time, second_time = (30.0, 90.0) if seed % 2 else (90.0, 30.0)
+
+    config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE].update(
+        BOB_100=[
+            {"times": [first_time], "combined_with": "BOB1"},
+            {"times": [second_time], "combined_with": "BOB3"},
+        ],
+        DDD_100=[
+            {"times": [first_time], "combined_with": "DDD1"},
+            {"times": [second_time], "combined_with": "DDD2"},
+        ],
+    )
+
+    return config_data
+
+
+class TestHundredCoinStarCandidates(unittest.TestCase):
+    """Routes use at most one candidate per course and report it right."""
+
+    def test_candidates(self):
+        self.assertEqual(
+            set(
+                get_100_coin_star_candidates(
+                    make_candidates_config_data(0)[ConfigKeys.HUNDRED_COIN_TIMES_TABLE]
+                )
+            ),
+            {
+                "BOB_100+BOB1",
+                "BOB_100+BOB3",
+                "WF_100",
+                "CCM_100",
+                "DDD_100+DDD1",
+                "DDD_100+DDD2",
+            },
+        )
+
+        # A list with a single candidate keeps the 100 coin star's ID
+        self.assertEqual(
+            get_100_coin_star_candidates(
+                {"BOB_100": [{"times": [40.0], "combined_with": "BOB1"}]}
+            ),
+            {"BOB_100": {"times": [40.0], "combined_with": "BOB1"}},
+        )
+
+    def test_routes(self):
+        for seed in range(4):
+            config_data = make_candidates_config_data(seed)
+            combined_with_star_ids = {
+                star_id: star_data[ConfigKeys.HUNDRED_COIN_COMBINED_WITH]
+                for star_id, star_data in get_100_coin_star_candidates(
+                    config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE]
+                ).items()
+            }
+            problem = Problem(config_data)
+            star_time_tuples = problem.get_eligible_star_time_tuples(set(), set())
+
+            for max_num_upper_level_stars in (22, 70):
+                with self.subTest(
+                    seed=seed, max_num_upper_level_stars=max_num_upper_level_stars
+                ):
+                    optimize_kwargs = {
+                        "max_num_upper_level_stars": max_num_upper_level_stars,
+                        **problem.get_structure_kwargs(),
+                    }
+
+                    routes, _ = get_optimal_routes(
+                        star_time_tuples=list(star_time_tuples), **optimize_kwargs
+                    )
+                    route_star_ids, route_time = routes[0]
+                    _, dp_route_time = get_optimal_route_dp(
+                        star_time_tuples=list(star_time_tuples), **optimize_kwargs
+                    )
+
+                    self.assertAlmostEqual(route_time, dp_route_time, places=6)
+
+                    # At most one of each course's candidates is chosen,
+                    # and never along with the star it's combined with
+                    hundred_coin_star_ids = [
+                        star_id
+                        for star_id in route_star_ids
+                        if star_id in combined_with_star_ids
+                    ]
+                    config_star_ids = [
+                        get_config_star_id(star_id) for star_id in hundred_coin_star_ids
+                    ]
+
+                    self.assertEqual(len(config_star_ids), len(set(config_star_ids)))
+                    self.assertLessEqual({"BOB_100", "DDD_100"}, set(config_star_ids))
+
+                    for star_id in hundred_coin_star_ids:
+                        self.assertNotIn(
+                            combined_with_star_ids[star_id], route_star_ids
+                        )
+
+                    # The route's JSON lists 100 coin stars under their
+                    # config IDs
+                    route_json = problem.get_route_json(route_star_ids)
+
+                    self.assertFalse(
+                        any(
+                            HUNDRED_COIN_CANDIDATE_SEPARATOR in star_id
+                            for star_id in route_json["route_star_ids"]
+                        )
+                    )
+                    self.assertEqual(
+                        route_json["combined_with"],
+                        {
+                            get_config_star_id(star_id): combined_with_star_ids[star_id]
+                            for star_id in hundred_coin_star_ids
+                        },
+                    )
+
+    def test_describe_star_id(self):
+        for star_id, description in (
+            ("BOB_100+BOB3", "BOB_100 (with BOB3)"),
+            ("BOB_100", "BOB_100"),
+            ("BOB3", "BOB3"),
+        ):
+            with self.subTest(star_id=star_id):
+                self.assertEqual(describe_star_id(star_id), description)
+
+    def test_duplicate_candidates_are_invalid(self):
+        config_data = make_candidates_config_data(0)
+
+        self.assertIs(validate_config_data(config_data, "Config"), config_data)
+
+        config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE]["BOB_100"][1][
+            "combined_with"
+        ] = "BOB1"
+
+        with self.assertRaises(ConfigFileInvalid):
+            validate_config_data(config_data, "Config")
+
+
+if __name__ == "__main__":
+    unittest.main()
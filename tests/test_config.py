@@ -0,0 +1,87 @@
+"""Tests for config validation."""
+
+import unittest
+from optimizer.config import CONFIG_DATA_SCHEMA, get_schema_errors
+
+
+class TestGetSchemaErrors(unittest.TestCase):
+    """Config data is checked like Cerberus would check it."""
+
+    def setUp(self):
+        self.config_data = {
+            "times": {},
+            "hundred_coin_times": {},
+            "prerequisites": {},
+        }
+
+    def test_valid(self):
+        self.config_data["times"]["BOB1"] = [12, 13.5]
+        self.config_data["hundred_coin_times"]["BOB_100"] = {
+            "times": [100.0],
+            "combined_with": "BOB1",
+        }
+        self.config_data["prerequisites"]["BOB2"] = ["BOB1"]
+
+        self.assertEqual(get_schema_errors(self.config_data, CONFIG_DATA_SCHEMA), [])
+
+    def test_required_fields(self):
+        self.assertEqual(
+            get_schema_errors({}, CONFIG_DATA_SCHEMA),
+            [
+                "times: required field",
+                "hundred_coin_times: required field",
+                "prerequisites: required field",
+            ],
+        )
+
+    def test_unknown_fields(self):
+        self.config_data["extra"] = 1
+
+        self.assertEqual(
+            get_schema_errors(self.config_data, CONFIG_DATA_SCHEMA),
+            ["extra: unknown field"],
+        )
+
+    def test_booleans_are_rejected(self):
+        self.config_data["times"]["BOB1"] = [True, 12.0]
+
+        self.assertEqual(
+            get_schema_errors(self.config_data, CONFIG_DATA_SCHEMA),
+            ["times.BOB1[0]: must be of float type"],
+        )
+
+    def test_unallowed_values(self):
+        self.config_data["times"]["NOT_A_STAR"] = [12.0]
+
+        self.assertEqual(
+            get_schema_errors(self.config_data, CONFIG_DATA_SCHEMA),
+            ["times.NOT_A_STAR: unallowed value 'NOT_A_STAR'"],
+        )
+
+    def test_anyof_reports_errors_for_the_matching_type(self):
+        for hundred_coin_star_data, errors in (
+            (
+                {"times": [100.0]},
+                ["hundred_coin_times.BOB_100.combined_with: required field"],
+            ),
+            (
+                [{"times": [100.0], "combined_with": "BOB1"}, {"times": [100.0]}],
+                ["hundred_coin_times.BOB_100[1].combined_with: required field"],
+            ),
+            (
+                100.0,
+                ["hundred_coin_times.BOB_100: must be of dict or list type"],
+            ),
+        ):
+            with self.subTest(hundred_coin_star_data=hundred_coin_star_data):
+                self.config_data["hundred_coin_times"][
+                    "BOB_100"
+                ] = hundred_coin_star_data
+
+                self.assertEqual(
+                    get_schema_errors(self.config_data, CONFIG_DATA_SCHEMA), errors
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Tests comparing the partition and dynamic programming engines."""
+
+import random
+import tomllib
+import unittest
+from optimizer.constants import ConfigKeys, EXAMPLE_CONFIG_FILE, UPPER_LEVEL_LOCATIONS
+from optimizer.optimize import get_optimal_routes
+from optimizer.optimize_dp import get_optimal_route_dp
+from optimizer.problem import Problem
+
+
+def make_config_data(seed: int) -> dict:
+    """Make config data from the example config with random star times.
+
+    Args:
+        seed: The seed for the random star times.
+
+    Returns:
+        The config data, in which every star has times.
+    """
+    with open(EXAMPLE_CONFIG_FILE, "rb") as f:
+        config_data = tomllib.load(f)
+
+    rng = random.Random(seed)
+
+    for star_id in config_data[ConfigKeys.TIMES_TABLE]:
+        config_data[ConfigKeys.TIMES_TABLE][star_id] = [
+            60 + max(-50, rng.gauss(0, 20)) for _ in range(2)
+        ]
+
+    for star_data in config_data[ConfigKeys.HUNDRED_COIN_TIMES_TABLE].values():
+        star_data[ConfigKeys.HUNDRED_COIN_TIMES] = [100 + rng.gauss(0, 30)]
+
+    return config_data
+
+
+def make_problem(seed: int) -> Problem:
+    """Make a problem from the example config with random star times.
+
+    Args:
+        seed: The seed for the random star times.
+
+    Returns:
+        The problem, in which every star has times.
+    """
+    return Problem(make_config_data(seed))
+
+
+class TestEnginesAgree(unittest.TestCase):
+    """Both engines find routes with the same time."""
+
+    def test_upper_level_star_limit(self):
+        for seed in range(4):
+            problem = make_problem(seed)
+            star_time_tuples = problem.get_eligible_star_time_tuples(set(), set())
+
+            for max_num_upper_level_stars in (12, 19, 22, 25, 70):
+                with self.subTest(
+                    seed=seed, max_num_upper_level_stars=max_num_upper_level_stars
+                ):
+                    optimize_kwargs = {
+                        "max_num_upper_level_stars": max_num_upper_level_stars,
+                        **problem.get_structure_kwargs(),
+                    }
+
+                    routes, search_completed = get_optimal_routes(
+                        star_time_tuples=list(star_time_tuples), **optimize_kwargs
+                    )
+                    route_star_ids, route_time = routes[0]
+                    _, dp_route_time = get_optimal_route_dp(
+                        star_time_tuples=list(star_time_tuples), **optimize_kwargs
+                    )
+
+                    self.assertTrue(search_completed)
+                    self.assertAlmostEqual(route_time, dp_route_time, places=6)
+                    self.assertLessEqual(
+                        sum(
+                            num_stars
+                            for location, num_stars in (
+                                problem.count_route_stars_per_location(
+                                    route_star_ids
+                                ).items()
+                            )
+                            if location in UPPER_LEVEL_LOCATIONS
+                        ),
+                        max_num_upper_level_stars,
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
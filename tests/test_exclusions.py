@@ -0,0 +1,161 @@
+"""Tests for the precomputed exclusion table."""
+
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+from optimizer.exclusions import (
+    get_excludable_course_ids,
+    get_exclusion_table_key,
+    load_exclusion_route,
+    precompute_exclusions,
+    write_exclusion_table,
+)
+from optimizer.exceptions import NoValidRoutePossible
+from optimizer.optimize import get_optimal_routes
+from .test_engines import make_config_data, make_problem
+
+
+class TestExclusionTable(unittest.TestCase):
+    """Routes looked up in the table match routes found directly."""
+
+    def setUp(self):
+        temporary_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_dir.cleanup)
+
+        self.table_path = pathlib.Path(temporary_dir.name) / "exclusions.sqlite3"
+        self.problem = make_problem(0)
+        self.table_key = get_exclusion_table_key(
+            problem=self.problem,
+            config_data=make_config_data(0),
+            excluded_star_ids=set(),
+            max_num_upper_level_stars=70,
+        )
+
+        # Only cover three courses, so that there are eight sets of
+        # excluded courses rather than 16,384. Worker processes are
+        # forked, so they see the patched function too.
+        self.excludable_course_ids = get_excludable_course_ids(self.problem)[-3:]
+
+        with mock.patch(
+            "optimizer.exclusions.get_excludable_course_ids",
+            return_value=self.excludable_course_ids,
+        ):
+            precompute_exclusions(
+                problem=self.problem,
+                table_key=self.table_key,
+                table_path=self.table_path,
+                excluded_star_ids=set(),
+                max_num_upper_level_stars=70,
+                num_processes=1,
+            )
+
+    def test_routes_match_direct_solves(self):
+        for excluded_courses_mask in range(1 << len(self.excludable_course_ids)):
+            excluded_course_ids = {
+                course_id
+                for bit, course_id in enumerate(self.excludable_course_ids)
+                if excluded_courses_mask >> bit & 1
+            }
+
+            with self.subTest(excluded_course_ids=excluded_course_ids):
+                optimize_kwargs = {
+                    "star_time_tuples": self.problem.get_eligible_star_time_tuples(
+                        excluded_course_ids=excluded_course_ids,
+                        excluded_star_ids=set(),
+                    ),
+                    "max_num_upper_level_stars": 70,
+                    **self.problem.get_structure_kwargs(),
+                }
+                lookup_kwargs = {
+                    "table_path": self.table_path,
+                    "table_key": self.table_key,
+                    "excluded_course_ids": excluded_course_ids,
+                }
+
+                try:
+                    routes, _ = get_optimal_routes(**optimize_kwargs)
+                except NoValidRoutePossible:
+                    with self.assertRaises(NoValidRoutePossible):
+                        load_exclusion_route(**lookup_kwargs)
+
+                    continue
+
+                route_star_ids, route_time = load_exclusion_route(**lookup_kwargs)
+
+                self.assertAlmostEqual(route_time, routes[0][1], places=6)
+                self.assertAlmostEqual(
+                    self.problem.get_route_time(route_star_ids), route_time, places=6
+                )
+                self.assertFalse(
+                    any(
+                        self.problem.count_route_stars_per_course(route_star_ids)[
+                            course_id
+                        ]
+                        for course_id in excluded_course_ids
+                    )
+                )
+
+    def test_round_trip(self):
+        table_path = self.table_path.with_name("written.sqlite3")
+        star_ids = ["BOB1", "BOB2", "WF1", "WF2", "JRB1"]
+        routes = {0b00: ({"BOB1", "WF2", "JRB1"}, 12.5), 0b01: None}
+
+        write_exclusion_table(
+            table_path=table_path,
+            table_key="key",
+            star_ids=star_ids,
+            excludable_course_ids=["BOB", "WF"],
+            routes=routes,
+        )
+
+        self.assertEqual(
+            load_exclusion_route(
+                table_path=table_path, table_key="key", excluded_course_ids=set()
+            ),
+            routes[0b00],
+        )
+
+        with self.assertRaises(NoValidRoutePossible):
+            load_exclusion_route(
+                table_path=table_path, table_key="key", excluded_course_ids={"BOB"}
+            )
+
+        # Sets of excluded courses without a row
+        self.assertIsNone(
+            load_exclusion_route(
+                table_path=table_path, table_key="key", excluded_course_ids={"WF"}
+            )
+        )
+
+    def test_unusable_lookups(self):
+        # A table for a different problem
+        self.assertIsNone(
+            load_exclusion_route(
+                table_path=self.table_path,
+                table_key="other",
+                excluded_course_ids=set(),
+            )
+        )
+
+        # Excluded courses which the table doesn't cover
+        self.assertIsNone(
+            load_exclusion_route(
+                table_path=self.table_path,
+                table_key=self.table_key,
+                excluded_course_ids={get_excludable_course_ids(self.problem)[0]},
+            )
+        )
+
+        # No table at all
+        self.assertIsNone(
+            load_exclusion_route(
+                table_path=self.table_path.with_name("missing.sqlite3"),
+                table_key=self.table_key,
+                excluded_course_ids=set(),
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
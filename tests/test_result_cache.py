@@ -0,0 +1,92 @@
+"""Tests for the on-disk route cache."""
+
+import os
+import pathlib
+import tempfile
+import time
+import unittest
+from optimizer.constants import Engines
+from optimizer import result_cache
+from .test_engines import make_config_data
+
+
+class TestResultCache(unittest.TestCase):
+    """Routes are stored, loaded, and evicted correctly."""
+
+    def setUp(self):
+        temporary_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_dir.cleanup)
+
+        self.cache_dir = pathlib.Path(temporary_dir.name) / "cache"
+        self.routes = [({"BOB1", "WF1"}, 12.5), ({"BOB2", "WF1"}, 13.0)]
+
+    def test_round_trip(self):
+        result_cache.store_routes(
+            self.cache_dir, "problem", self.routes, max_cache_size=10**6
+        )
+
+        self.assertEqual(
+            result_cache.load_routes(self.cache_dir, "problem"), self.routes
+        )
+        self.assertIsNone(result_cache.load_routes(self.cache_dir, "other"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        result_cache.store_routes(
+            self.cache_dir, "a", self.routes, max_cache_size=10**6
+        )
+        entry_size = (self.cache_dir / "a.json").stat().st_size
+
+        for problem_hash in ("b", "c"):
+            result_cache.store_routes(
+                self.cache_dir, problem_hash, self.routes, max_cache_size=10**6
+            )
+
+        # Make a the oldest entry, and then use it
+        now = time.time()
+
+        for age, problem_hash in enumerate(("c", "b", "a"), start=1):
+            os.utime(self.cache_dir / f"{problem_hash}.json", (now - age, now - age))
+
+        result_cache.load_routes(self.cache_dir, "a")
+        result_cache.store_routes(
+            self.cache_dir, "d", self.routes, max_cache_size=3 * entry_size
+        )
+
+        self.assertEqual(
+            {entry_path.stem for entry_path in self.cache_dir.glob("*.json")},
+            {"a", "c", "d"},
+        )
+
+    def test_problem_hash(self):
+        config_data = make_config_data(0)
+        hash_kwargs = {
+            "star_times_dict": {"BOB1": 12.5, "WF1": 30.0},
+            "config_data": config_data,
+            "max_num_upper_level_stars": 70,
+            "engine": Engines.PARTITION,
+            "num_routes": 1,
+        }
+        problem_hash = result_cache.get_route_problem_hash(**hash_kwargs)
+
+        self.assertEqual(
+            result_cache.get_route_problem_hash(
+                **{**hash_kwargs, "config_data": make_config_data(0)}
+            ),
+            problem_hash,
+        )
+
+        for key, value in (
+            ("star_times_dict", {"BOB1": 12.5, "WF1": 31.0}),
+            ("max_num_upper_level_stars", 22),
+            ("engine", Engines.DP),
+            ("num_routes", 2),
+        ):
+            with self.subTest(key=key):
+                self.assertNotEqual(
+                    result_cache.get_route_problem_hash(**{**hash_kwargs, key: value}),
+                    problem_hash,
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
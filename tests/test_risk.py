@@ -0,0 +1,52 @@
+"""Tests for the star time statistics behind risk-aware objectives."""
+
+import unittest
+import numpy as np
+from optimizer.risk import get_star_time_quantiles, get_star_time_statistics
+
+
+# Times recorded for each star, including a star with a single time and
+# stars without times
+STAR_TIME_SAMPLES = [
+    [3.0, 1.0, 2.0],
+    [],
+    [5.0],
+    [1.5, 2.5, 0.5, 4.0, 4.0],
+    [],
+    [10.0, 7.0],
+]
+
+
+class TestStarTimeStatistics(unittest.TestCase):
+    """Statistics of each star's times match NumPy's."""
+
+    def test_statistics(self):
+        means, standard_deviations = get_star_time_statistics(STAR_TIME_SAMPLES)
+
+        for star_idx, samples in enumerate(STAR_TIME_SAMPLES):
+            with self.subTest(star_idx=star_idx):
+                if samples:
+                    self.assertAlmostEqual(means[star_idx], np.mean(samples))
+                    self.assertAlmostEqual(
+                        standard_deviations[star_idx], np.std(samples)
+                    )
+                else:
+                    self.assertTrue(np.isnan(means[star_idx]))
+                    self.assertTrue(np.isnan(standard_deviations[star_idx]))
+
+    def test_quantiles(self):
+        for quantile in (0, 0.1, 0.5, 0.75, 0.9, 1):
+            quantiles = get_star_time_quantiles(STAR_TIME_SAMPLES, quantile)
+
+            for star_idx, samples in enumerate(STAR_TIME_SAMPLES):
+                with self.subTest(quantile=quantile, star_idx=star_idx):
+                    if samples:
+                        self.assertAlmostEqual(
+                            quantiles[star_idx], np.quantile(samples, quantile)
+                        )
+                    else:
+                        self.assertTrue(np.isnan(quantiles[star_idx]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+"""Tests for exclusion penalties, break-even times, and practice priorities."""
+
+import unittest
+from optimizer.exceptions import InvalidExcludedStarIds, NoValidRoutePossible
+from optimizer.optimize import get_optimal_routes
+from optimizer.optimize_dp import get_optimal_route_dp
+from optimizer.sensitivity import (
+    get_break_even_times,
+    get_exclusion_penalties,
+    get_practice_priorities,
+)
+from .test_engines import make_problem
+
+
+# Courses excluded to keep the problem small
+EXCLUDED_COURSE_IDS = {"WDW", "THI", "TTC", "RR"}
+
+# How far past each break-even time star times are moved
+PERTURBATION = 0.01
+
+
+class TestSensitivity(unittest.TestCase):
+    """Re-solving with a star's time changed agrees with each analysis."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.problem = make_problem(1)
+        cls.star_time_tuples = cls.problem.get_eligible_star_time_tuples(
+            excluded_course_ids=EXCLUDED_COURSE_IDS, excluded_star_ids=set()
+        )
+        cls.sensitivity_kwargs = {
+            "problem": cls.problem,
+            "excluded_course_ids": EXCLUDED_COURSE_IDS,
+            "excluded_star_ids": set(),
+            "max_num_upper_level_stars": 70,
+        }
+
+        routes, _ = get_optimal_routes(
+            star_time_tuples=list(cls.star_time_tuples),
+            max_num_upper_level_stars=70,
+            **cls.problem.get_structure_kwargs(),
+        )
+        cls.route_star_ids, cls.route_time = routes[0]
+
+        cls.exclusion_penalties = get_exclusion_penalties(
+            route_star_ids=cls.route_star_ids, **cls.sensitivity_kwargs
+        )
+
+    def solve(self, star_id: str, star_time: float | None) -> tuple[set[str], float]:
+        """Find the optimal route with a star's time changed.
+
+        The route is found with the dynamic programming engine, so that
+        it doesn't share any searching with the analyses.
+
+        Args:
+            star_id: The ID of the star whose time is changed.
+            star_time: The star's new time, or None to exclude it.
+
+        Returns:
+            A two-tuple containing the optimal route's star IDs and time.
+        """
+        return get_optimal_route_dp(
+            star_time_tuples=[
+                (star_time if other_star_id == star_id else time, other_star_id)
+                for time, other_star_id in self.star_time_tuples
+                if other_star_id != star_id or star_time is not None
+            ],
+            max_num_upper_level_stars=70,
+            **self.problem.get_structure_kwargs(),
+        )
+
+    def test_exclusion_penalties(self):
+        self.assertEqual(set(self.exclusion_penalties), self.route_star_ids)
+
+        for star_id, exclusion_penalty in self.exclusion_penalties.items():
+            with self.subTest(star_id=star_id):
+                if exclusion_penalty is None:
+                    with self.assertRaises(
+                        (InvalidExcludedStarIds, NoValidRoutePossible)
+                    ):
+                        self.problem.validate_excluded_star_ids({star_id})
+                        self.solve(star_id, None)
+
+                    continue
+
+                _, route_time = self.solve(star_id, None)
+
+                self.assertAlmostEqual(
+                    route_time - self.route_time, exclusion_penalty, places=6
+                )
+
+    def test_break_even_times(self):
+        break_even_times = get_break_even_times(
+            route_star_ids=self.route_star_ids,
+            route_time=self.route_time,
+            exclusion_penalties=self.exclusion_penalties,
+            **self.sensitivity_kwargs,
+        )
+
+        self.assertEqual(
+            set(break_even_times),
+            {star_id for _, star_id in self.star_time_tuples},
+        )
+
+        for star_id, star_break_even_time in break_even_times.items():
+            in_route = star_break_even_time["in_route"]
+            break_even_time = star_break_even_time["break_even_time"]
+
+            with self.subTest(star_id=star_id):
+                self.assertEqual(in_route, star_id in self.route_star_ids)
+
+                if break_even_time is None:
+                    # The star stays wherever it is however fast or slow
+                    # it gets
+                    route_star_ids, _ = self.solve(
+                        star_id, 0.0 if not in_route else 1e4
+                    )
+
+                    self.assertEqual(star_id in route_star_ids, in_route)
+
+                    continue
+
+                faster_route_star_ids, _ = self.solve(
+                    star_id, break_even_time - PERTURBATION
+                )
+                slower_route_star_ids, _ = self.solve(
+                    star_id, break_even_time + PERTURBATION
+                )
+
+                self.assertIn(star_id, faster_route_star_ids)
+                self.assertNotIn(star_id, slower_route_star_ids)
+
+    def test_practice_priorities(self):
+        star_times_dict = {star_id: time for time, star_id in self.star_time_tuples}
+
+        practice_priorities = get_practice_priorities(
+            improvement=(3.0, 0.05), **self.sensitivity_kwargs
+        )
+
+        self.assertEqual(
+            [row[4] for row in practice_priorities],
+            sorted((row[4] for row in practice_priorities), reverse=True),
+        )
+
+        for (
+            star_id,
+            star_time,
+            improved_star_time,
+            in_route,
+            route_time_gain,
+        ) in practice_priorities:
+            with self.subTest(star_id=star_id):
+                self.assertEqual(star_time, star_times_dict[star_id])
+                self.assertAlmostEqual(
+                    improved_star_time, max(star_time * 0.95 - 3.0, 0.0)
+                )
+                self.assertEqual(in_route, star_id in self.route_star_ids)
+
+                _, improved_route_time = self.solve(star_id, improved_star_time)
+
+                self.assertAlmostEqual(
+                    self.route_time - improved_route_time, route_time_gain, places=6
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Tests for the HTTP service."""
+
+import json
+import unittest
+from starlette.testclient import TestClient
+from optimizer.server import create_app
+from .test_engines import make_config_data
+
+
+class TestServer(unittest.TestCase):
+    """Route requests get the right responses."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.body = json.dumps(make_config_data(0))
+
+    def test_json_and_html(self):
+        with TestClient(create_app(num_processes=1, cache_size=4)) as client:
+            response = client.post("/route?format=json", content=self.body)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("route_star_ids", response.json())
+            self.assertNotIn("html", response.json())
+
+            response = client.post(
+                "/route", content=self.body, headers={"accept": "text/html"}
+            )
+
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers["content-type"].startswith("text/html"))
+
+    def test_invalid_requests(self):
+        with TestClient(create_app(num_processes=1, cache_size=4)) as client:
+            for url, body in (
+                ("/route", "not a config"),
+                ("/route?max_upper_level_stars=lots", self.body),
+                ("/route?max_upper_level_stars=-5", self.body),
+                ("/route?exclude_course_ids=NOT_A_COURSE", self.body),
+                ("/route?format=xml", self.body),
+            ):
+                with self.subTest(url=url):
+                    response = client.post(url, content=body)
+
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn("error", response.json())
+
+    def test_no_route_possible(self):
+        with TestClient(create_app(num_processes=1, cache_size=4)) as client:
+            response = client.post(
+                "/route?exclude_star_ids=DDD1&exclude_star_ids=DDD_100",
+                content=self.body,
+            )
+
+            self.assertEqual(response.status_code, 422)
+            self.assertIn("error", response.json())
+
+    def test_cache_hit_across_formats(self):
+        with TestClient(create_app(num_processes=1, cache_size=4)) as client:
+            with self.assertLogs("optimizer.server", level="INFO") as logs:
+                json_response = client.post("/route?format=json", content=self.body)
+                html_response = client.post("/route?format=html", content=self.body)
+
+            # The route is only found for the first request
+            self.assertEqual(
+                sum("Finding optimal route" in message for message in logs.output), 1
+            )
+            self.assertEqual(json_response.status_code, 200)
+            self.assertEqual(html_response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
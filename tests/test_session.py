@@ -0,0 +1,30 @@
+"""Tests for the optimizer session."""
+
+import unittest
+from optimizer.session import OptimizerSession
+from .test_engines import make_problem
+
+
+class TestOptimizerSession(unittest.TestCase):
+    """Changing star times keeps the session consistent."""
+
+    def test_bad_update_changes_nothing(self):
+        problem = make_problem(0)
+        session = OptimizerSession(
+            star_time_tuples=problem.get_eligible_star_time_tuples(
+                excluded_course_ids=set(), excluded_star_ids=set()
+            ),
+            max_num_upper_level_stars=70,
+            **problem.get_structure_kwargs(),
+        )
+        star_times_dict = dict(session.star_times_dict)
+        star_id = next(iter(star_times_dict))
+
+        with self.assertRaises(KeyError):
+            session.update_star_times({star_id: 0.0, "NOT_A_STAR": 0.0})
+
+        self.assertEqual(session.star_times_dict, star_times_dict)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""Tests for simulating route times."""
+
+import unittest
+import numpy as np
+from optimizer.constants import ConfigKeys
+from optimizer.optimize import get_optimal_routes
+from optimizer.problem import Problem
+from optimizer.simulate import simulate_route_times
+from .test_engines import make_config_data
+
+
+class TestSimulateRouteTimes(unittest.TestCase):
+    """Simulated route times follow the recorded times."""
+
+    def test_single_times(self):
+        # Keep only the first time of each star, so every trial of a
+        # route takes exactly as long as the route's time
+        config_data = make_config_data(0)
+
+        for star_id, times in config_data[ConfigKeys.TIMES_TABLE].items():
+            config_data[ConfigKeys.TIMES_TABLE][star_id] = times[:1]
+
+        problem = Problem(config_data)
+        routes, _ = get_optimal_routes(
+            star_time_tuples=problem.get_eligible_star_time_tuples(set(), set()),
+            max_num_upper_level_stars=70,
+            **problem.get_structure_kwargs(),
+        )
+        route_star_ids, route_time = routes[0]
+
+        route_times = simulate_route_times(
+            route_star_ids=route_star_ids, problem=problem, num_trials=1000, seed=0
+        )
+
+        self.assertEqual(len(route_times), 1000)
+        np.testing.assert_allclose(route_times, route_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
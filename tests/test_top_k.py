@@ -0,0 +1,122 @@
+"""Tests for finding the fastest several routes."""
+
+import itertools
+import unittest
+from optimizer.constants import NUM_STARS_IN_ROUTE
+from optimizer.exceptions import NoValidRoutePossible
+from optimizer.optimize import get_optimal_routes
+from optimizer.optimize_dp import get_optimal_route_dp
+from .test_engines import make_problem
+
+
+class TestTopK(unittest.TestCase):
+    """The routes found are the fastest distinct routes."""
+
+    def test_against_brute_force(self):
+        num_routes = 5
+
+        for seed, max_num_upper_level_stars in itertools.product(range(2), (70, 22)):
+            with self.subTest(
+                seed=seed, max_num_upper_level_stars=max_num_upper_level_stars
+            ):
+                problem = make_problem(seed)
+                structure_kwargs = problem.get_structure_kwargs()
+                hundred_coin_star_ids = set(
+                    structure_kwargs["base_star_alts_dict"].values()
+                )
+                star_time_tuples = sorted(
+                    problem.get_eligible_star_time_tuples(set(), set())
+                )
+
+                # Keep the problem small: only the stars of an optimal
+                # route and the two fastest other stars which aren't
+                # special or dependants are eligible
+                (route_star_ids, _), *_ = get_optimal_routes(
+                    star_time_tuples=list(star_time_tuples),
+                    max_num_upper_level_stars=max_num_upper_level_stars,
+                    **structure_kwargs,
+                )[0]
+                special_star_ids = (
+                    set(structure_kwargs["adjacency_list_dict"])
+                    | set(structure_kwargs["base_star_alts_dict"])
+                    | hundred_coin_star_ids
+                    | {
+                        dependant
+                        for dependants in structure_kwargs[
+                            "adjacency_list_dict"
+                        ].values()
+                        for dependant in dependants
+                    }
+                )
+                other_star_ids = [
+                    star_id
+                    for _, star_id in star_time_tuples
+                    if star_id not in route_star_ids and star_id not in special_star_ids
+                ][:2]
+                star_time_tuples = [
+                    (time, star_id)
+                    for time, star_id in star_time_tuples
+                    if star_id in route_star_ids or star_id in other_star_ids
+                ]
+
+                routes, search_completed = get_optimal_routes(
+                    star_time_tuples=list(star_time_tuples),
+                    max_num_upper_level_stars=max_num_upper_level_stars,
+                    num_routes=num_routes,
+                    **structure_kwargs,
+                )
+
+                # Go through every set of 70 stars in order of increasing
+                # time, checking whether each forms a route
+                def _get_star_count(star_ids):
+                    return sum(
+                        2 if star_id in hundred_coin_star_ids else 1
+                        for star_id in star_ids
+                    )
+
+                all_star_ids = [star_id for _, star_id in star_time_tuples]
+                star_times_dict = {star_id: time for time, star_id in star_time_tuples}
+                num_extra_stars = _get_star_count(all_star_ids) - NUM_STARS_IN_ROUTE
+                candidate_routes = sorted(
+                    (
+                        sum(star_times_dict.values())
+                        - sum(star_times_dict[star_id] for star_id in removed),
+                        sorted(set(all_star_ids) - set(removed)),
+                    )
+                    for num_removed in range(1, num_extra_stars + 1)
+                    for removed in itertools.combinations(all_star_ids, num_removed)
+                    if _get_star_count(removed) == num_extra_stars
+                )
+
+                brute_force_times = []
+
+                for route_time, star_ids in candidate_routes:
+                    try:
+                        get_optimal_route_dp(
+                            star_time_tuples=[
+                                (star_times_dict[star_id], star_id)
+                                for star_id in star_ids
+                            ],
+                            max_num_upper_level_stars=max_num_upper_level_stars,
+                            **structure_kwargs,
+                        )
+                    except NoValidRoutePossible:
+                        continue
+
+                    brute_force_times.append(route_time)
+
+                    if len(brute_force_times) == num_routes:
+                        break
+
+                self.assertTrue(search_completed)
+                self.assertEqual(
+                    len({frozenset(star_ids) for star_ids, _ in routes}), len(routes)
+                )
+                self.assertEqual(len(routes), len(brute_force_times))
+
+                for (_, route_time), brute_force_time in zip(routes, brute_force_times):
+                    self.assertAlmostEqual(route_time, brute_force_time, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()